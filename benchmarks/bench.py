@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# Benchmark harness for the ipa_idrange package, see "Benchmarks" in README.md
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from contextlib import redirect_stdout
+from typing import Any, Dict, List
+
+import generators
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import ipa_idrange as tool
+SEED = 1
+
+# Scenarios by name: number of ranges, share of AD trust ranges, number of identities, ID distribution
+SCENARIOS: Dict[str, Dict[str, Any]] = {}
+for ranges, identities in ((10, 1000), (1000, 100000), (10000, 1000000), (100, 10000000)):
+    for distribution in generators.DISTRIBUTIONS:
+        SCENARIOS[f"r{ranges}-i{identities}-{distribution}"] = {
+            "ranges": ranges, "trust_share": 0.3, "identities": identities, "distribution": distribution}
+
+SUITES = {
+    "quick": [name for name, s in SCENARIOS.items() if s["identities"] <= 1000],
+    "default": [name for name, s in SCENARIOS.items() if s["identities"] <= 1000000],
+    "full": list(SCENARIOS),
+}
+
+# Function to generate input files of a scenario into workdir, files already there are reused
+def prepare_inputs(name: str, workdir: str) -> Dict[str, str]:
+    scenario = SCENARIOS[name]
+    os.makedirs(workdir, exist_ok=True)
+    records = generators.generate_ranges(scenario["ranges"], scenario["trust_share"], SEED)
+    ranges_path = os.path.join(workdir, f"ranges-{scenario['ranges']}.txt")
+    identities_path = os.path.join(workdir, f"{name}.ldif")
+
+    if not os.path.exists(ranges_path):
+        with open(ranges_path, "w") as file:
+            file.write(generators.format_ranges(records))
+    if not os.path.exists(identities_path):
+        numbers = generators.generate_numbers(scenario["identities"], scenario["distribution"], generators.free_intervals(records), SEED)
+        with open(identities_path + ".tmp", "w") as file:
+            generators.write_identities(file, numbers, SEED)
+        os.replace(identities_path + ".tmp", identities_path)
+
+    return {"ranges": ranges_path, "identities": identities_path}
+
+# Function to run all the stages of one scenario in this process, the same way analyze() runs them
+def run_scenario(name: str, workdir: str) -> Dict[str, Any]:
+    paths = prepare_inputs(name, workdir)
+    profiler = tool.Profiler()
+    options = tool.AnalysisOptions(rangegap=200000, minrange=10, ridoffset=100000)
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        with profiler.phase("parse ranges") as phase:
+            id_ranges = tool.parse_idrange_input(tool.read_input_from_file(paths["ranges"]))
+            for idrange in id_ranges:
+                idrange.count()
+            id_ranges.sort(key=lambda x: x.first_id)
+            phase["items"] = len(id_ranges)
+
+        with profiler.phase("detect_range_overlaps") as phase:
+            tool.detect_range_overlaps(id_ranges)
+            phase["items"] = len(id_ranges)
+
+        with profiler.phase("propose_rid_ranges") as phase:
+            rid_allocator = tool.build_rid_allocator(id_ranges, options.ridoffset)
+            if tool.check_rid_bases(id_ranges):
+                tool.propose_rid_ranges(id_ranges, rid_allocator)
+            phase["items"] = len(id_ranges)
+
+        with profiler.phase("parse identities") as phase:
+            store = tool.parse_outofrange_store(tool.read_lines_from_file(paths["identities"]), sort=False)
+            phase["items"] = len(store)
+
+        with profiler.phase("sort identities") as phase:
+            store.sort()
+            phase["items"] = len(store)
+
+        with profiler.phase("grouping") as phase:
+            start = tool.separate_under1000(store.numbers)
+            groups = tool.group_identities_by_threshold(store.numbers, options.rangegap, start)
+            outliers, cleangroups = tool.separate_ranges_and_outliers(store.numbers, groups, options.minrange)
+            phase["items"] = len(store) - start
+
+        with profiler.phase("propose_range") as phase:
+            range_index = tool.build_range_index(id_ranges)
+            tool.propose_ranges(store.numbers, cleangroups, id_ranges, range_index, rid_allocator, options)
+            phase["items"] = len(cleangroups)
+
+        with profiler.phase("draw_ascii_table") as phase:
+            tool.draw_ascii_table(id_ranges)
+            phase["items"] = len(id_ranges)
+
+    report = profiler.report()
+    return {
+        "params": SCENARIOS[name],
+        "counts": {"ranges": len(id_ranges), "identities": len(store), "outliers": sum(map(len, outliers)), "proposals": len(cleangroups)},
+        "stages": {record.pop("phase"): record for record in report["phases"]},
+        "wall": report["wall"],
+        "peak_rss_mb": report["peak_rss_mb"],
+    }
+
+# Function to run scenarios, each one in its own interpreter so that peak memory is not carried over
+def run_suite(names: List[str], workdir: str) -> Dict[str, Any]:
+    results = {
+        "meta": {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "seed": SEED},
+        "scenarios": {},
+    }
+    for name in names:
+        print(f"{name} ...", file=sys.stderr, flush=True)
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), "--workdir", workdir, "scenario", name],
+                                check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+        results["scenarios"][name] = json.loads(output)
+    return results
+
+# Function to measure reading and parsing of a scenario's identities, plain and compressed with every method available,
+# compressed files are made next to the plain one once and reused
+def run_compression(name: str, workdir: str, repeat: int = 3) -> List[Dict[str, Any]]:
+    plain = prepare_inputs(name, workdir)["identities"]
+    methods = [("plain", None, "")]
+    for compression, module, suffix in (("gzip", "gzip", ".gz"), ("bzip2", "bz2", ".bz2"), ("xz", "lzma", ".xz")):
+        try:
+            methods.append((compression, __import__(module), suffix))
+        except ImportError:
+            print(f"{compression} is not available, skipped", file=sys.stderr)
+
+    results = []
+    for compression, module, suffix in methods:
+        path = plain + suffix
+        if module is not None and not os.path.exists(path):
+            with open(plain, "rb") as source, module.open(path + ".tmp", "wb") as target:
+                while True:
+                    data = source.read(1 << 20)
+                    if not data:
+                        break
+                    target.write(data)
+            os.replace(path + ".tmp", path)
+
+        # the best of several runs, reading lines alone and parsing them into the store
+        read, parse = float("inf"), float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in tool.read_lines_from_file(path):
+                pass
+            read = min(read, time.perf_counter() - start)
+            start = time.perf_counter()
+            store = tool.parse_outofrange_store(tool.read_lines_from_file(path), sort=False)
+            parse = min(parse, time.perf_counter() - start)
+        results.append({"compression": compression, "file_mb": round(os.path.getsize(path) / 2**20, 1),
+                        "read": round(read, 4), "parse": round(parse, 4), "identities": len(store)})
+
+    plain_mb = os.path.getsize(plain) / 2**20
+    for result in results:
+        result["read_mb_per_s"] = round(plain_mb / result["read"], 1)
+        result["parse_ids_per_s"] = round(result["identities"] / result["parse"])
+        result["parse_vs_plain"] = f"{result['parse'] / results[0]['parse']:.2f}x"
+    return results
+
+# Function to compare two result files stage by stage, returns number of regressions
+def compare_results(old: Dict[str, Any], new: Dict[str, Any], tolerance: float, noise: float) -> int:
+    rows = []
+    regressions = 0
+    for name, scenario in new["scenarios"].items():
+        if name not in old["scenarios"]:
+            continue
+        for stage, record in scenario["stages"].items():
+            before = old["scenarios"][name]["stages"].get(stage)
+            if before is None:
+                continue
+            ratio = record["wall"] / before["wall"] if before["wall"] > 0 else None
+            regressed = ratio is not None and ratio > 1 + tolerance and record["wall"] - before["wall"] > noise
+            regressions += regressed
+            rows.append([name, stage, f"{before['wall']:.4f}", f"{record['wall']:.4f}",
+                         "" if ratio is None else f"{ratio:.2f}x", "REGRESSION" if regressed else ""])
+        rows.append([name, "peak_rss_mb", old["scenarios"][name]["peak_rss_mb"], scenario["peak_rss_mb"], "", ""])
+    tool.draw_table(["scenario", "stage", "old", "new", "ratio", ""], rows)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks of idrange-analyze.py on generated data")
+    parser.add_argument('--workdir', type=str, default=os.path.join(ROOT, "benchmarks", "data"), \
+                        help="Directory for generated input files, they are reused between runs")
+    commands = parser.add_subparsers(dest="command")
+
+    run = commands.add_parser("run", help="Run a suite or chosen scenarios and save the results as JSON")
+    run.add_argument('scenarios', nargs='*', help="Scenarios to run, instead of --suite")
+    run.add_argument('--suite', choices=list(SUITES), default="default", help="Set of scenarios to run")
+    run.add_argument('--output', type=str, help="File to save the results to, printed if not set")
+
+    compare = commands.add_parser("compare", help="Compare two result files, fails if some stage got slower")
+    compare.add_argument('old', type=str)
+    compare.add_argument('new', type=str)
+    compare.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown, 0.2 is 20 percent")
+    compare.add_argument('--noise', type=float, default=0.01, help="Slowdowns shorter than this many seconds are ignored")
+
+    commands.add_parser("list", help="List scenarios and suites")
+
+    scenario = commands.add_parser("scenario", help="Run one scenario and print its results as JSON")
+    scenario.add_argument('name', choices=list(SCENARIOS))
+
+    compression = commands.add_parser("compression", help="Compare reading and parsing of plain and compressed identities")
+    compression.add_argument('name', nargs='?', default="r1000-i100000-clustered", choices=list(SCENARIOS), help="Scenario to take identities from")
+    compression.add_argument('--repeat', type=int, default=3, help="Runs of every measurement, the best one is shown")
+
+    generate = commands.add_parser("generate", help="Print generated ranges or out of range identities")
+    generate.add_argument('kind', choices=["ranges", "identities"])
+    generate.add_argument('--ranges', type=int, default=100, help="Number of ranges")
+    generate.add_argument('--trustshare', type=float, default=0.3, help="Share of AD trust ranges")
+    generate.add_argument('--identities', type=int, default=10000, help="Number of identities")
+    generate.add_argument('--distribution', choices=generators.DISTRIBUTIONS, default="clustered")
+    generate.add_argument('--seed', type=int, default=SEED)
+
+    args = parser.parse_args()
+    workdir = os.path.abspath(args.workdir)
+
+    if args.command == "run":
+        for name in args.scenarios:
+            if name not in SCENARIOS:
+                print(f"\nERROR: Unknown scenario {name}, see the list command")
+                parser.print_usage()
+                sys.exit(1)
+        results = run_suite(args.scenarios or SUITES[args.suite], workdir)
+        if args.output:
+            with open(args.output, "w") as file:
+                json.dump(results, file, indent=2)
+        else:
+            print(json.dumps(results, indent=2))
+    elif args.command == "compare":
+        with open(args.old) as old, open(args.new) as new:
+            regressions = compare_results(json.load(old), json.load(new), args.tolerance, args.noise)
+        if regressions:
+            print(f"\n{regressions} stages got slower by more than {args.tolerance:.0%}")
+            sys.exit(1)
+    elif args.command == "list":
+        for name, params in SCENARIOS.items():
+            suites = ", ".join(suite for suite, names in SUITES.items() if name in names)
+            print(f"{name}: {params['ranges']} ranges, {params['identities']} identities, {params['distribution']} ({suites})")
+    elif args.command == "scenario":
+        print(json.dumps(run_scenario(args.name, workdir)))
+    elif args.command == "compression":
+        results = run_compression(args.name, workdir, args.repeat)
+        columns = ["compression", "file_mb", "read", "read_mb_per_s", "parse", "parse_ids_per_s", "parse_vs_plain"]
+        tool.draw_table(columns, [[result[column] for column in columns] for result in results])
+    elif args.command == "generate":
+        records = generators.generate_ranges(args.ranges, args.trustshare, args.seed)
+        if args.kind == "ranges":
+            sys.stdout.write(generators.format_ranges(records))
+        else:
+            numbers = generators.generate_numbers(args.identities, args.distribution, generators.free_intervals(records), args.seed)
+            generators.write_identities(sys.stdout, numbers, args.seed)
+    else:
+        parser.print_usage()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# Deterministic generators of synthetic IPA data for benchmarking idrange-analyze.py
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Tuple, TextIO
+
+MAX_ID = 2147483647
+FIRST_ID = 100000
+DISTRIBUTIONS = ("clustered", "uniform", "adversarial")
+
+# Function to generate ID range records: ipa-local ranges with RID bases, some without them, AD trust ranges
+# and a few ranges overlapping their neighbours, laid out over the whole ID space
+def generate_ranges(count: int, trust_share: float = 0.3, seed: int = 1, domain: str = "EXAMPLE.TEST") -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    suffix = ",".join("dc=" + part.lower() for part in domain.split("."))
+    step = (MAX_ID - FIRST_ID) // count
+    size = max(min(step // 2, 200000) // 1000 * 1000, 1000)
+    trust_domains = [f"AD{i}.{domain}" for i in range(count // 20 + 1)]
+    trust_sids = [f"S-1-5-21-{rng.randrange(10**9)}-{rng.randrange(10**9)}-{rng.randrange(10**9)}" for _ in trust_domains]
+    trust_next_rid = [0] * len(trust_domains)
+    next_rid = 1000
+    records = []
+
+    for i in range(count):
+        first_id = FIRST_ID + i * step + rng.randrange(0, step - size + 1) // 1000 * 1000
+        range_size = size
+        # every hundredth range is grown over its neighbour
+        if rng.random() < 0.01:
+            range_size = min(step + size // 2, MAX_ID - first_id)
+        record = {"first_id": first_id, "size": range_size}
+
+        if rng.random() < trust_share:
+            t = rng.randrange(len(trust_domains))
+            record["name"] = f"{trust_domains[t]}_id_range_{i}"
+            record["dn"] = f"cn={record['name']},cn=ranges,cn=etc,{suffix}"
+            record["type"] = "ipa-ad-trust"
+            record["base_rid"] = trust_next_rid[t]
+            record["sid"] = trust_sids[t]
+            trust_next_rid[t] += range_size
+        else:
+            record["name"] = f"{domain}_id_range_{i}"
+            record["dn"] = f"cn={record['name']},cn=ranges,cn=etc,{suffix}"
+            record["type"] = "ipa-local"
+            # every tenth local range misses RID bases, like ranges from before the trust support
+            if rng.random() >= 0.1:
+                record["base_rid"] = next_rid
+                record["secondary_base_rid"] = next_rid + range_size + 1000
+                next_rid += 2 * (range_size + 1000)
+        records.append(record)
+
+    # idrange-find sorts by name
+    records.sort(key=lambda record: record["name"])
+    return records
+
+# Function to render range records as `ipa idrange-find --all --raw` output
+def format_ranges(records: List[Dict[str, Any]]) -> str:
+    lines = ["----------------", f"{len(records)} ranges matched", "----------------"]
+    for record in records:
+        lines.append(f"  dn: {record['dn']}")
+        lines.append(f"  cn: {record['name']}")
+        lines.append(f"  ipabaseid: {record['first_id']}")
+        lines.append(f"  ipaidrangesize: {record['size']}")
+        if "base_rid" in record:
+            lines.append(f"  ipabaserid: {record['base_rid']}")
+        if "secondary_base_rid" in record:
+            lines.append(f"  ipasecondarybaserid: {record['secondary_base_rid']}")
+        if "sid" in record:
+            lines.append(f"  ipanttrusteddomainsid: {record['sid']}")
+        lines.append(f"  iparangetype: {record['type']}")
+        lines.append("  objectclass: ipaIDrange")
+        lines.append("  objectclass: " + ("ipaTrustedADDomainRange" if record["type"] == "ipa-ad-trust" else "ipaDomainIDRange"))
+        lines.append("")
+    lines.append("----------------------------")
+    lines.append(f"Number of entries returned {len(records)}")
+    lines.append("----------------------------")
+    return "\n".join(lines) + "\n"
+
+# Function to get ID intervals not covered by ipa-local ranges, the ones an ldapsearch for IDs out of ranges looks into
+def free_intervals(records: List[Dict[str, Any]], first_id: int = 1000) -> List[Tuple[int, int]]:
+    local = sorted((record["first_id"], record["first_id"] + record["size"] - 1) for record in records if record["type"] == "ipa-local")
+    free = []
+    next_id = first_id
+    for start, end in local:
+        if start > next_id:
+            free.append((next_id, start - 1))
+        next_id = max(next_id, end + 1)
+    if next_id <= MAX_ID:
+        free.append((next_id, MAX_ID))
+    return free
+
+# Function to generate numbers of identities: a few dense clusters like migrated NIS domains, uniform noise,
+# or the worst case for grouping - blocks of exactly minrange IDs just further apart than rangegap
+def generate_numbers(count: int, distribution: str, free: List[Tuple[int, int]], seed: int = 1,
+                     rangegap: int = 200000, minrange: int = 10) -> Iterator[int]:
+    rng = random.Random(seed)
+    lengths = [end - start + 1 for start, end in free]
+    offsets = list(accumulate(lengths))
+    total = offsets[-1]
+
+    # Function to map a position in free space to ID
+    def free_id(position: int) -> int:
+        i = bisect_right(offsets, position)
+        return free[i][0] + position - (offsets[i - 1] if i else 0)
+
+    if distribution == "uniform":
+        for _ in range(count):
+            yield free_id(rng.randrange(total))
+
+    elif distribution == "clustered":
+        clusters = max(1, count // 2000)
+        left = count
+        for c in range(clusters):
+            size = left if c == clusters - 1 else min(left, rng.randint(1, 3999))
+            left -= size
+            i = bisect_right(offsets, rng.randrange(total))
+            start, end = free[i]
+            number = rng.randint(start, end)
+            for _ in range(size):
+                yield number
+                number += rng.randint(1, 3)
+                if number > end:
+                    number = start
+
+    elif distribution == "adversarial":
+        produced = 0
+        while produced < count:
+            for start, end in free:
+                number = start
+                while number + minrange - 1 <= end and produced < count:
+                    for _ in range(min(minrange, count - produced)):
+                        yield number
+                        number += 1
+                        produced += 1
+                    number += rangegap
+                if produced >= count:
+                    break
+            # all the space is used, start over with the same numbers for groups
+            if produced == 0:
+                break
+
+    else:
+        raise ValueError(f"unknown distribution {distribution}")
+
+# Function to write out of range identities as ldapsearch LDIF, about a half of them users, the others groups
+def write_identities(file: TextIO, numbers: Iterator[int], seed: int = 1, suffix: str = "dc=example,dc=test") -> int:
+    rng = random.Random(seed)
+    chunk = []
+    written = 0
+    for number in numbers:
+        if rng.random() < 0.5:
+            chunk.append(f"dn: uid=user{written},cn=users,cn=accounts,{suffix}\nuidNumber: {number}\n\n")
+        else:
+            chunk.append(f"dn: cn=group{written},cn=groups,cn=accounts,{suffix}\ngidNumber: {number}\n\n")
+        written += 1
+        if len(chunk) >= 10000:
+            file.write("".join(chunk))
+            chunk = []
+    file.write("".join(chunk))
+    return written
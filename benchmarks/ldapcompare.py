@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# Check that reading over LDAP gives the same report as reading files, see "Reading straight from LDAP" in README.md.
+# benchmarks/ldapserver.py serves the files, and idrange-analyze.py runs with --ldap-uri and with --outofrange
+import os
+import sys
+import difflib
+import argparse
+import subprocess
+from typing import List, Optional, Tuple
+
+import bench
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOL = os.path.join(ROOT, "idrange-analyze.py")
+SERVER = os.path.join(ROOT, "benchmarks", "ldapserver.py")
+
+# Function to start the stand-in server on a free port, returns the process and the URI it listens on
+def start_server(files: List[str]) -> Tuple[subprocess.Popen, str]:
+    server = subprocess.Popen([sys.executable, SERVER, "--port", "0"] + files, stdout=subprocess.PIPE, universal_newlines=True)
+    line = server.stdout.readline()
+    if not line.startswith("Serving"):
+        server.kill()
+        server.wait()
+        raise RuntimeError(f"ldapserver.py didn't start: {line.strip()}")
+    return server, line.split()[-1]
+
+# Function to run the tool and get its output, ranges file is given on stdin the same way it is piped to the tool
+def run_tool(args: List[str], stdin_path: Optional[str] = None) -> str:
+    with open(stdin_path or os.devnull) as stdin:
+        return subprocess.run([sys.executable, TOOL] + args, stdin=stdin, stdout=subprocess.PIPE,
+                              stderr=subprocess.STDOUT, universal_newlines=True).stdout
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the report read over LDAP with the one read from files")
+    parser.add_argument('files', nargs='*', help="`ipa idrange-find --all --raw` output and out of range LDIF with the same suffix, "
+                                                 "a generated scenario is used when not given")
+    parser.add_argument('--scenario', default="r10-i1000-clustered", choices=list(bench.SCENARIOS), help="Generated scenario to use")
+    parser.add_argument('--workdir', type=str, default=os.path.join(ROOT, "benchmarks", "data"), help="Directory for generated input files")
+    parser.add_argument('--pool', type=str, default="1,4", help="Comma separated --ldap-pool sizes to try")
+    parser.add_argument('--pagesize', type=int, default=7, help="--ldappagesize, small so that paging is exercised")
+    parser.add_argument('--format', choices=["text", "jsonl", "csv"], default="text", help="Report format to compare")
+    args = parser.parse_args()
+
+    if args.files and len(args.files) != 2:
+        print("\nERROR: Give a ranges file and an out of range LDIF file, or none of them!")
+        parser.print_usage()
+        sys.exit(1)
+    if args.files:
+        ranges_path, identities_path = args.files
+    else:
+        paths = bench.prepare_inputs(args.scenario, os.path.abspath(args.workdir))
+        ranges_path, identities_path = paths["ranges"], paths["identities"]
+    format_args = [] if args.format == "text" else ["--format", args.format]
+
+    expected = run_tool(["--outofrange", identities_path] + format_args, ranges_path)
+    server, uri = start_server([ranges_path, identities_path])
+    differences = 0
+    try:
+        for size in args.pool.split(","):
+            output = run_tool(["--ldap-uri", uri, "--ldap-pool", size, "--ldappagesize", str(args.pagesize)] + format_args)
+            if output == expected:
+                print(f"--ldap-pool {size}: same report, {len(output.splitlines())} lines")
+                continue
+            differences += 1
+            print(f"--ldap-pool {size}: reports differ")
+            diff = difflib.unified_diff(expected.splitlines(), output.splitlines(), "files", "ldap", lineterm="")
+            for line in list(diff)[:40]:
+                print(line)
+    finally:
+        server.terminate()
+        server.wait()
+
+    if differences:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
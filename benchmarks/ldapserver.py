@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# Stand-in LDAP server serving ranges and identities from files, to try out --ldap-uri without IPA, see "Reading straight from LDAP" in README.md
+import os
+import sys
+import time
+import argparse
+import socketserver
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from ipa_idrange.inputs import iter_ldif_records, read_lines_from_file
+from ipa_idrange.ldapsource import PAGED_RESULTS_OID, ber_element, ber_elements, ber_int, ber_sequence, ber_string, ber_to_int
+
+Entry = Tuple[str, Dict[str, List[str]]]
+
+# Function to read entries of a file with `ipa idrange-find --all --raw` output or LDIF. Entries without object classes
+# get the ones searches of the tool ask for, guessed from their place in the tree and their attributes
+def load_entries(file_path: str) -> List[Entry]:
+    entries = []
+    # ipa command output is indented by two spaces, LDIF continuation lines by one
+    lines = (line.lstrip() if line.startswith("  ") else line for line in read_lines_from_file(file_path))
+    for record in iter_ldif_records(lines):
+        dn = None
+        attributes: Dict[str, List[str]] = {}
+        for key, value in record:
+            if key.lower() == "dn":
+                dn = value
+            else:
+                attributes.setdefault(key.lower(), []).append(value)
+        if dn is None:
+            continue
+        if "objectclass" not in attributes:
+            if ",cn=ranges,cn=etc," in dn.lower():
+                attributes["objectclass"] = ["ipaIDrange"]
+            elif "uidnumber" in attributes:
+                attributes["objectclass"] = ["posixaccount"]
+            elif "gidnumber" in attributes:
+                attributes["objectclass"] = ["posixgroup"]
+        entries.append((dn, attributes))
+    return entries
+
+# Function to build the root DSE entry, naming contexts are the dc= suffixes of the entries
+def root_dse(entries: List[Entry]) -> Entry:
+    contexts = []
+    for dn, _ in entries:
+        start = dn.lower().find("dc=")
+        if start != -1 and dn[start:] not in contexts:
+            contexts.append(dn[start:])
+    return "", {"objectclass": ["top"], "namingcontexts": contexts}
+
+# Function to compare values of an attribute, numbers as numbers and the rest case-insensitive
+def compare_key(value: str) -> Any:
+    try:
+        return (0, int(value))
+    except ValueError:
+        return (1, value.lower())
+
+# Function to compile an encoded search filter into a function matching entry attributes
+def compile_filter(data: bytes, tag: int, content_start: int, content_end: int) -> Callable[[Dict[str, List[str]]], bool]:
+    if tag in (0xa0, 0xa1, 0xa2):
+        items = [compile_filter(data, *element) for element in ber_elements(data, content_start, content_end)]
+        if tag == 0xa0:
+            return lambda attributes: all(item(attributes) for item in items)
+        if tag == 0xa1:
+            return lambda attributes: any(item(attributes) for item in items)
+        return lambda attributes: not items[0](attributes)
+    if tag == 0x87:
+        name = data[content_start:content_end].decode().lower()
+        return lambda attributes: name == "objectclass" or name in attributes
+    if tag in (0xa3, 0xa5, 0xa6):
+        (_, name_start, name_end), (_, value_start, value_end) = list(ber_elements(data, content_start, content_end))[:2]
+        name = data[name_start:name_end].decode().lower()
+        wanted = compare_key(data[value_start:value_end].decode('utf-8', 'replace'))
+        if tag == 0xa3:
+            return lambda attributes: any(compare_key(value) == wanted for value in attributes.get(name, ()))
+        if tag == 0xa5:
+            return lambda attributes: any(compare_key(value) >= wanted for value in attributes.get(name, ()))
+        return lambda attributes: any(compare_key(value) <= wanted for value in attributes.get(name, ()))
+    # substring and other filters the tool doesn't use match nothing
+    return lambda attributes: False
+
+# Class for a connection of a client, every search request is answered from the entries of the server
+class LdapHandler(socketserver.StreamRequestHandler):
+
+    def read_message(self) -> Optional[bytes]:
+        header = self.rfile.read(2)
+        if len(header) < 2:
+            return None
+        length = header[1]
+        if length & 0x80:
+            encoded = self.rfile.read(length & 0x7f)
+            header += encoded
+            length = int.from_bytes(encoded, 'big')
+        content = self.rfile.read(length)
+        return None if len(content) < length else header + content
+
+    def send(self, message_id: int, operation: bytes, controls: bytes = b"") -> None:
+        self.wfile.write(ber_sequence(ber_int(message_id), operation, controls))
+
+    def handle(self) -> None:
+        # results of paged searches by request, pages are slices of them
+        results: Dict[bytes, List[Entry]] = {}
+        while True:
+            message = self.read_message()
+            if message is None:
+                return
+            _, start, end = ber_element(message, 0, len(message))
+            elements = list(ber_elements(message, start, end))
+            message_id = ber_to_int(message, elements[0][1], elements[0][2])
+            tag, operation_start, operation_end = elements[1]
+            if tag == 0x42:
+                return
+            if tag == 0x60:
+                self.bind(message, operation_start, operation_end, message_id)
+            elif tag == 0x63:
+                controls = next(((s, e) for t, s, e in elements[2:] if t == 0xa0), None)
+                self.search(message, operation_start, operation_end, controls, message_id, results)
+            self.wfile.flush()
+
+    def bind(self, message: bytes, start: int, end: int, message_id: int) -> None:
+        _, (_, dn_start, dn_end), (_, password_start, password_end) = list(ber_elements(message, start, end))[:3]
+        code = 0
+        if self.server.password is not None and dn_end > dn_start and message[password_start:password_end] != self.server.password.encode():
+            code = 49   # invalid credentials
+        self.send(message_id, ber_sequence(ber_int(code, 0x0a), ber_string(""), ber_string("" if code == 0 else "Invalid credentials"), tag=0x61))
+
+    def search(self, message: bytes, start: int, end: int, controls: Optional[Tuple[int, int]], message_id: int,
+               results: Dict[bytes, List[Entry]]) -> None:
+        elements = list(ber_elements(message, start, end))
+        base = message[elements[0][1]:elements[0][2]].decode('utf-8', 'replace').lower()
+        scope = ber_to_int(message, elements[1][1], elements[1][2])
+        wanted = [message[s:e].decode().lower() for _, s, e in ber_elements(message, elements[7][1], elements[7][2])]
+
+        # simple paged results control asks for page size and continues after the cookie
+        page_size, offset = 0, 0
+        if controls is not None:
+            for _, control_start, control_end in ber_elements(message, *controls):
+                control = list(ber_elements(message, control_start, control_end))
+                if message[control[0][1]:control[0][2]] == PAGED_RESULTS_OID.encode():
+                    _, sequence_start, sequence_end = ber_element(message, control[-1][1], control[-1][2])
+                    (_, size_start, size_end), (_, cookie_start, cookie_end) = list(ber_elements(message, sequence_start, sequence_end))[:2]
+                    page_size = ber_to_int(message, size_start, size_end)
+                    offset = int(message[cookie_start:cookie_end] or b"0")
+
+        request = message[start:end]
+        entries = results.get(request) if offset else None
+        if entries is None:
+            matches = compile_filter(message, *elements[6])
+            if base == "" and scope == 0:
+                candidates = [root_dse(self.server.entries)]
+            else:
+                candidates = [(dn, attributes) for dn, attributes in self.server.entries
+                              if (dn.lower() == base if scope == 0 else dn.lower().endswith(base))]
+            entries = [(dn, attributes) for dn, attributes in candidates if matches(attributes)]
+            if page_size:
+                results[request] = entries
+
+        page = entries[offset:offset + page_size] if page_size else entries
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        for dn, attributes in page:
+            selected = [(name, values) for name, values in attributes.items() if not wanted or name in wanted]
+            self.send(message_id, ber_sequence(ber_string(dn), ber_sequence(*(
+                ber_sequence(ber_string(name), ber_sequence(*(ber_string(value) for value in values), tag=0x31))
+                for name, values in selected)), tag=0x64))
+
+        response_controls = b""
+        if page_size:
+            cookie = str(offset + page_size).encode() if offset + page_size < len(entries) else b""
+            if not cookie:
+                results.pop(request, None)
+            value = ber_sequence(ber_int(0), ber_string(cookie))
+            response_controls = ber_sequence(ber_sequence(ber_string(PAGED_RESULTS_OID), ber_string(value)), tag=0xa0)
+        self.send(message_id, ber_sequence(ber_int(0, 0x0a), ber_string(""), ber_string(""), tag=0x65), response_controls)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in LDAP server serving ranges and identities from files")
+    parser.add_argument('files', nargs='+', help="`ipa idrange-find --all --raw` output and LDIF files, e.g. examples/ranges.txt examples/outofranges.ldif")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=3389, help="Port to listen on, 0 picks a free one")
+    parser.add_argument('--password', help="Password every non-anonymous bind has to use, any password is accepted by default")
+    parser.add_argument('--latency', type=float, default=0, help="Milliseconds of delay before every page of results, to simulate a remote server")
+    args = parser.parse_args()
+
+    entries = []
+    for file_path in args.files:
+        entries.extend(load_entries(file_path))
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    with socketserver.ThreadingTCPServer((args.host, args.port), LdapHandler) as server:
+        server.daemon_threads = True
+        server.entries = entries
+        server.password = args.password
+        server.latency = args.latency / 1000
+        print(f"Serving {len(entries)} entries on ldap://{args.host}:{server.server_address[1]}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Analysis of IPA ID ranges: overlaps, missing RID bases and ranges for IDs out of ranges
+
+    from ipa_idrange import analyze, parse_idrange_input, parse_outofrange_store, read_input_from_file, read_lines_from_file
+
+    ranges = parse_idrange_input(read_input_from_file("idranges.txt"))
+    analysis = analyze(ranges, parse_outofrange_store(read_lines_from_file("outofranges.ldif")))
+    for proposal in analysis.range_proposals:
+        print(proposal.command)
+"""
+from .models import (
+    IDRange, IDentity, IdentityStore, IntervalIndex, RidAllocator,
+    AnalysisOptions, Analysis, Overlap, RidProposal, RangeProposal, Outliers, RangeChange, RidConflict, RangeDiff, Realm, Headroom,
+    IdCollision, Collisions, Relocation, RelocationPlan, Host, HostConflict, HostScan, LdapSearch,
+)
+from .ranges import (
+    find_id_gaps, generate_ldapsearch_commands, create_ldapsearches, format_ldapsearch_commands, build_outofrange_filters, build_range_index, detect_range_overlaps,
+    get_ipa_local_ranges, classify_identities,
+)
+from .rids import build_rid_allocator, detect_rid_overlaps, propose_rid_ranges, create_ridbase_command, create_ridbase_ldif, check_rid_bases
+from .identities import (
+    group_identities_by_threshold, separate_under1000, separate_ranges_and_outliers, partition_identities_optimal,
+    sweep_parameters, round_idrange, get_rangename_base, create_range_command, propose_range,
+)
+from .inputs import (
+    parse_idrange_input, parse_outofrange_stream, parse_outofrange_store, parse_outofrange_input,
+    read_lines_from_file, read_input_from_file, read_input_from_stdin,
+)
+from .analysis import analyze, partition_identities, propose_ranges, sweep
+from .diff import diff_ranges
+from .collisions import find_collisions
+from .output import draw_table, draw_ascii_table, render_report, render_sweep, render_diff
+from .headroom import plan_headroom
+from .relocation import plan_relocation, relocation_lines
+from .hostscan import find_hosts, scan_host_accounts
+from .fleet import find_fleet_realms, parse_fleet_manifest, run_fleet
+from .cache import ParseCache
+from .ldapsource import LdapConnection, LdapPool, fetch_ranges, fetch_outofrange
+from .service import RangeService, serve
+from .profiling import Profiler
@@ -0,0 +1,124 @@
+"""
+Analysis of ranges and identities, results are returned, nothing gets printed
+"""
+import copy
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .models import AnalysisOptions, Analysis, IDRange, IdentityStore, IntervalIndex, Outliers, RangeProposal, RidAllocator
+from .ranges import build_range_index, classify_identities, create_ldapsearches, detect_range_overlaps, format_ldapsearch_commands
+from .rids import build_rid_allocator, detect_rid_overlaps, propose_rid_ranges
+from .identities import group_identities_by_threshold, get_rangename_base, partition_identities_optimal, \
+    propose_range, separate_ranges_and_outliers, separate_under1000, sweep_parameters
+from .collisions import find_collisions
+from .relocation import plan_relocation
+from .profiling import Profiler
+
+# Function to split sorted IDs from start on into outliers and groups to propose ranges for, by the strategy chosen,
+# shared tells how many identities of a number are user private groups counted with their users
+def partition_identities(numbers: array, range_index: IntervalIndex, options: AnalysisOptions, start: int = 0,
+                         shared: Optional[Dict[int, int]] = None) -> Tuple[List[range],List[range]]:
+    if options.strategy == "optimal":
+        # Find the cheapest split of IDs into ranges and outliers
+        return partition_identities_optimal(numbers, range_index, options.rangecost, options.wastecost, options.outliercost, start, shared)
+
+    # Get initial divide of IDs into groups, then outliers from too small groups and clean groups for further processing
+    groups = group_identities_by_threshold(numbers, options.rangegap, start)
+    return separate_ranges_and_outliers(numbers, groups, options.minrange)
+
+# Function to analyze ranges, and identities out of ranges (or all of them with classify) sorted by number if given,
+# with relocate outliers get new IDs planned in free IDs of ranges
+def analyze(id_ranges: List[IDRange], identities: Optional[IdentityStore] = None, options: Optional[AnalysisOptions] = None,
+            classify: bool = False, profiler: Optional[Profiler] = None, relocate: bool = False) -> Analysis:
+    options = options or AnalysisOptions()
+    profiler = profiler or Profiler()
+
+    # ranges given are left as they are, proposals are applied to their copies
+    for idrange in id_ranges:
+        idrange.count()
+    ranges = sorted(id_ranges, key=lambda x: x.first_id)
+    result = [copy.copy(idrange) for idrange in ranges]
+    analysis = Analysis(options, ranges, result)
+
+    with profiler.phase("range overlaps") as phase:
+        analysis.overlaps = detect_range_overlaps(result)
+        analysis.rid_overlaps = detect_rid_overlaps(result)
+        phase["items"] = len(result)
+
+    with profiler.phase("RID bases") as phase:
+        rid_allocator = build_rid_allocator(result, options.ridoffset, options.ridpolicy)
+        analysis.rid_proposals = propose_rid_ranges(result, rid_allocator)
+        phase["items"] = len(result)
+
+    # without identities we can only tell how to search for them
+    if identities is None:
+        with profiler.phase("ldapsearch commands"):
+            users = create_ldapsearches(result, "account", "uid", "users", options.filterclauses, options.ldappagesize)
+            groups = create_ldapsearches(result, "group", "gid", "groups", options.filterclauses, options.ldappagesize)
+            analysis.ldapsearch_users = format_ldapsearch_commands(users)
+            analysis.ldapsearch_groups = format_ldapsearch_commands(groups)
+            analysis.ldapsearches = users + groups
+        return analysis
+
+    # repeated entries are left out, users and their private groups count as one identity
+    with profiler.phase("collisions") as phase:
+        analysis.collisions, identities = find_collisions(identities)
+        phase["items"] = len(identities)
+
+    analysis.identities = identities
+    analysis.outofrange = identities
+    if classify:
+        with profiler.phase("classify identities") as phase:
+            analysis.classification, outofrange_spans = classify_identities(identities, ranges)
+            analysis.outofrange = identities.select(outofrange_spans)
+            phase["items"] = len(identities)
+
+    # If creating range under 1000 is not allowed, IDs under 1000 are excluded from range proposition
+    numbers = analysis.outofrange.numbers
+    start = 0 if options.allowunder1000 else separate_under1000(numbers)
+    analysis.under1000 = Outliers(analysis.outofrange, [range(0, start)] if start > 0 else [])
+
+    with profiler.phase("grouping") as phase:
+        range_index = build_range_index(result)
+        outliers, cleangroups = partition_identities(numbers, range_index, options, start, analysis.collisions.upg)
+        analysis.outliers = Outliers(analysis.outofrange, outliers)
+        phase["items"] = len(numbers) - start
+
+    with profiler.phase("range proposals") as phase:
+        analysis.range_proposals = propose_ranges(numbers, cleangroups, result, range_index, rid_allocator, options)
+        phase["items"] = len(cleangroups)
+
+    if relocate:
+        with profiler.phase("relocation") as phase:
+            analysis.relocation = plan_relocation(analysis)
+            phase["items"] = len(analysis.outliers)
+
+    return analysis
+
+# Function to propose ranges for groups of sorted IDs, the ranges created are added to result and range index
+def propose_ranges(numbers: array, groups: List[range], result: List[IDRange], range_index: IntervalIndex,
+                   rid_allocator: RidAllocator, options: AnalysisOptions) -> List[RangeProposal]:
+    proposals = []
+    if len(groups) > 0:
+        # Get IDranges base name
+        basename, counter = get_rangename_base(result)
+
+        # Create propositions for new ideranges
+        for i, group in enumerate(groups):
+            proposal = propose_range(numbers[group[0]], numbers[group[-1]], range_index, rid_allocator, basename, i + counter, options.norounding, options.allowunder1000)
+            proposals.append(proposal)
+            # If range creation didn't fail, add it to the collection
+            if proposal.idrange is not None:
+                result.append(proposal.idrange)
+                range_index.insert(proposal.idrange.first_id, proposal.idrange.last_id, proposal.idrange)
+        result.sort(key=lambda x: x.first_id)
+    return proposals
+
+# Function to get proposal statistics for sorted identities out of ranges for every combination of rangegaps and minranges,
+# returns how many IDs were considered alongside the statistics. Repeated entries are left out and user private groups
+# count as one with their users
+def sweep(identities: IdentityStore, rangegaps: List[int], minranges: List[int], allowunder1000: bool = False) -> Tuple[int, List[Dict[str, int]]]:
+    collisions, identities = find_collisions(identities)
+    start = 0 if allowunder1000 else separate_under1000(identities.numbers)
+    shared = sum(pairs for number, pairs in collisions.upg.items() if allowunder1000 or number >= 1000)
+    return len(identities) - start - shared, sweep_parameters(identities.numbers, rangegaps, minranges, start, collisions.upg)
@@ -0,0 +1,169 @@
+"""
+Cache of parsed input files, so repeated runs on the same exports don't parse them again
+"""
+import os
+import sys
+import json
+import struct
+import hashlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import IDRange, IdentityStore
+
+RANGE_ATTRIBUTES = ["name", "size", "first_id", "base_rid", "secondary_base_rid", "suffix", "type", "dn", "sid", "domain"]
+
+# Class for a directory of cache entries with a size cap, the least recently used entries are removed first.
+# Entry is a file with a magic line, JSON header and binary columns aligned to 8 bytes after it
+class ParseCache:
+
+    magic       : bytes = b"IPAIDRC2\n"
+    sample_size : int = 1 << 20   # bytes from the beginning and the end of a file that go into its key
+
+    def __init__(self, directory: str, max_bytes: int, verify: bool = False):
+        self.directory : str = directory
+        self.max_bytes : int = max_bytes
+        self.verify    : bool = verify   # hash whole files, not only their beginning and end
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".cache")
+
+    # Function to get the key of a file: a hash of its size, mtime and the content from its beginning and end,
+    # hashing whole multi-GB exports would take longer than parsing them. An export changed only in its middle
+    # keeping the same size and mtime isn't noticed unless verify hashes the whole content. None if the file can't be read
+    def key(self, file_path: str, kind: str) -> Optional[str]:
+        try:
+            with open(file_path, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                digest = hashlib.sha256(f"{self.magic!r}:{kind}:{sys.byteorder}:{stat.st_size}:{stat.st_mtime_ns}:{self.verify}".encode())
+                if self.verify:
+                    for block in iter(lambda: file.read(self.sample_size), b""):
+                        digest.update(block)
+                else:
+                    digest.update(file.read(self.sample_size))
+                    if stat.st_size > 2 * self.sample_size:
+                        file.seek(-self.sample_size, os.SEEK_END)
+                    digest.update(file.read(self.sample_size))
+        except OSError:
+            return None
+        return f"{kind}-{digest.hexdigest()}"
+
+    # Function to write an entry atomically and evict old entries over the size cap
+    def write(self, key: str, header: Dict[str, Any], columns: List[Tuple[str, Any]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # column offsets are relative to the end of the header, so they are known before it is written
+        offset = 0
+        header["columns"] = {}
+        for name, column in columns:
+            nbytes = len(column) * (column.itemsize if isinstance(column, array) else 1)
+            header["columns"][name] = [getattr(column, "typecode", "B"), offset, nbytes]
+            offset += (nbytes + 7) // 8 * 8
+        encoded = json.dumps(header).encode('utf-8')
+        encoded += b" " * (-(len(self.magic) + 8 + len(encoded)) % 8)
+
+        temporary = self.path(key) + f".{os.getpid()}.tmp"
+        try:
+            with open(temporary, 'wb') as file:
+                file.write(self.magic)
+                file.write(struct.pack("<Q", len(encoded)))
+                file.write(encoded)
+                for name, column in columns:
+                    file.write(column)
+                    file.write(b"\0" * (-file.tell() % 8))
+            os.replace(temporary, self.path(key))
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        self.evict()
+
+    # Function to read an entry header and its columns, None if there is no valid entry
+    def read(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                if file.read(len(self.magic)) != self.magic:
+                    raise ValueError("not a cache entry")
+                header_length, = struct.unpack("<Q", file.read(8))
+                header = json.loads(file.read(header_length).decode('utf-8'))
+                start = len(self.magic) + 8 + header_length
+
+                columns: Dict[str, Any] = {}
+                for name, (typecode, offset, nbytes) in header["columns"].items():
+                    # data are read from the file straight into the columns, without a buffer in between
+                    file.seek(start + offset)
+                    if typecode == "B":
+                        columns[name] = bytearray(nbytes)
+                        if file.readinto(columns[name]) != nbytes:
+                            raise ValueError("truncated cache entry")
+                    else:
+                        columns[name] = array(typecode)
+                        if nbytes % columns[name].itemsize:
+                            raise ValueError("broken cache column")
+                        columns[name].fromfile(file, nbytes // columns[name].itemsize)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, KeyError, TypeError, struct.error):
+            # broken entry, e.g. from an interrupted run or a different platform, it just gets parsed again
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        # the entry was used, which makes it the most recent one for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return header, columns
+
+    # Function to remove the least recently used entries until the cache fits its size cap
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".cache"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def store_ranges(self, key: str, id_ranges: List[IDRange]) -> None:
+        ranges = [{attribute: getattr(idrange, attribute) for attribute in RANGE_ATTRIBUTES} for idrange in id_ranges]
+        self.write(key, {"kind": "ranges", "ranges": ranges}, [])
+
+    def load_ranges(self, key: str) -> Optional[List[IDRange]]:
+        entry = self.read(key)
+        if entry is None:
+            return None
+        id_ranges = []
+        for record in entry[0]["ranges"]:
+            idrange = IDRange()
+            for attribute in RANGE_ATTRIBUTES:
+                setattr(idrange, attribute, record[attribute])
+            id_ranges.append(idrange)
+        return id_ranges
+
+    def store_identities(self, key: str, store: IdentityStore) -> None:
+        columns = [(name, getattr(store, name)) for name in ("numbers", "users", "rdn_starts", "rdn_lengths", "parents", "rdn_buffer")]
+        self.write(key, {"kind": "identities", "count": len(store), "parent_dns": store.parent_dns}, columns)
+
+    def load_identities(self, key: str) -> Optional[IdentityStore]:
+        entry = self.read(key)
+        if entry is None:
+            return None
+        header, columns = entry
+        if any(len(columns[name]) != header["count"] for name in ("numbers", "users", "rdn_starts", "rdn_lengths", "parents")):
+            return None
+        store = IdentityStore()
+        for name, column in columns.items():
+            setattr(store, name, column)
+        store.parent_dns = header["parent_dns"]
+        store.parent_ids = {parent: i for i, parent in enumerate(store.parent_dns)}
+        return store
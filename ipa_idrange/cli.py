@@ -0,0 +1,555 @@
+"""
+Command line interface
+"""
+import os
+import sys
+import signal
+import getpass
+import argparse
+import cProfile
+from contextlib import ExitStack
+from typing import List, Optional, TextIO, Tuple
+
+from .models import AnalysisOptions, IDRange, IdentityStore, RidAllocator
+from .ranges import classify_identities
+from .inputs import READ_ERRORS, parse_idrange_input, parse_outofrange_parallel, parse_outofrange_store, read_input_from_file, read_input_from_stdin, read_lines_from_file
+from .analysis import analyze, sweep
+from .diff import diff_ranges
+from .headroom import plan_headroom
+from .hostscan import find_hosts, scan_host_accounts
+from .cache import ParseCache
+from .fleet import find_fleet_realms, parse_fleet_manifest, run_fleet
+from .service import RangeService, serve
+from .ldapsource import DEFAULT_PAGE_SIZE, LdapError, LdapPool, fetch_outofrange, fetch_ranges, find_naming_context, is_secure_uri
+from .output import render_diff, render_fleet, render_headroom, render_hostscan, write_headroom, write_hostscan, render_report, render_sweep, write_diff, write_fleet, write_report, write_sweep
+from .profiling import Profiler, write_cprofile_report, write_profile_report
+
+# Function to parse comma separated list of integers given as argument
+def int_list(value: str) -> List[int]:
+    try:
+        return [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a comma separated list of integers")
+
+def main():
+    # Create argument parser
+    parser = argparse.ArgumentParser(description="Tool to process IPA ID ranges data")
+
+    # Add optional arguments
+    parser.add_argument('--ranges', type=str, metavar='idranges', \
+                        help="Path to file containing ID ranges data - output of `ipa idrange-find --all --raw > idranges`")
+    parser.add_argument('--ridoffset', type=int, default=100000, metavar=100000, \
+                        help="Offset for a next base RID from previous RID range. Needed for future range size expansions. Has to be > 0")
+    parser.add_argument('--ridpolicy', type=str, default="after-highest", choices=RidAllocator.policies, \
+                        help="Where to place new RID bases: after the highest RID span (falling back to the first free hole), the first free hole, or the smallest free hole that fits")
+    identities = parser.add_mutually_exclusive_group()
+    identities.add_argument('--outofrange', type=str, metavar='outofranges.ldif', \
+                        help="Path to file for out of range users and groups, that we got from ldapsearches provided. Use '-' to read it from stdin")
+    identities.add_argument('--classify', type=str, metavar='allids.ldif', \
+                        help="Path to file with all POSIX users and groups. IDs get counted per range, and the ones out of ipa-local ranges are used as --outofrange. Use '-' to read it from stdin")
+    parser.add_argument('--rangegap', type=int, default=200000, metavar=200000, \
+                        help="Threshold for a gap between outofrange IDs to be considered a different range. Has to be > 0")
+    parser.add_argument('--minrange', type=int, default=10, metavar=10, \
+                        help="Minimal considered range size for outofrange IDs. All ranges lower than this number will be discarded and IDs will be listed to be moved. Has to be > 1")
+    parser.add_argument('--allowunder1000', action="store_true",\
+                        help="Allow idranges to start below 1000. Be careful to not overlap IPA users/groups with existing system-local ones!")
+    parser.add_argument('--norounding', action="store_true",\
+                        help="Disable IDrange rounding attempt in order to get ranges exactly covering just IDs provided")
+    parser.add_argument('--filterclauses', type=int, default=50, metavar=50, \
+                        help="Maximum number of ID gaps in one generated ldapsearch filter, more gaps are split into several searches. Has to be > 0")
+    parser.add_argument('--ldappagesize', type=int, default=0, metavar=0, \
+                        help="Add simple paged results control with this page size to generated ldapsearches, 0 means no paging. Searches of --ldap-uri page by 1000 entries when it is 0")
+    parser.add_argument('--strategy', type=str, default="greedy", choices=["greedy", "optimal"], \
+                        help="How to split outofrange IDs into ranges: by --rangegap and --minrange, or with minimal cost given by --rangecost, --wastecost and --outliercost")
+    parser.add_argument('--rangecost', type=float, default=10000, metavar=10000, \
+                        help="Cost of creating one more range for --strategy optimal, in units of --wastecost")
+    parser.add_argument('--wastecost', type=float, default=1, metavar=1, \
+                        help="Cost of one unused ID inside a proposed range for --strategy optimal")
+    parser.add_argument('--outliercost', type=float, default=1000, metavar=1000, \
+                        help="Cost of leaving one identity out of ranges as an outlier for --strategy optimal")
+    parser.add_argument('--sweep', action="store_true",\
+                        help="Instead of a report, show how many ranges and outliers --outofrange IDs give for every combination of --sweep-rangegap and --sweep-minrange values")
+    parser.add_argument('--sweep-rangegap', type=int_list, default=[1000, 10000, 50000, 100000, 200000, 500000, 1000000], metavar='1000,10000,...', \
+                        help="Comma separated --rangegap values for --sweep")
+    parser.add_argument('--sweep-minrange', type=int_list, default=[1, 10, 100, 1000], metavar='1,10,...', \
+                        help="Comma separated --minrange values for --sweep")
+    parser.add_argument('--sweep-json', action="store_true",\
+                        help="Print --sweep results as JSON instead of a table")
+    parser.add_argument('--profile', type=str, nargs='?', const="stderr", choices=["stderr", "json", "cprofile"], \
+                        help="Report time, memory and throughput of every phase to stderr, as JSON (to --profile-output or stderr), or with cProfile statistics of the hot functions")
+    parser.add_argument('--profile-output', type=str, metavar='profile.json', \
+                        help="File to write --profile=json report or --profile=cprofile pstats dump to")
+    parser.add_argument('--format', type=str, default="table", choices=["table", "jsonl", "csv"], \
+                        help="Write the report as text with tables, or as JSON lines or CSV records for other tools to process")
+    parser.add_argument('--output', type=str, metavar='report.txt', \
+                        help="File to write the report to instead of stdout")
+    parser.add_argument('--outliers-file', type=str, metavar='outliers.txt', \
+                        help="File to write identities too far away to get ranges to, in the --format chosen, the report only says how many there are")
+    parser.add_argument('--relocate', type=str, nargs='?', const="commands", choices=["commands", "ldif"], \
+                        help="Plan a free ID in the nearest proposed range (or existing ipa-local range with --classify) for every outlier, as ipa user-mod/group-mod commands or LDIF for ldapmodify")
+    parser.add_argument('--relocate-output', type=str, metavar='relocate.ldif', \
+                        help="File to write --relocate commands or LDIF to, the report only says how many identities are moved")
+    parser.add_argument('--baseline', type=str, metavar='idranges.old', \
+                        help="Path to an older `ipa idrange-find --all --raw` output, only changes of ranges since then and new problems they bring are reported")
+    parser.add_argument('--jobs', type=int, default=1, metavar=1, \
+                        help="Number of processes parsing --outofrange/--classify file or --hosts files in parallel, 0 uses all CPUs")
+    parser.add_argument('--headroom', action="store_true", \
+                        help="Instead of a report, show how far every ipa-local range can grow before its IDs or RIDs overlap with another range")
+    parser.add_argument('--grow', type=int, metavar='IDS', \
+                        help="With --headroom, print ipa idrange-mod commands growing every ipa-local range by this many IDs, where it fits")
+    parser.add_argument('--fleet', type=str, metavar='realms', \
+                        help="Analyze many realms at once: a directory with a subdirectory per realm holding its ranges file and optionally an .ldif file, or a manifest file with lines 'realm ranges-file [outofrange-file]'")
+    parser.add_argument('--fleet-output', type=str, default="fleet-reports", metavar='fleet-reports', \
+                        help="Directory for detail reports of every realm in --fleet mode")
+    parser.add_argument('--fleet-jobs', type=int, default=0, metavar=0, \
+                        help="Number of realms analyzed at the same time in --fleet mode, 0 uses all CPUs")
+    parser.add_argument('--fleet-timeout', type=float, default=600, metavar=600, \
+                        help="Seconds after which analysis of a realm is stopped in --fleet mode, 0 for no limit")
+    parser.add_argument('--cache-dir', type=str, metavar='~/.cache/idrange-analyze', \
+                        help="Directory to keep parsed --ranges and --outofrange/--classify files in, runs on the same files skip parsing and sorting")
+    parser.add_argument('--cache-size', type=int, default=1024, metavar=1024, \
+                        help="Size cap of --cache-dir in MB, the least recently used files are removed to fit it")
+    parser.add_argument('--cache-verify', action='store_true', \
+                        help="Recognize files in --cache-dir by a hash of their whole content, by default only their size, modification time and first and last MB are hashed, which misses a change in the middle of a file keeping its size and time")
+    parser.add_argument('--ldap-uri', type=str, metavar='ldaps://ipa.example.com', \
+                        help="Read ranges and out of range users and groups straight from this LDAP server instead of --ranges and --outofrange files")
+    parser.add_argument('--ldap-binddn', type=str, metavar='"cn=Directory Manager"', \
+                        help="DN to bind to --ldap-uri as, anonymous bind is used without it")
+    parser.add_argument('--ldap-password-file', type=str, metavar='password.txt', \
+                        help="File with the password of --ldap-binddn, it is asked for when not given")
+    parser.add_argument('--ldap-base', type=str, metavar='dc=example,dc=com', \
+                        help="Suffix of the directory, taken from the root DSE of --ldap-uri when not given")
+    parser.add_argument('--ldap-cacert', type=str, metavar='/etc/ipa/ca.crt', \
+                        help="CA certificate to verify ldaps:// server with, system CAs are used when not given")
+    parser.add_argument('--ldap-insecure', action='store_true', \
+                        help="Allow --ldap-binddn over ldap://, the password is then sent to the server in clear text")
+    parser.add_argument('--ldap-pool', type=int, default=4, metavar=4, \
+                        help="Number of connections running out of range searches against --ldap-uri at the same time. Has to be > 0")
+    parser.add_argument('--hosts', type=str, metavar='hosts', \
+                        help="Instead of a report, check local accounts of hosts against the ranges: a directory with HOST/passwd and HOST/group (or HOST.passwd and HOST.group) files collected from the hosts")
+    parser.add_argument('--serve', type=str, metavar='unix:/run/idrange.sock', \
+                        help="Instead of a report, keep --ranges loaded and answer JSON queries (covers, is_local, propose, stats) on a Unix socket (unix:PATH) or localhost HTTP (HOST:PORT)")
+    parser.add_argument('--serve-reload', type=float, default=1, metavar=1, \
+                        help="Seconds between checks of --ranges file for changes in --serve mode, a changed file is loaded again. Has to be > 0")
+    parser.add_argument('--serve-mode', type=str, default="600", metavar=600, \
+                        help="Permissions of the --serve Unix socket in octal, only the owner can query by default")
+    
+    # Parse the command-line arguments
+    args = parser.parse_args()
+
+    # Check sanity of int values:
+    if args.ridoffset < 0 or args.rangegap < 0 or args.minrange < 1 \
+        or args.rangecost < 0 or args.wastecost < 0 or args.outliercost < 0 \
+        or args.filterclauses < 1 or args.ldappagesize < 0 or args.cache_size < 0 or args.jobs < 0 or args.fleet_jobs < 0 or args.fleet_timeout < 0 or args.ldap_pool < 1 or args.serve_reload <= 0 \
+        or (args.grow is not None and args.grow < 1) \
+        or any(value < 0 for value in args.sweep_rangegap) or any(value < 1 for value in args.sweep_minrange):
+        print ("\nERROR: attribute error!\n")
+        parser.print_help()
+        sys.exit(1)
+
+    if args.sweep and not (args.outofrange or args.classify or args.ldap_uri):
+        print ("\nERROR: --sweep needs IDs provided with --outofrange, --classify or --ldap-uri!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.baseline and (args.outofrange or args.classify or args.sweep):
+        print ("\nERROR: --baseline compares ranges only, it can't be used with --outofrange, --classify or --sweep!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.grow is not None and not args.headroom:
+        print ("\nERROR: --grow needs --headroom!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.headroom and (args.outofrange or args.classify or args.sweep or args.baseline or args.fleet):
+        print ("\nERROR: --headroom works with ranges only, it can't be used with --outofrange, --classify, --sweep, --baseline or --fleet!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.fleet and (args.ranges or args.outofrange or args.classify or args.baseline or args.sweep):
+        print ("\nERROR: --fleet takes inputs of every realm from the directory or manifest, it can't be used with --ranges, --outofrange, --classify, --baseline or --sweep!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.ldap_uri and (args.ranges or args.outofrange or args.classify or args.fleet):
+        print ("\nERROR: --ldap-uri reads ranges and identities from the server, it can't be used with --ranges, --outofrange, --classify or --fleet!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if not args.ldap_uri and (args.ldap_binddn or args.ldap_password_file or args.ldap_base or args.ldap_cacert or args.ldap_insecure):
+        print ("\nERROR: --ldap-binddn, --ldap-password-file, --ldap-base, --ldap-cacert and --ldap-insecure need --ldap-uri!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.ldap_uri and (args.ldap_binddn or args.ldap_password_file) and not is_secure_uri(args.ldap_uri) and not args.ldap_insecure:
+        print ("\nERROR: --ldap-binddn over ldap:// would send the password in clear text, use ldaps:// or add --ldap-insecure!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.relocate and (not (args.outofrange or args.classify or args.ldap_uri) or args.sweep or args.baseline or args.headroom or args.fleet):
+        print ("\nERROR: --relocate needs IDs provided with --outofrange, --classify or --ldap-uri and can't be used with --sweep, --baseline, --headroom or --fleet!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.relocate_output and not args.relocate:
+        print ("\nERROR: --relocate-output needs --relocate!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.hosts and (args.outofrange or args.classify or args.sweep or args.baseline or args.headroom or args.fleet or args.relocate):
+        print ("\nERROR: --hosts checks local accounts against the ranges only, it can't be used with --outofrange, --classify, --sweep, --baseline, --headroom, --fleet or --relocate!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.serve and (not args.ranges or args.outofrange or args.classify or args.sweep or args.baseline or args.headroom or args.fleet or args.ldap_uri or args.hosts):
+        print ("\nERROR: --serve needs ranges provided with --ranges and can't be used with --outofrange, --classify, --sweep, --baseline, --headroom, --fleet, --ldap-uri or --hosts!")
+        parser.print_usage()
+        sys.exit(1)
+
+    if args.serve:
+        run_service_mode(args, parser)
+        return
+
+    # Run the analysis, with all the phases measured
+    profiler = Profiler()
+    if args.profile == "cprofile":
+        cprofiler = cProfile.Profile()
+        cprofiler.runcall(run, args, parser, profiler)
+        write_cprofile_report(cprofiler, args.profile_output)
+    else:
+        run(args, parser, profiler)
+
+    if args.profile is not None:
+        write_profile_report(profiler, args.profile == "json", args.profile_output)
+
+# Function to report a file that can't be read and exit
+def exit_on_read_error(file_path: str, error: Exception) -> None:
+    if isinstance(error, FileNotFoundError):
+        print(f"Error: File '{file_path}' not found.")
+    else:
+        print(f"Error: Failed to read file '{file_path}'.")
+        print(error)
+    sys.exit(1)
+
+# Function to open a file for writing, or to exit with an error message if it can't be opened
+def open_output(stack: ExitStack, file_path: Optional[str], default: Optional[TextIO]) -> Optional[TextIO]:
+    if file_path is None:
+        return default
+    try:
+        return stack.enter_context(open(file_path, 'w'))
+    except OSError as e:
+        print(f"Error: Failed to write file '{file_path}'.")
+        print(e)
+        sys.exit(1)
+
+# Function to store parsed data in the cache, a cache that can't be written only gets a warning
+def store_in_cache(cache: ParseCache, key: str, kind: str, data) -> None:
+    try:
+        if kind == "ranges":
+            cache.store_ranges(key, data)
+        else:
+            cache.store_identities(key, data)
+    except OSError as e:
+        print(f"Warning: Failed to write cache to '{cache.directory}': {e}", file=sys.stderr)
+
+# Function to get analysis options from command line arguments
+def analysis_options(args: argparse.Namespace) -> AnalysisOptions:
+    return AnalysisOptions(
+        ridoffset=args.ridoffset, ridpolicy=args.ridpolicy,
+        rangegap=args.rangegap, minrange=args.minrange,
+        allowunder1000=args.allowunder1000, norounding=args.norounding,
+        filterclauses=args.filterclauses, ldappagesize=args.ldappagesize,
+        strategy=args.strategy, rangecost=args.rangecost, wastecost=args.wastecost, outliercost=args.outliercost,
+    )
+
+# Function to analyze all the realms of --fleet and print the summary, exits with 1 if some realm failed
+def run_fleet_mode(args: argparse.Namespace, parser: argparse.ArgumentParser, profiler: Profiler) -> None:
+    try:
+        realms = find_fleet_realms(args.fleet) if os.path.isdir(args.fleet) else parse_fleet_manifest(args.fleet)
+    except READ_ERRORS as e:
+        exit_on_read_error(args.fleet, e)
+    if len(realms) < 1:
+        print ("\nERROR: no realms found in --fleet!")
+        parser.print_usage()
+        sys.exit(1)
+
+    with profiler.phase("fleet") as phase:
+        try:
+            rows = run_fleet(realms, analysis_options(args), args.fleet_output, args.format,
+                             args.fleet_jobs or os.cpu_count() or 1, args.fleet_timeout or None)
+        except OSError as e:
+            print(f"Error: Failed to write reports to '{args.fleet_output}'.")
+            print(e)
+            sys.exit(1)
+        phase["items"] = len(realms)
+
+    with profiler.phase("report output"), ExitStack() as stack:
+        file = open_output(stack, args.output, sys.stdout)
+        if args.format == "table":
+            render_fleet(rows, args.fleet_output, file)
+        else:
+            write_fleet(rows, args.format, file)
+
+    if any(row["status"] != "ok" for row in rows):
+        sys.exit(1)
+
+# Function to check local accounts of the hosts in --hosts against the ranges and print the conflicts
+def run_hosts_mode(args: argparse.Namespace, parser: argparse.ArgumentParser, profiler: Profiler, id_ranges: List[IDRange]) -> None:
+    with profiler.phase("find hosts") as phase:
+        try:
+            hosts = find_hosts(args.hosts)
+        except OSError as e:
+            exit_on_read_error(args.hosts, e)
+        phase["items"] = len(hosts)
+    if len(hosts) < 1:
+        print ("\nERROR: no passwd or group files of hosts found in --hosts!")
+        parser.print_usage()
+        sys.exit(1)
+
+    with profiler.phase("scan hosts") as phase:
+        scan = scan_host_accounts(hosts, id_ranges, args.jobs or os.cpu_count() or 1)
+        phase["items"] = scan.users + scan.groups
+
+    with profiler.phase("report output"), ExitStack() as stack:
+        file = open_output(stack, args.output, sys.stdout)
+        if args.format == "table":
+            render_hostscan(scan, file)
+        else:
+            write_hostscan(scan, args.format, file)
+
+# Function to serve queries on the ranges of --ranges until interrupted
+def run_service_mode(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    try:
+        mode = int(args.serve_mode, 8)
+    except ValueError:
+        mode = -1
+    if not 0 <= mode <= 0o777:
+        print ("\nERROR: --serve-mode has to be octal permissions like 600 or 660!")
+        parser.print_usage()
+        sys.exit(1)
+
+    try:
+        service = RangeService(args.ranges, analysis_options(args))
+    except READ_ERRORS as e:
+        exit_on_read_error(args.ranges, e)
+    except ValueError:
+        print ("\nERROR: no valid ranges in input data!")
+        parser.print_usage()
+        sys.exit(1)
+
+    # stopping the service the usual way removes its socket too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        serve(service, args.serve, args.serve_reload, mode)
+    except ValueError as e:
+        print (f"\nERROR: --serve {e}!")
+        parser.print_usage()
+        sys.exit(1)
+    except OSError as e:
+        print(f"Error: Failed to serve on '{args.serve}'.")
+        print(e)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        pass
+
+# Function to get the password to bind to --ldap-uri with
+def ldap_password(args: argparse.Namespace) -> str:
+    if not args.ldap_binddn:
+        return ""
+    if args.ldap_password_file is None:
+        return getpass.getpass(f"Password for {args.ldap_binddn}: ")
+    try:
+        with open(args.ldap_password_file, 'r') as file:
+            return file.readline().rstrip('\r\n')
+    except OSError as e:
+        exit_on_read_error(args.ldap_password_file, e)
+
+# Function to read ranges and, when with_identities is set, out of range identities straight from --ldap-uri
+def read_from_ldap(args: argparse.Namespace, profiler: Profiler, with_identities: bool) -> Tuple[List[IDRange], Optional[IdentityStore]]:
+    page_size = args.ldappagesize or DEFAULT_PAGE_SIZE
+    identities = None
+    try:
+        with LdapPool(args.ldap_uri, args.ldap_binddn, ldap_password(args), args.ldap_pool, cafile=args.ldap_cacert, insecure=args.ldap_insecure) as pool:
+            with profiler.phase("ldap ranges") as phase:
+                suffix = args.ldap_base or find_naming_context(pool)
+                if suffix is None:
+                    raise LdapError("the server doesn't tell the suffix of the directory, give it with --ldap-base")
+                id_ranges = fetch_ranges(pool, suffix, page_size)
+                phase["items"] = len(id_ranges)
+
+            if with_identities and id_ranges:
+                for id_range in id_ranges:
+                    id_range.count()
+                with profiler.phase("ldap identities") as phase:
+                    identities = fetch_outofrange(pool, suffix, id_ranges, args.filterclauses, page_size)
+                    phase["items"] = len(identities)
+    except (LdapError, OSError) as e:
+        print(f"Error: Failed to read from LDAP server '{args.ldap_uri}'.")
+        print(e)
+        sys.exit(1)
+    return id_ranges, identities
+
+# Function to run the analysis and print the report
+def run(args: argparse.Namespace, parser: argparse.ArgumentParser, profiler: Profiler) -> None:
+    if args.fleet:
+        run_fleet_mode(args, parser, profiler)
+        return
+
+    # Check input sources and read data accordingly, files parsed before are taken from the cache
+    range_data = ''
+    id_ranges = None
+    ranges_key = None
+    cache = ParseCache(os.path.expanduser(args.cache_dir), args.cache_size * 1024 * 1024, args.cache_verify) if args.cache_dir else None
+    identities = None
+    identities_path = args.outofrange or args.classify
+    if args.ldap_uri:
+        # Ranges and identities come straight from the server, identities are not needed for ranges only modes
+        id_ranges, identities = read_from_ldap(args, profiler, not (args.headroom or args.baseline or args.hosts))
+        if identities is not None:
+            with profiler.phase("sort identities") as phase:
+                identities.sort()
+                phase["items"] = len(identities)
+    elif identities_path == '-' and args.ranges is None:
+        # stdin is taken by out of range identities, ranges have to come from a file
+        print ("\nERROR: --ranges is required when out of range identities are read from stdin!")
+        parser.print_usage()
+        sys.exit(1)
+    elif not sys.stdin.isatty() and identities_path != '-':
+        # Data is coming from stdin
+        with profiler.phase("read ranges"):
+            range_data = read_input_from_stdin()
+    elif args.ranges is not None:
+        # Data is provided via --ranges option
+        if cache is not None:
+            with profiler.phase("cache load ranges"):
+                ranges_key = cache.key(args.ranges, "ranges")
+                id_ranges = cache.load_ranges(ranges_key) if ranges_key else None
+        if id_ranges is None:
+            with profiler.phase("read ranges"):
+                try:
+                    range_data = read_input_from_file(args.ranges)
+                except READ_ERRORS as e:
+                    exit_on_read_error(args.ranges, e)
+    else:
+        # No input source provided, show usage instructions
+        print ("\nERROR: no range input data found!")
+        parser.print_usage()
+        sys.exit(1)    
+
+    # Parse the input data and create IDRange instances
+    if id_ranges is None:
+        with profiler.phase("parse ranges") as phase:
+            id_ranges = parse_idrange_input(range_data)
+            phase["items"] = len(id_ranges)
+        if ranges_key is not None:
+            store_in_cache(cache, ranges_key, "ranges", id_ranges)
+
+    if len(id_ranges) < 1:
+        # No valid range data provided, show usage instructions
+        print ("\nERROR: no valid ranges in input data!")
+        parser.print_usage()
+        sys.exit(1)         
+
+    # calculate all the attributes
+    for id_range in id_ranges:
+        id_range.count()
+
+    # Sort the list of IDRange instances by the "First ID" attribute
+    id_ranges.sort(key=lambda x: x.first_id)
+
+    # Local accounts of hosts are checked against the ranges alone
+    if args.hosts:
+        run_hosts_mode(args, parser, profiler, id_ranges)
+        return
+
+    # Growth of the ranges is planned from the ranges alone
+    if args.headroom:
+        with profiler.phase("headroom") as phase:
+            plans = plan_headroom(id_ranges, args.grow)
+            phase["items"] = len(id_ranges)
+        with profiler.phase("report output"), ExitStack() as stack:
+            file = open_output(stack, args.output, sys.stdout)
+            if args.format == "table":
+                render_headroom(plans, args.grow, file)
+            else:
+                write_headroom(plans, args.format, file)
+        return
+
+    # In diff mode only the ranges that changed since the baseline get checked
+    if args.baseline:
+        with profiler.phase("read baseline"):
+            try:
+                baseline_data = read_input_from_file(args.baseline)
+            except READ_ERRORS as e:
+                exit_on_read_error(args.baseline, e)
+        with profiler.phase("parse baseline") as phase:
+            baseline = parse_idrange_input(baseline_data)
+            phase["items"] = len(baseline)
+        with profiler.phase("diff") as phase:
+            diff = diff_ranges(baseline, id_ranges)
+            phase["items"] = len(diff.changes)
+        with profiler.phase("report output"), ExitStack() as stack:
+            file = open_output(stack, args.output, sys.stdout)
+            if args.format == "table":
+                render_diff(diff, file)
+            else:
+                write_diff(diff, args.format, file)
+        return
+
+    # Parse identities into compact sorted columns
+    identities_key = None
+    jobs = args.jobs or os.cpu_count() or 1
+    if identities_path and cache is not None and identities_path != '-':
+        with profiler.phase("cache load identities") as phase:
+            identities_key = cache.key(identities_path, "identities")
+            identities = cache.load_identities(identities_key) if identities_key else None
+            phase["items"] = len(identities) if identities is not None else None
+    if identities_path and identities is None:
+        with profiler.phase("parse identities") as phase:
+            try:
+                if jobs > 1 and identities_path != '-':
+                    identities = parse_outofrange_parallel(identities_path, jobs, sort=False)
+                else:
+                    identities = parse_outofrange_store(read_lines_from_file(identities_path), sort=False)
+            except READ_ERRORS as e:
+                exit_on_read_error(identities_path, e)
+            phase["items"] = len(identities)
+        with profiler.phase("sort identities") as phase:
+            identities.sort()
+            phase["items"] = len(identities)
+        if identities_key is not None:
+            with profiler.phase("cache store identities"):
+                store_in_cache(cache, identities_key, "identities", identities)
+
+    # In sweep mode we only parse IDs once and show the statistics for all parameter combinations
+    if args.sweep:
+        with profiler.phase("sweep") as phase:
+            if args.classify:
+                # a full dump gets split by ranges first
+                _, outofrange_spans = classify_identities(identities, id_ranges)
+                identities = identities.select(outofrange_spans)
+            ids_count, results = sweep(identities, args.sweep_rangegap, args.sweep_minrange, args.allowunder1000)
+            phase["items"] = ids_count
+        with ExitStack() as stack:
+            file = open_output(stack, args.output, sys.stdout)
+            if args.format == "table" or args.sweep_json:
+                render_sweep(results, ids_count, args.sweep_json, file)
+            else:
+                write_sweep(results, args.format, file)
+        return
+
+    analysis = analyze(id_ranges, identities, analysis_options(args), args.classify is not None, profiler, args.relocate is not None)
+
+    with profiler.phase("report output"), ExitStack() as stack:
+        file = open_output(stack, args.output, sys.stdout)
+        outliers_file = open_output(stack, args.outliers_file, None)
+        relocation_file = open_output(stack, args.relocate_output, None)
+        if args.format == "table":
+            render_report(analysis, file, outliers_file, args.outliers_file, relocation_file, args.relocate_output, args.relocate == "ldif")
+        else:
+            write_report(analysis, args.format, file, outliers_file, relocation_file, args.relocate == "ldif")
+
+    # the report itself may not be on the console, the summary of outliers always is
+    if outliers_file is not None and analysis.outliers is not None and (args.format != "table" or args.output):
+        print(f"{analysis.outliers.count(analysis.collisions.upg)} outliers written to {args.outliers_file}", file=sys.stderr)
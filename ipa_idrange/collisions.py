@@ -0,0 +1,56 @@
+"""
+Duplicate entries and users or groups sharing a number, found in one pass over identities
+"""
+from typing import Dict, List, Tuple
+
+from .models import Collisions, IdCollision, IdentityStore
+
+# Function to check if two entries have the same DN, attribute values in DNs are compared case-insensitive
+def same_dn(store: IdentityStore, i: int, j: int) -> bool:
+    return store.parents[i] == store.parents[j] and store.rdn(i).lower() == store.rdn(j).lower()
+
+# Function to find duplicate entries, users sharing a uidNumber, groups sharing a gidNumber and users sharing
+# a number with groups that are not their user private groups. Hash tables hold the first user and the first group
+# of every number, so the pass is linear and its memory follows distinct IDs, only colliding entries are kept besides.
+# An entry listed twice has the same number both times, so its duplicates are found among entries with its number.
+# Returns what was found and the store without duplicates, the same store if there are none
+def find_collisions(store: IdentityStore) -> Tuple[Collisions, IdentityStore]:
+    collisions = Collisions()
+    first_user: Dict[int, int] = {}
+    first_group: Dict[int, int] = {}
+    # (user, number) -> entries after the first one with the number
+    others: Dict[Tuple[bool, int], List[int]] = {}
+    keep = None
+
+    for i, (number, user) in enumerate(zip(store.numbers, store.users)):
+        first = (first_user if user else first_group).setdefault(number, i)
+        if first == i:
+            continue
+        key = (bool(user), number)
+        if same_dn(store, i, first) or any(same_dn(store, i, j) for j in others.get(key, ())):
+            if keep is None:
+                keep = bytearray(b"\x01") * len(store)
+            keep[i] = 0
+            collisions.duplicates += 1
+        else:
+            others.setdefault(key, []).append(i)
+
+    for (user, number), entries in others.items():
+        first = first_user[number] if user else first_group[number]
+        collisions.collisions.append(IdCollision(number, "uid" if user else "gid", [store.dn(i) for i in [first] + entries]))
+
+    # a group named after a user with the same number is its user private group, other groups collide with the users
+    for number, first in first_user.items():
+        if number not in first_group:
+            continue
+        users = [first] + others.get((True, number), [])
+        groups = [first_group[number]] + others.get((False, number), [])
+        names = {store.name(i).lower() for i in users}
+        private = [i for i in groups if store.name(i).lower() in names]
+        if private:
+            collisions.upg[number] = len(private)
+        if len(private) < len(groups):
+            collisions.collisions.append(IdCollision(number, "user-group", [store.dn(i) for i in users + groups if i not in private]))
+
+    collisions.collisions.sort(key=lambda collision: (collision.number, collision.kind))
+    return collisions, store if keep is None else store.compress(keep)
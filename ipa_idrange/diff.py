@@ -0,0 +1,155 @@
+"""
+Comparing two snapshots of ranges, only ranges that changed get rechecked
+"""
+from typing import List, Optional, Set, Tuple
+
+from .models import IDRange, IntervalIndex, Overlap, RangeChange, RangeDiff, RidConflict
+from .ranges import build_range_index, get_ipa_local_ranges
+
+# Function to get the key a range is matched by between snapshots
+def range_key(idrange: IDRange) -> str:
+    return idrange.name if idrange.name is not None else idrange.dn
+
+# Function to tell how a range changed between snapshots, None if it didn't: a different size is "resized",
+# the same size at a different first ID is "moved", and the same IDs with other type or RID bases are "modified"
+def range_change_kind(old: IDRange, new: IDRange) -> Optional[str]:
+    if old.size != new.size:
+        return "resized"
+    if old.first_id != new.first_id:
+        return "moved"
+    if (old.type, old.base_rid, old.secondary_base_rid) != (new.type, new.base_rid, new.secondary_base_rid):
+        return "modified"
+    return None
+
+# Function to check if two ranges share some IDs, None stands for the system range of IDs lower 1000
+def ranges_overlap(idrange: IDRange, other: Optional[IDRange]) -> bool:
+    if other is None:
+        return idrange.first_id <= 1000
+    return idrange.first_id <= other.last_id and other.first_id <= idrange.last_id
+
+# Function to get the base RID or secondary base RID span of an ipa-local range, None if it has none
+def rid_span(idrange: IDRange, primary: bool) -> Optional[Tuple[int, int]]:
+    base_rid = idrange.base_rid if primary else idrange.secondary_base_rid
+    if idrange.type != "ipa-local" or base_rid is None:
+        return None
+    return base_rid, base_rid + idrange.size - 1
+
+# Function to check if RID spans of two ranges overlap
+def rid_spans_overlap(idrange: IDRange, primary: bool, other: IDRange, other_primary: bool) -> bool:
+    span, other_span = rid_span(idrange, primary), rid_span(other, other_primary)
+    return span is not None and other_span is not None and span[0] <= other_span[1] and other_span[0] <= span[1]
+
+# Function to build an index of base and secondary RID spans of ipa-local ranges, items are (range, primary)
+def build_rid_index(id_ranges: List[IDRange]) -> IntervalIndex:
+    rid_index = IntervalIndex()
+    for idrange in get_ipa_local_ranges(id_ranges):
+        for primary in (True, False):
+            span = rid_span(idrange, primary)
+            if span is not None:
+                rid_index.insert(span[0], span[1], (idrange, primary))
+    return rid_index
+
+# Function to get the parts of [first_id, last_id] that no interval in the index covers
+def uncovered_parts(index: IntervalIndex, first_id: int, last_id: int) -> List[Tuple[int, int]]:
+    lo, hi = index.segment_span(first_id, last_id)
+    parts = []
+    next_id = first_id
+    for start, end in zip(index.starts[lo:hi], index.ends[lo:hi]):
+        if start > next_id:
+            parts.append((next_id, start - 1))
+        next_id = max(next_id, end + 1)
+    if next_id <= last_id:
+        parts.append((next_id, last_id))
+    return parts
+
+# Function to merge sorted intervals that overlap or touch
+def merge_intervals(intervals: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+# Function to compare a baseline snapshot of ranges with the current one. Ranges are matched by name,
+# and only added, resized, moved or modified ranges are checked against the current ranges for new problems
+def diff_ranges(baseline: List[IDRange], current: List[IDRange]) -> RangeDiff:
+    for idrange in baseline + current:
+        idrange.count()
+    old_ranges = {range_key(idrange): idrange for idrange in baseline}
+    new_ranges = {range_key(idrange): idrange for idrange in current}
+    diff = RangeDiff()
+
+    for key, new in new_ranges.items():
+        old = old_ranges.get(key)
+        kind = "added" if old is None else range_change_kind(old, new)
+        if kind is not None:
+            diff.changes.append(RangeChange(kind, old, new))
+    for key, old in old_ranges.items():
+        if key not in new_ranges:
+            diff.changes.append(RangeChange("removed", old, None))
+    diff.changes.sort(key=lambda change: (change.new or change.old).first_id)
+
+    # ranges that lost a RID base they had
+    for change in diff.changes:
+        if change.old is None or change.new is None or change.new.type != "ipa-local":
+            continue
+        if (change.old.base_rid is not None and change.new.base_rid is None) or \
+           (change.old.secondary_base_rid is not None and change.new.secondary_base_rid is None):
+            diff.lost_rid_bases.append(change)
+
+    # overlaps of ranges that got added, resized or moved, the ones the baseline already had are left out
+    range_index = build_range_index(current)
+    seen: Set[Tuple[int, int]] = set()
+    for change in diff.changes:
+        if change.kind not in ("added", "resized", "moved"):
+            continue
+        idrange = change.new
+        others: List[Optional[IDRange]] = [other for other in range_index.find(idrange.first_id, idrange.last_id) if other is not idrange]
+        others.sort(key=lambda x: x.first_id)
+        if ranges_overlap(idrange, None):
+            others.insert(0, None)
+        for other in others:
+            pair = (id(idrange), id(other)) if id(idrange) < id(other) else (id(other), id(idrange))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            old_other = None if other is None else old_ranges.get(range_key(other))
+            if change.old is not None and (other is None or old_other is not None) and ranges_overlap(change.old, old_other):
+                continue
+            diff.overlaps.append(Overlap(idrange, other))
+
+    # RID span conflicts of ranges that got added, resized, moved or modified
+    rid_index = build_rid_index(current)
+    seen = set()
+    for change in diff.changes:
+        idrange = change.new
+        if idrange is None or change.kind == "removed":
+            continue
+        for primary in (True, False):
+            span = rid_span(idrange, primary)
+            if span is None:
+                continue
+            for other, other_primary in sorted(rid_index.find(span[0], span[1]), key=lambda item: rid_span(*item)[0]):
+                if other is idrange and other_primary == primary:
+                    continue
+                pair = tuple(sorted(((id(idrange), primary), (id(other), other_primary))))
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                old_other = old_ranges.get(range_key(other))
+                if change.old is not None and old_other is not None and \
+                   rid_spans_overlap(change.old, primary, old_other, other_primary):
+                    continue
+                diff.rid_conflicts.append(RidConflict(idrange, primary, other, other_primary))
+
+    # IDs the baseline ipa-local ranges covered and the current ones don't anymore
+    local_index = build_range_index(get_ipa_local_ranges(current))
+    uncovered = []
+    for change in diff.changes:
+        if change.old is not None and change.old.type == "ipa-local":
+            uncovered.extend(uncovered_parts(local_index, change.old.first_id, change.old.last_id))
+    diff.uncovered = merge_intervals(uncovered)
+
+    return diff
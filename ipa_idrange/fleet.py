@@ -0,0 +1,153 @@
+"""
+Analysis of many IPA deployments at once, every realm in its own worker process
+"""
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional
+
+from .models import AnalysisOptions, Realm
+from .inputs import parse_idrange_input, parse_outofrange_store, read_input_from_file, read_lines_from_file
+from .analysis import analyze
+from .output import FLEET_COLUMNS, render_report, write_report
+
+# Function to read realms from a manifest, every line is "realm ranges-file [outofrange-file]",
+# paths are relative to the manifest, empty lines and lines starting with # are skipped
+def parse_fleet_manifest(manifest_path: str) -> List[Realm]:
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    realms = []
+    names = set()
+    with open(manifest_path, 'r') as file:
+        for number, line in enumerate(file, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            realm = Realm(fields[0])
+            if len(fields) not in (2, 3):
+                realm.error = f"line {number} of the manifest should be: realm ranges-file [outofrange-file]"
+            elif realm.name in names:
+                realm.error = f"realm is listed again on line {number} of the manifest"
+            else:
+                realm.ranges = os.path.join(base, fields[1])
+                realm.identities = os.path.join(base, fields[2]) if len(fields) == 3 else None
+            names.add(realm.name)
+            realms.append(realm)
+    return realms
+
+# Function to find realms in a directory, every subdirectory is a realm with one ranges file
+# and optionally one LDIF file (".ldif" in its name, compressed ones too)
+def find_fleet_realms(directory: str) -> List[Realm]:
+    realms = []
+    for entry in sorted(os.scandir(directory), key=lambda x: x.name):
+        if not entry.is_dir() or entry.name.startswith('.'):
+            continue
+        files = sorted(f.path for f in os.scandir(entry.path) if f.is_file() and not f.name.startswith('.'))
+        ldif_files = [path for path in files if ".ldif" in os.path.basename(path)]
+        range_files = [path for path in files if path not in ldif_files]
+        realm = Realm(entry.name)
+        if len(range_files) != 1 or len(ldif_files) > 1:
+            realm.error = f"expected one ranges file and at most one .ldif file in {entry.path}, found {len(range_files)} and {len(ldif_files)}"
+        else:
+            realm.ranges = range_files[0]
+            realm.identities = ldif_files[0] if ldif_files else None
+        realms.append(realm)
+    return realms
+
+# Function to get the path of a detail report of a realm
+def realm_report_path(output_dir: str, realm: Realm, format: str) -> str:
+    extension = "txt" if format == "table" else format
+    return os.path.join(output_dir, realm.name.replace(os.sep, "_") + "." + extension)
+
+# Function to analyze one realm, write its detail report and return its summary row
+def analyze_realm(realm: Realm, options: AnalysisOptions, output_dir: str, format: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    id_ranges = parse_idrange_input(read_input_from_file(realm.ranges))
+    if len(id_ranges) < 1:
+        raise ValueError(f"no valid ranges in {realm.ranges}")
+    identities = parse_outofrange_store(read_lines_from_file(realm.identities)) if realm.identities else None
+    analysis = analyze(id_ranges, identities, options)
+
+    report = realm_report_path(output_dir, realm, format)
+    with open(report, 'w') as file:
+        if format == "table":
+            render_report(analysis, file)
+        else:
+            write_report(analysis, format, file)
+
+    return {
+        "realm": realm.name, "status": "ok", "ranges": len(analysis.ranges), "overlaps": len(analysis.overlaps),
+        "missing_rid_bases": len(analysis.rid_proposals),
+        "identities": len(identities) if identities is not None else None,
+        "outliers": analysis.outliers.count(analysis.collisions.upg) if analysis.outliers is not None else None,
+        "proposed_ranges": sum(1 for proposal in analysis.range_proposals if proposal.idrange is not None) if identities is not None else None,
+        "seconds": round(time.perf_counter() - start, 3), "report": report, "error": None,
+    }
+
+# Function to get a summary row of a realm that failed
+def failed_realm(realm: Realm, status: str, error: str, seconds: Optional[float] = None) -> Dict[str, Any]:
+    row: Dict[str, Any] = {column: None for column in FLEET_COLUMNS}
+    row.update(realm=realm.name, status=status, seconds=seconds, report=None, error=error)
+    return row
+
+# Function run in a worker process, any failure of the realm is sent back as its result
+def realm_worker(connection: Connection, realm: Realm, options: AnalysisOptions, output_dir: str, format: str) -> None:
+    start = time.perf_counter()
+    try:
+        row = analyze_realm(realm, options, output_dir, format)
+    except Exception as e:
+        row = failed_realm(realm, "error", f"{type(e).__name__}: {e}", round(time.perf_counter() - start, 3))
+    connection.send(row)
+    connection.close()
+
+# Function to analyze realms with at most jobs worker processes at a time. A realm running longer than timeout
+# seconds gets its worker killed, so neither a slow nor a crashing realm holds up the others.
+# Summary rows are returned in the order of realms
+def run_fleet(realms: List[Realm], options: AnalysisOptions, output_dir: str, format: str = "table",
+              jobs: int = 1, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    os.makedirs(output_dir, exist_ok=True)
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(realms)
+    pending = []
+    for i, realm in enumerate(realms):
+        if realm.error is not None:
+            rows[i] = failed_realm(realm, "error", realm.error)
+        else:
+            pending.append(i)
+    pending.reverse()
+
+    # index of realm -> (worker, our end of the pipe, start time)
+    running: Dict[int, Any] = {}
+    while pending or running:
+        while pending and len(running) < max(jobs, 1):
+            i = pending.pop()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            worker = multiprocessing.Process(target=realm_worker, args=(sender, realms[i], options, output_dir, format), daemon=True)
+            worker.start()
+            sender.close()
+            running[i] = (worker, receiver, time.monotonic())
+
+        # sleep until some worker sends its result or dies, or the nearest timeout comes
+        wait_for = None
+        if timeout is not None:
+            wait_for = max(0, min(started for _, _, started in running.values()) + timeout - time.monotonic())
+        wait([receiver for _, receiver, _ in running.values()], wait_for)
+
+        for i, (worker, receiver, started) in list(running.items()):
+            seconds = round(time.monotonic() - started, 3)
+            if receiver.poll():
+                try:
+                    rows[i] = receiver.recv()
+                except EOFError:
+                    # the worker died without a word, e.g. killed for memory
+                    worker.join()
+                    rows[i] = failed_realm(realms[i], "error", f"worker exited with code {worker.exitcode}", seconds)
+            elif timeout is not None and seconds >= timeout:
+                worker.kill()
+                rows[i] = failed_realm(realms[i], "timeout", f"analysis took longer than {timeout:g} seconds", seconds)
+            else:
+                continue
+            worker.join()
+            receiver.close()
+            del running[i]
+
+    return rows
@@ -0,0 +1,84 @@
+"""
+Planning growth of existing ranges
+"""
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Any, List, Optional, Tuple
+
+from .models import Headroom, IDRange, RidAllocator
+from .ranges import get_ipa_local_ranges
+
+# IDs from 2^31 on belong to SubIDs, so ipa-local ranges end below
+ID_LIMIT = 2147483648
+
+# Function to get for every k the interval reaching highest of intervals[:k + 1], intervals are (start, position, item, last)
+def highest_reaches(intervals: List[Tuple[int, int, Any, int]]) -> List[Tuple[int, int, Any, int]]:
+    return list(accumulate(intervals, lambda highest, interval: interval if interval[3] > highest[3] else highest))
+
+# Function to find what limits an item starting at start: an interval starting below it that reaches start, so the item
+# can't have any IDs at all, else the nearest interval starting at or after start, skipping the item itself.
+# Intervals are (start, position, item, last) sorted by start, positions keep equal starts in a stable order.
+# Returns the limit with the item of the interval
+def next_start(intervals: List[Tuple[int, int, Any, int]], starts: List[int], reaches: List[Tuple[int, int, Any, int]],
+               start: int, item: Any) -> Optional[Tuple[int, Any]]:
+    k = bisect_left(starts, start)
+    if k > 0 and reaches[k - 1][3] >= start:
+        return start, reaches[k - 1][2]
+    while k < len(intervals) and intervals[k][2] == item:
+        k += 1
+    return (intervals[k][0], intervals[k][2]) if k < len(intervals) else None
+
+# Function to create ipa command growing a range
+def create_grow_command(idrange: IDRange, size: int) -> str:
+    return f"# ipa idrange-mod {idrange.name} --range-size={size}"
+
+# Function to compute how far every ipa-local range can grow. Its IDs can't reach the next range in ID space,
+# and its base and secondary base RID spans can't reach the next RID span of any ipa-local range. A range or RID span
+# starting below and reaching into it leaves it no room at all.
+# All starts get sorted once and every range finds its neighbours by binary search, so it is O(n log n).
+# With grow, ranges that can grow by that many IDs get ipa idrange-mod commands
+def plan_headroom(id_ranges: List[IDRange], grow: Optional[int] = None) -> List[Headroom]:
+    for idrange in id_ranges:
+        idrange.count()
+
+    id_intervals = sorted((idrange.first_id, i, idrange, idrange.last_id) for i, idrange in enumerate(id_ranges))
+    id_starts = [interval[0] for interval in id_intervals]
+    id_reaches = highest_reaches(id_intervals)
+
+    local_ranges = get_ipa_local_ranges(id_ranges)
+    rid_intervals = []
+    for i, idrange in enumerate(local_ranges):
+        if idrange.base_rid is not None:
+            rid_intervals.append((idrange.base_rid, 2 * i, (idrange, True), idrange.base_rid + idrange.size - 1))
+        if idrange.secondary_base_rid is not None:
+            rid_intervals.append((idrange.secondary_base_rid, 2 * i + 1, (idrange, False), idrange.secondary_base_rid + idrange.size - 1))
+    rid_intervals.sort(key=lambda x: x[:2])
+    rid_starts = [interval[0] for interval in rid_intervals]
+    rid_reaches = highest_reaches(rid_intervals)
+
+    plans = []
+    for idrange in sorted(local_ranges, key=lambda x: x.first_id):
+        # the nearest limit wins, IDs first if there is a tie
+        following = next_start(id_intervals, id_starts, id_reaches, idrange.first_id, idrange)
+        if following is None:
+            plan = Headroom(idrange, ID_LIMIT - idrange.first_id, "id_space")
+        else:
+            plan = Headroom(idrange, following[0] - idrange.first_id, "id", following[1])
+
+        for primary, base_rid in ((True, idrange.base_rid), (False, idrange.secondary_base_rid)):
+            if base_rid is None:
+                continue
+            following = next_start(rid_intervals, rid_starts, rid_reaches, base_rid, (idrange, primary))
+            if following is None:
+                if RidAllocator.rid_limit - base_rid < plan.max_size:
+                    plan = Headroom(idrange, RidAllocator.rid_limit - base_rid, "rid_space")
+            elif following[0] - base_rid < plan.max_size:
+                other, other_primary = following[1]
+                plan = Headroom(idrange, following[0] - base_rid, "rid" if other_primary else "secondary_rid", other)
+
+        if grow is not None and idrange.size + grow <= plan.max_size:
+            plan.grow_to = idrange.size + grow
+            plan.command = create_grow_command(idrange, plan.grow_to)
+        plans.append(plan)
+
+    return plans
@@ -0,0 +1,135 @@
+"""
+Scan of local accounts of many hosts against IPA ranges, hosts are parsed in worker processes
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .models import Host, HostConflict, HostScan, IDRange, IntervalIndex
+from .inputs import READ_ERRORS, read_lines_from_file
+
+ACCOUNT_FILES = ("passwd", "group")
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz")
+
+# local account hit by a range: (host, user, name, number, positions of the ranges)
+Hit = Tuple[str, bool, str, int, Tuple[int, ...]]
+
+# Function to find hosts in a directory: HOST/passwd and HOST/group (or HOST/etc/passwd), or HOST.passwd and HOST.group,
+# at any depth and compressed too. Host names are paths relative to the directory
+def find_hosts(directory: str) -> List[Host]:
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"No such directory: '{directory}'")
+    hosts: Dict[str, Host] = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        relative = os.path.relpath(root, directory)
+        for name in sorted(files):
+            base = name
+            for suffix in COMPRESSED_SUFFIXES:
+                if base.endswith(suffix):
+                    base = base[:-len(suffix)]
+            stem, _, kind = base.rpartition('.') if base not in ACCOUNT_FILES else ("", "", base)
+            if kind not in ACCOUNT_FILES or name.startswith('.'):
+                continue
+            if stem:
+                host_name = stem if relative == os.curdir else os.path.join(relative, stem)
+            else:
+                # files copied with their /etc directory belong to the directory above it
+                host_name = os.path.dirname(relative) if os.path.basename(relative) == "etc" else relative
+            if not host_name or host_name == os.curdir:
+                continue
+            host = hosts.setdefault(host_name, Host(host_name))
+            setattr(host, kind, os.path.join(root, name))
+    return [hosts[name] for name in sorted(hosts)]
+
+# Function to read name and number of every account in a passwd or group file, the number is the third field in both.
+# Comments, NIS compat lines and lines without a number are skipped
+def parse_account_file(file_path: str) -> Iterable[Tuple[str, int]]:
+    for line in read_lines_from_file(file_path):
+        fields = line.split(':', 3)
+        if len(fields) < 3 or not fields[0] or fields[0][0] in "#+-":
+            continue
+        try:
+            yield fields[0].strip(), int(fields[2])
+        except ValueError:
+            continue
+
+# Function to build an index of ranges by their positions, overlapping ranges are found together
+def build_position_index(id_ranges: List[IDRange]) -> IntervalIndex:
+    index = IntervalIndex()
+    for position, idrange in enumerate(id_ranges):
+        index.insert(idrange.first_id, idrange.last_id, position)
+    return index
+
+# Function to scan hosts, run in a worker process for a batch of them. Every account is looked up in the index
+# by binary search, and only accounts hitting ranges are sent back, with counts of accounts and hosts that failed
+def scan_hosts(hosts: List[Host], index: IntervalIndex) -> Tuple[int, int, List[Hit], List[Tuple[str, str]]]:
+    users, groups = 0, 0
+    hits: List[Hit] = []
+    errors = []
+    for host in hosts:
+        for user, file_path in ((True, host.passwd), (False, host.group)):
+            if file_path is None:
+                continue
+            try:
+                for name, number in parse_account_file(file_path):
+                    if user:
+                        users += 1
+                    else:
+                        groups += 1
+                    positions = index.find(number, number)
+                    if positions:
+                        hits.append((host.name, user, name, number, tuple(sorted(positions))))
+            except READ_ERRORS as e:
+                errors.append((host.name, f"{file_path}: {e}"))
+    return users, groups, hits, errors
+
+# Function to scan local accounts of hosts against ranges with jobs worker processes, hosts are split into batches
+# of about the same size. Accounts with the same name and number are merged across hosts, so the result is one
+# conflict per account with all its hosts, and ranges hit with distinct users, groups and hosts in them
+def scan_host_accounts(hosts: List[Host], id_ranges: List[IDRange], jobs: int = 1) -> HostScan:
+    index = build_position_index(id_ranges)
+    scan = HostScan(len(hosts))
+    batches = [hosts[i::jobs * 4] for i in range(jobs * 4)] if jobs > 1 and len(hosts) > 1 else [hosts]
+
+    if len(batches) == 1:
+        results = [scan_hosts(hosts, index)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(scan_hosts, batches, repeat(index)))
+
+    # (user, name, number) -> conflict, every host is listed once for an account
+    accounts: Dict[Tuple[bool, str, int], HostConflict] = {}
+    positions_of: Dict[Tuple[bool, str, int], Tuple[int, ...]] = {}
+    for users, groups, hits, errors in results:
+        scan.users += users
+        scan.groups += groups
+        scan.errors.extend(errors)
+        for host, user, name, number, positions in hits:
+            key = (user, name, number)
+            conflict = accounts.get(key)
+            if conflict is None:
+                conflict = accounts[key] = HostConflict(name, user, number, [id_ranges[position] for position in positions], [])
+                positions_of[key] = positions
+            if not conflict.hosts or conflict.hosts[-1] != host:
+                conflict.hosts.append(host)
+
+    # every range gets its distinct accounts and hosts counted from the merged accounts, not from hosts again
+    per_range: Dict[int, Tuple[List[int], Set[str]]] = {}
+    for key, conflict in accounts.items():
+        conflict.hosts.sort()
+        for position in positions_of[key]:
+            counts, range_hosts = per_range.setdefault(position, ([0, 0], set()))
+            counts[0 if conflict.user else 1] += 1
+            range_hosts.update(conflict.hosts)
+    for position in sorted(per_range, key=lambda x: (id_ranges[x].first_id, x)):
+        (users, groups), range_hosts = per_range[position]
+        idrange = id_ranges[position]
+        scan.ranges.append({"name": idrange.name, "type": idrange.type, "first_id": idrange.first_id, "last_id": idrange.last_id,
+                            "users": users, "groups": groups, "hosts": len(range_hosts)})
+
+    scan.conflicts = sorted(accounts.values(), key=lambda x: (x.number, not x.user, x.name))
+    scan.conflicting_hosts = len(set(host for conflict in scan.conflicts for host in conflict.hosts))
+    scan.errors.sort()
+    return scan
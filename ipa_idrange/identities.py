@@ -0,0 +1,254 @@
+"""
+Working with IDentities out of range
+"""
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import partial
+from itertools import accumulate, compress, count
+from typing import Dict, List, Optional, Tuple
+
+from .models import IDRange, IntervalIndex, RangeProposal, RidAllocator
+from .ranges import newrange_overlap_check
+
+# Function to get differences between neighbouring sorted numbers from start on, gap i is between numbers start + i and start + i + 1
+def compute_gaps(numbers: array, start: int = 0) -> array:
+    # whole pass runs in C, there is no Python code executed per identity
+    return array('q', map(operator.sub, numbers[start + 1:], numbers[start:]))
+
+# Function to find indexes of the first numbers of all groups except the first one, gaps computed from start
+def find_group_boundaries(gaps: array, threshold: int, start: int = 0) -> List[int]:
+    # a new group starts after every gap greater than the threshold
+    return list(compress(count(start + 1), map(partial(operator.lt, threshold), gaps)))
+
+# Function to get outofrange IDs into groups to create ranges, groups are ranges of indexes into sorted numbers
+def group_identities_by_threshold(numbers: array, threshold: int, start: int = 0) -> List[range]:
+    if len(numbers) <= start:
+        return []
+
+    boundaries = find_group_boundaries(compute_gaps(numbers, start), threshold, start)
+    return list(map(range, [start] + boundaries, boundaries + [len(numbers)]))
+
+# Function to find where identities with numbers 1000 and higher start (expects sorted numbers):
+def separate_under1000(numbers: array) -> int:
+    return bisect_left(numbers, 1000)
+
+# Function to get users from groups that are smaller then minimum range size
+def separate_ranges_and_outliers(numbers: array, groups: List[range], minrangesize: int) -> Tuple[List[range],List[range]]:
+    outliers = []
+    cleangroups = []
+    for group in groups:
+        # if group is smaller than minrangesize, its memebers are outliers
+        if numbers[group.stop - 1] - numbers[group.start] + 1 < minrangesize :
+            outliers.append(group)
+        # if the group is OK, add it to cleaned groups
+        else:
+            cleangroups.append(group)
+    
+    return outliers, cleangroups
+
+# Function to split IDs into ranges and outliers with minimal cost of ranges created, IDs wasted inside them and outliers left,
+# shared tells how many identities of a number don't count as outliers on their own (user private groups of the users)
+def partition_identities_optimal(numbers: array, range_index: IntervalIndex, range_cost: float, waste_cost: float, outlier_cost: float, start: int = 0,
+                                 shared: Optional[Dict[int, int]] = None) -> Tuple[List[range],List[range]]:
+    shared = shared or {}
+    # identities with the same number can't be split, so we work with runs of equal numbers
+    run_starts = [start] + find_group_boundaries(compute_gaps(numbers, start), 0, start) if len(numbers) > start else []
+    run_stops = run_starts[1:] + [len(numbers)]
+
+    # best[i] is minimal cost of first i runs, choice[i] is the first run of the range ending with run i - 1, or -1 for an outlier
+    best = [0.0] * (len(run_starts) + 1)
+    choice = [-1] * (len(run_starts) + 1)
+
+    # cost of a range over runs j..i is range_cost + waste_cost * ((x_i - i) - (x_j - j)), so for every i we only need
+    # the minimum of best[j] - waste_cost * (x_j - j) over all j in the same gap between existing ranges
+    open_cost = float('inf')
+    open_run = -1
+    gap = None
+    for i, (run_start, run_stop) in enumerate(zip(run_starts, run_stops)):
+        number = numbers[run_start]
+
+        # runs inside existing ranges can't be covered, runs in different gaps can't share a range
+        segment = bisect_right(range_index.starts, number)
+        inside = segment > 0 and range_index.ends[segment - 1] >= number
+        if inside or segment != gap:
+            open_cost, open_run = float('inf'), -1
+        gap = None if inside else segment
+
+        if not inside and best[i] - waste_cost * (number - i) < open_cost:
+            open_cost, open_run = best[i] - waste_cost * (number - i), i
+
+        best[i + 1], choice[i + 1] = best[i] + outlier_cost * (run_stop - run_start - shared.get(number, 0)), -1
+        if not inside and range_cost + waste_cost * (number - i) + open_cost < best[i + 1]:
+            best[i + 1], choice[i + 1] = range_cost + waste_cost * (number - i) + open_cost, open_run
+
+    # walk the choices back from the end
+    outliers : List[range] = []
+    cleangroups : List[range] = []
+    i = len(run_starts)
+    while i > 0:
+        if choice[i] == -1:
+            outliers.append(range(run_starts[i - 1], run_stops[i - 1]))
+            i -= 1
+        else:
+            cleangroups.append(range(run_starts[choice[i]], run_stops[i - 1]))
+            i = choice[i]
+    outliers.reverse()
+    cleangroups.reverse()
+
+    return outliers, cleangroups
+
+# Function to compute proposal statistics for every combination of --rangegap and --minrange values in one pass,
+# shared tells how many identities of a number are not counted on their own (user private groups of the users)
+def sweep_parameters(numbers: array, rangegaps: List[int], minranges: List[int], start: int = 0,
+                     shared: Optional[Dict[int, int]] = None) -> List[Dict[str, int]]:
+    total = max(len(numbers) - start, 0)
+    minranges_sorted = sorted(set(minranges))
+
+    # counted[i] is how many identities the first i numbers from start stand for, shared ones go with the first of their number
+    counted = range(total + 1)
+    if shared:
+        weights = [1] * total
+        for number, pairs in shared.items():
+            i = bisect_left(numbers, number, start)
+            if i < len(numbers) and numbers[i] == number:
+                weights[i - start] -= pairs
+        counted = [0]
+        counted.extend(accumulate(weights))
+
+    # groups are counted in buckets by how many minrange values they satisfy, bucket b is clean for minranges_sorted[:b]
+    def bucket(span: int) -> int:
+        return bisect_right(minranges_sorted, span)
+    buckets = len(minranges_sorted) + 1
+    group_count = [0] * buckets
+    id_count = [0] * buckets
+    span_sum = [0] * buckets
+
+    # every identity starts as a group on its own
+    if total > 0:
+        group_count[bucket(1)] = total
+        id_count[bucket(1)] = counted[total]
+        span_sum[bucket(1)] = total
+
+    # other_end[i] is the index of the other end of a group that starts or ends on index i
+    gaps = compute_gaps(numbers, start)
+    gap_order = sorted(range(len(gaps)), key=gaps.__getitem__)
+    other_end = list(range(total))
+    merged = 0
+
+    results : Dict[Tuple[int, int], Dict[str, int]] = {}
+    for rangegap in sorted(set(rangegaps)):
+        # merging groups over all gaps not greater than the threshold, each gap gets merged exactly once
+        while merged < len(gap_order) and gaps[gap_order[merged]] <= rangegap:
+            right_start = gap_order[merged] + 1
+            left_start, right_end = other_end[right_start - 1], other_end[right_start]
+            for first, last in ((left_start, right_start - 1), (right_start, right_end)):
+                span = numbers[start + last] - numbers[start + first] + 1
+                group_count[bucket(span)] -= 1
+                id_count[bucket(span)] -= counted[last + 1] - counted[first]
+                span_sum[bucket(span)] -= span
+            span = numbers[start + right_end] - numbers[start + left_start] + 1
+            group_count[bucket(span)] += 1
+            id_count[bucket(span)] += counted[right_end + 1] - counted[left_start]
+            span_sum[bucket(span)] += span
+            other_end[left_start], other_end[right_end] = right_end, left_start
+            merged += 1
+
+        # groups in buckets past the minrange are clean, the rest are outliers
+        for i, minrange in enumerate(minranges_sorted):
+            results[(rangegap, minrange)] = {
+                "rangegap": rangegap,
+                "minrange": minrange,
+                "ranges": sum(group_count[i + 1:]),
+                "outliers": counted[total] - sum(id_count[i + 1:]),
+                "id_space": sum(span_sum[i + 1:]),
+            }
+
+    return [results[(rangegap, minrange)] for rangegap in rangegaps for minrange in minranges]
+
+# Function to round up range margins
+def round_idrange(start: int, end: int, under1000: bool) -> Tuple[int,int]:
+    # calculating power of the size
+    sizepower = len(str(end - start + 1))
+    # multiplier for the nearest rounded number
+    multiplier = 10 ** (sizepower - 1)
+    # getting rounded range margins
+    rounded_start = (start // multiplier) * multiplier
+    if not under1000:
+        rounded_start = max(rounded_start, 1000)
+    else:
+        rounded_start = max(rounded_start, 1)
+    rounded_end = ((end + multiplier) // multiplier) * multiplier - 1
+
+    return rounded_start, rounded_end
+
+# Function to get a range name for proposal
+def get_rangename_base(id_ranges: List[IDRange], counter: int = 1) -> Tuple[str,int]:
+    base_name = ''
+    # we want to use default range name as a base for new ranges
+    for range in id_ranges:
+        if range.base_rid == 1000:
+            base_name = range.name
+    
+    # if we didn't find it, propose generic name
+    if base_name == '': base_name = 'Propoposed_range_name'
+
+    # try to find already proposed names with a 3-digit number extension, if needed, update the counter
+    full_name = f"{base_name}_{counter:03}"
+    while any(id_range.name == full_name for id_range in id_ranges):
+        counter += 1
+        full_name = f"{base_name}_{counter:03}"
+
+    return base_name, counter
+
+# Function to produce a command to create a range
+def create_range_command(idrange: IDRange) -> str:
+    # if we failed to create rid bases, at least return incomplete command
+    if idrange.base_rid == None or idrange.secondary_base_rid == None:
+        return f"# ipa idrange-add {idrange.name} --base-id={idrange.first_id} --range-size={idrange.size}"
+
+    return f"# ipa idrange-add {idrange.name} --base-id={idrange.first_id} --range-size={idrange.size} \
+--rid-base={idrange.base_rid} --secondary-rid-base={idrange.secondary_base_rid}" 
+
+# Function to try and create a new range from group, the range gets the next free RID bases
+def propose_range(startid: int, endid: int, range_index: IntervalIndex, rid_allocator: RidAllocator, basename: str, counter: int, norounding: bool, under1000: bool) -> RangeProposal:
+    proposal = RangeProposal(startid, endid)
+
+    # creating new range
+    newrange = IDRange()
+    newrange.type = "ipa-local"
+    newrange.name = f"{basename}_{counter:03}"
+    newrange.proposed = True
+
+    if (norounding):
+        newrange.first_id = startid
+        newrange.last_id = endid
+        newrange.size = newrange.last_id - newrange.first_id + 1
+    else:
+        # first trying to round up ranges to look pretty
+        newrange.first_id, newrange.last_id = round_idrange(startid, endid, under1000)
+        newrange.size = newrange.last_id - newrange.first_id + 1
+
+    # if this creates an overlap, try without rounding
+    if not newrange_overlap_check(range_index, newrange):
+        newrange.first_id = startid
+        newrange.last_id = endid
+        newrange.size = newrange.last_id - newrange.first_id + 1
+        # if we still failed, abandon idea
+        if not newrange_overlap_check(range_index, newrange):
+            return proposal
+    
+    # creating RID bases, if there is no room for some of them, they stay None
+    proposed_base_rid = rid_allocator.allocate(newrange.size, True)
+    if proposed_base_rid is not None:
+        newrange.base_rid = proposed_base_rid
+        newrange.last_base_rid = proposed_base_rid + newrange.size
+
+    proposed_secondary_base_rid = rid_allocator.allocate(newrange.size, False)
+    if proposed_secondary_base_rid is not None:
+        newrange.secondary_base_rid = proposed_secondary_base_rid
+        newrange.last_secondary_rid = proposed_secondary_base_rid + newrange.size
+
+    proposal.idrange = newrange
+    proposal.command = create_range_command(newrange)
+    return proposal
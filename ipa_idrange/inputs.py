@@ -0,0 +1,322 @@
+"""
+Working with input flows
+"""
+import io
+import os
+import sys
+import gzip
+import mmap
+import zlib
+import base64
+import binascii
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, repeat
+from typing import BinaryIO, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+try:
+    import bz2
+except ImportError:
+    # Python may be built without it, such input is then reported as unreadable
+    bz2 = None
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+from .models import IDentity, IDRange, IdentityStore, make_identity
+
+# Magic bytes compressed files start with
+COMPRESSION_MAGIC = {"gzip": b"\x1f\x8b", "bzip2": b"BZh", "xz": b"\xfd7zXZ\x00"}
+
+# Errors reading an input file may end with, corrupted compressed data included
+READ_ERRORS : Tuple[type, ...] = (OSError, EOFError, UnicodeDecodeError, zlib.error) + ((lzma.LZMAError,) if lzma is not None else ())
+
+# Function to parse input data and create IDRange instances
+def parse_idrange_input(input_data:str) -> List[IDRange]:
+    id_ranges = []
+    current_range = None
+
+    for line in input_data.split('\n'):
+        line = line.strip()
+
+        if not line:
+            continue
+        if not ':' in line:
+            continue
+
+        if line.startswith("dn:") or line.startswith("Range name:"):
+            if current_range:
+                id_ranges.append(current_range)
+            current_range = IDRange()
+            current_range.dn = line
+
+            # Extract the suffix from the DN line
+            suffix_start = line.find("dc=")
+            if suffix_start != -1:
+                current_range.suffix = line[suffix_start:]
+            else:
+                current_range.suffix = "$SUFFIX"
+
+        # reading attributes
+        key, value = line.split(": ", 1)
+        if key == "cn" or key.lower() == "range name":
+            current_range.name = value
+        elif key.lower() == "ipabaseid" or key.lower() == "first posix id of the range":
+            current_range.first_id = int(value)
+        elif key.lower() == "ipaidrangesize" or key.lower() == "number of ids in the range":
+            current_range.size = int(value)
+        elif key.lower() == "ipabaserid" or key.lower() == "first rid of the corresponding rid range":
+            current_range.base_rid = int(value)
+        elif key.lower() == "ipasecondarybaserid" or key.lower() == "first rid of the secondary rid range":
+            current_range.secondary_base_rid = int(value)
+        elif key.lower() == "ipanttrusteddomainsid" or key.lower() == "domain sid of the trusted domain":
+            current_range.sid = value
+        elif key.lower() == "ipanttrusteddomainname" or key.lower() == "name of the trusted domain":
+            current_range.domain = value
+        elif key.lower() == "iparangetype":
+            current_range.type = value
+        elif key.lower() == "range type":
+            if value.lower() == "local domain range":
+                current_range.type = "ipa-local"
+            elif value.lower() == "active directory domain range":
+                current_range.type = "ipa-ad-trust"
+
+    if current_range:
+        id_ranges.append(current_range)
+
+    # ranges of trusted domains are named after them, when the name is not given explicitly
+    for idrange in id_ranges:
+        if idrange.sid is not None and idrange.domain is None and idrange.name is not None and idrange.name.endswith("_id_range"):
+            idrange.domain = idrange.name[:-len("_id_range")]
+
+    return id_ranges
+
+# Function to iterate over LDIF records, yields lists of (attribute, value) pairs, one list per entry
+def iter_ldif_records(lines: Iterable[str]) -> Iterator[List[Tuple[str, str]]]:
+    logical_lines : List[str] = []
+
+    for line in lines:
+        # a line starting with a single space continues the previous one (RFC 2849 folding)
+        if line[:1] == ' ' and logical_lines:
+            logical_lines[-1] += line[1:].rstrip('\r\n')
+            continue
+
+        # an empty line separates records
+        if not line or line.isspace():
+            if logical_lines:
+                record = [attribute for attribute in map(parse_ldif_line, logical_lines) if attribute is not None]
+                if record:
+                    yield record
+                logical_lines = []
+            continue
+
+        logical_lines.append(line.rstrip('\r\n').lstrip())
+
+    if logical_lines:
+        record = [attribute for attribute in map(parse_ldif_line, logical_lines) if attribute is not None]
+        if record:
+            yield record
+
+# Function to split an unfolded LDIF line into attribute and value, comments and junk lines give None
+def parse_ldif_line(line: str) -> Optional[Tuple[str, str]]:
+    key, separator, value = line.partition(':')
+    if not separator or key[:1] == '#':
+        return None
+
+    # plain "attr: value" is the most common one
+    if value[:1] == ' ':
+        return key, value.strip()
+    # "attr:: value" holds a base64 encoded value
+    if value[:1] == ':':
+        try:
+            value = base64.b64decode(value[1:].strip()).decode('utf-8')
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+    # "attr:< url" references external content, we never ask for such attributes
+    elif value[:1] == '<':
+        return None
+    else:
+        value = value.strip()
+
+    return key, value
+
+# Function to iterate over DN and ID number of LDIF records, the last uidNumber or gidNumber of a record wins and
+# records without any of them are skipped. No list of attributes is made per record: a logical line is parsed once
+# the next line shows it is not folded, only DN and number lines are, and plain "attr: value" ones directly
+def iter_outofrange_entries(lines: Iterable[str]) -> Iterator[Tuple[str, int]]:
+    dn, number, pending = None, None, None
+
+    # an empty line at the end finishes the last record
+    for line in chain(lines, ("",)):
+        first = line[:1]
+
+        # a line starting with a single space continues the previous one (RFC 2849 folding)
+        if first == ' ' and pending is not None:
+            pending = pending.rstrip('\r\n') + line[1:].rstrip('\r\n')
+            continue
+
+        if pending is not None:
+            # DN and number lines as ldapsearch writes them, then any other spelling
+            new_dn = None
+            if pending[:4] == "dn: ":
+                new_dn = pending[4:].strip()
+            elif pending[:11] == "uidNumber: " or pending[:11] == "gidNumber: ":
+                number = int(pending[11:])
+            else:
+                colon = pending.find(':')
+                key = pending[:colon].lower()
+                if colon > 0 and (key == "dn" or key == "uidnumber" or key == "gidnumber"):
+                    attribute = parse_ldif_line(pending)
+                    if attribute is not None and key == "dn":
+                        new_dn = attribute[1]
+                    elif attribute is not None:
+                        number = int(attribute[1])
+            # every DN starts a new record, even one not separated from the previous record by an empty line
+            if new_dn is not None:
+                if dn is not None and number is not None:
+                    yield dn, number
+                dn, number = new_dn, None
+            pending = None
+
+        # an empty line separates records
+        if not first or first.isspace():
+            if not line or line.isspace():
+                if dn is not None and number is not None:
+                    yield dn, number
+                dn, number = None, None
+                continue
+            line = line.lstrip()
+
+        pending = line
+
+# Function to parse out of range LDIF lines and yield IDentities instances one by one
+def parse_outofrange_stream(lines: Iterable[str]) -> Iterator[IDentity]:
+    for entry in iter_outofrange_entries(lines):
+        yield make_identity(*entry)
+
+# Function to parse out of range LDIF lines straight into compact IdentityStore, sorted unless asked otherwise
+def parse_outofrange_store(lines: Iterable[str], sort: bool = True) -> IdentityStore:
+    store = IdentityStore()
+    for dn, number in iter_outofrange_entries(lines):
+        store.add(dn, number)
+    if sort:
+        store.sort()
+    return store
+
+# Function to split a file into about count chunks at record boundaries, returns (start, end) byte offsets.
+# Records are split only where an empty line is followed by a DN, with LF or CRLF line ends, so no record is ever cut in two
+def split_ldif_chunks(file_path: str, count: int, min_size: int = 1 << 20) -> List[Tuple[int, int]]:
+    with open(file_path, 'rb') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            chunk_size = max(size // max(count, 1), min_size)
+            chunks = []
+            start = 0
+            # separators of LF and CRLF files with where they were found last, -1 once there are no more of them,
+            # so a file is scanned for the separator it doesn't use only once
+            separators = [[b"\n\ndn:", 0], [b"\r\n\r\ndn:", 0]]
+            while start < size:
+                end = size
+                for separator in separators:
+                    if start + chunk_size < size and 0 <= separator[1] < start + chunk_size:
+                        separator[1] = mapped.find(separator[0], start + chunk_size)
+                    if separator[1] >= start + chunk_size:
+                        end = min(end, separator[1] + len(separator[0]) - len(b"dn:"))
+                chunks.append((start, end))
+                start = end
+    return chunks
+
+# Function to parse LDIF records of one chunk of a file into a sorted IdentityStore, runs in worker processes.
+# Chunk is decoded the same way open() does it, so it gives the same lines as reading the whole file would
+def parse_ldif_chunk(file_path: str, start: int, end: int) -> IdentityStore:
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        data = mapped[start:end]
+    return parse_outofrange_store(io.TextIOWrapper(io.BytesIO(data)))
+
+# Function to parse out of range LDIF file with several processes, each of them parsing its own chunks of the file.
+# Stores of chunks are sorted already and joined in file order, so the final stable sort only merges them,
+# and the result is the same as with parse_outofrange_store
+def parse_outofrange_parallel(file_path: str, jobs: int, sort: bool = True) -> IdentityStore:
+    # compressed data can't be split, it is parsed as a stream by this process
+    if file_compression(file_path) is not None:
+        return parse_outofrange_store(read_lines_from_file(file_path), sort)
+
+    chunks = split_ldif_chunks(file_path, jobs * 4)
+    store = IdentityStore()
+    if len(chunks) <= 1:
+        for start, end in chunks:
+            store.extend(parse_ldif_chunk(file_path, start, end))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            starts, ends = zip(*chunks)
+            for chunk_store in executor.map(parse_ldif_chunk, repeat(file_path), starts, ends):
+                store.extend(chunk_store)
+    if sort:
+        store.sort()
+    return store
+
+# Function to parse out of range input data and create IDentities instances
+def parse_outofrange_input(input_data: str) -> List[IDentity]:
+    return list(parse_outofrange_stream(input_data.split('\n')))
+
+# Function to detect compression from the first bytes of data, None for plain data
+def detect_compression(header: bytes) -> Optional[str]:
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+# Function to detect compression of a file
+def file_compression(file_path: str) -> Optional[str]:
+    with open(file_path, 'rb') as file:
+        return detect_compression(file.read(8))
+
+# Function to wrap binary stream with decompression of the given kind, data are decompressed as they are read
+def decompress_stream(binary: BinaryIO, compression: str) -> BinaryIO:
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=binary, mode='rb')
+    if compression == "bzip2" and bz2 is not None:
+        return bz2.BZ2File(binary)
+    if compression == "xz" and lzma is not None:
+        return lzma.LZMAFile(binary)
+    raise OSError(f"Python is built without {compression} support, decompress the file first")
+
+# Function to open file ('-' for stdin) as text, compressed data (by magic bytes) get decompressed on the fly
+@contextmanager
+def open_input(file_path: str) -> Iterator[TextIO]:
+    if file_path == '-':
+        binary = getattr(sys.stdin, 'buffer', None)
+        compression = detect_compression(binary.peek(8)) if binary is not None else None
+        if compression is None:
+            yield sys.stdin
+        else:
+            yield io.TextIOWrapper(decompress_stream(binary, compression))
+        return
+
+    with open(file_path, 'rb') as binary:
+        compression = detect_compression(binary.peek(8))
+        # without compression this is the same text stream open(file_path, 'r') gives
+        with io.TextIOWrapper(binary if compression is None else decompress_stream(binary, compression)) as file:
+            yield file
+
+# Function to read lines from file ('-' for stdin) one by one, without loading it whole
+def read_lines_from_file(file_path: str) -> Iterator[str]:
+    with open_input(file_path) as file:
+        yield from file
+
+# function to read IDranges from stdin
+def read_input_from_stdin() -> str:
+    # Read input data from stdin
+    with open_input('-') as file:
+        input_data = file.read()
+    return input_data.strip()
+
+# function to read data from file
+def read_input_from_file(file_path: str) -> str:
+    # Read input data from the file
+    with open_input(file_path) as file:
+        input_data = file.read()
+        return input_data.strip()
@@ -0,0 +1,392 @@
+"""
+Reading ranges and identities straight from an LDAP server, with a minimal LDAPv3 client
+"""
+import ssl
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .models import IDRange, IdentityStore
+from .inputs import parse_idrange_input
+from .ranges import build_outofrange_filters, get_ipa_local_ranges
+
+PAGED_RESULTS_OID = "1.2.840.113556.1.4.319"
+DEFAULT_PAGE_SIZE = 1000
+LDAP_RANGE_ATTRIBUTES = ["cn", "ipaBaseID", "ipaIDRangeSize", "ipaBaseRID", "ipaSecondaryBaseRID", "ipaRangeType",
+                         "ipaNTTrustedDomainSID", "ipaNTTrustedDomainName"]
+
+# search scopes
+SCOPE_BASE = 0
+SCOPE_SUBTREE = 2
+
+# Class for errors of LDAP operations and malformed LDAP messages
+class LdapError(Exception):
+    pass
+
+# Function to encode a BER element with the tag and content given
+def ber(tag: int, content: bytes) -> bytes:
+    length = len(content)
+    if length < 0x80:
+        return bytes((tag, length)) + content
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, 'big')
+    return bytes((tag, 0x80 | len(encoded))) + encoded + content
+
+def ber_int(value: int, tag: int = 0x02) -> bytes:
+    return ber(tag, value.to_bytes(value.bit_length() // 8 + 1, 'big', signed=True))
+
+def ber_string(value, tag: int = 0x04) -> bytes:
+    return ber(tag, value.encode('utf-8') if isinstance(value, str) else value)
+
+def ber_bool(value: bool, tag: int = 0x01) -> bytes:
+    return ber(tag, b"\xff" if value else b"\x00")
+
+def ber_sequence(*items: bytes, tag: int = 0x30) -> bytes:
+    return ber(tag, b"".join(items))
+
+# Function to decode the BER element at offset, returns its tag and where its content starts and ends
+def ber_element(data: bytes, offset: int, end: int) -> Tuple[int, int, int]:
+    if offset + 2 > end:
+        raise LdapError("truncated BER element")
+    tag, length = data[offset], data[offset + 1]
+    start = offset + 2
+    if length & 0x80:
+        count = length & 0x7f
+        length = int.from_bytes(data[start:start + count], 'big')
+        start += count
+    if start + length > end:
+        raise LdapError("truncated BER element")
+    return tag, start, start + length
+
+# Function to iterate over BER elements between start and end
+def ber_elements(data: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    while start < end:
+        element = ber_element(data, start, end)
+        yield element
+        start = element[2]
+
+def ber_to_int(data: bytes, start: int, end: int) -> int:
+    return int.from_bytes(data[start:end], 'big', signed=True)
+
+# Function to turn \XX escapes of a filter value into bytes
+def unescape_filter_value(value: str) -> bytes:
+    parts = value.split("\\")
+    result = bytearray(parts[0].encode('utf-8'))
+    for part in parts[1:]:
+        try:
+            result.append(int(part[:2], 16))
+        except ValueError:
+            raise LdapError(f"invalid escape in filter value '{value}'")
+        result += part[2:].encode('utf-8')
+    return bytes(result)
+
+# Function to encode a search filter given as a string. AND, OR, NOT, equality, greater or equal,
+# less or equal and presence filters are enough for the searches of the tool
+def encode_filter(text: str) -> bytes:
+    encoded, end = encode_filter_at(text, 0)
+    if end != len(text):
+        raise LdapError(f"invalid filter '{text}'")
+    return encoded
+
+def encode_filter_at(text: str, pos: int) -> Tuple[bytes, int]:
+    if not text.startswith("(", pos):
+        raise LdapError(f"invalid filter '{text}'")
+    operator = text[pos + 1:pos + 2]
+    if operator in ("&", "|", "!"):
+        pos += 2
+        items = []
+        while text.startswith("(", pos):
+            item, pos = encode_filter_at(text, pos)
+            items.append(item)
+        if not text.startswith(")", pos) or (operator == "!" and len(items) != 1):
+            raise LdapError(f"invalid filter '{text}'")
+        return ber({"&": 0xa0, "|": 0xa1, "!": 0xa2}[operator], b"".join(items)), pos + 1
+
+    end = text.find(")", pos)
+    attribute, equals, value = text[pos + 1:max(end, pos)].partition("=")
+    if end == -1 or not equals or not attribute:
+        raise LdapError(f"invalid filter '{text}'")
+    if attribute.endswith(">"):
+        tag, attribute = 0xa5, attribute[:-1]
+    elif attribute.endswith("<"):
+        tag, attribute = 0xa6, attribute[:-1]
+    elif value == "*":
+        return ber_string(attribute, 0x87), end + 1
+    else:
+        tag = 0xa3
+    return ber_sequence(ber_string(attribute), ber_string(unescape_filter_value(value)), tag=tag), end + 1
+
+# Function to raise an error if LDAPResult between start and end is not a success
+def check_result(message: bytes, start: int, end: int, operation: str) -> None:
+    elements = list(ber_elements(message, start, end))
+    if len(elements) < 3:
+        raise LdapError(f"malformed response to {operation}")
+    code = ber_to_int(message, elements[0][1], elements[0][2])
+    if code != 0:
+        diagnostic = message[elements[2][1]:elements[2][2]].decode('utf-8', 'replace')
+        raise LdapError(f"{operation} failed with result code {code}" + (f": {diagnostic}" if diagnostic else ""))
+
+# Function to decode SearchResultEntry between start and end, names of attributes are lowercase
+def decode_entry(message: bytes, start: int, end: int) -> Tuple[str, Dict[str, List[str]]]:
+    elements = list(ber_elements(message, start, end))
+    if len(elements) < 2:
+        raise LdapError("malformed search result entry")
+    (_, dn_start, dn_end), (_, attributes_start, attributes_end) = elements[:2]
+    attributes: Dict[str, List[str]] = {}
+    for _, attribute_start, attribute_end in ber_elements(message, attributes_start, attributes_end):
+        (_, type_start, type_end), (_, values_start, values_end) = list(ber_elements(message, attribute_start, attribute_end))[:2]
+        values = [message[s:e].decode('utf-8', 'replace') for _, s, e in ber_elements(message, values_start, values_end)]
+        attributes[message[type_start:type_end].decode('utf-8', 'replace').lower()] = values
+    return message[dn_start:dn_end].decode('utf-8', 'replace'), attributes
+
+# Function to get the cookie of simple paged results control from controls between start and end,
+# an empty cookie means the last page or a server ignoring the control
+def paged_results_cookie(message: bytes, start: int, end: int) -> bytes:
+    for _, control_start, control_end in ber_elements(message, start, end):
+        elements = list(ber_elements(message, control_start, control_end))
+        if len(elements) < 2 or elements[-1][0] != 0x04 or message[elements[0][1]:elements[0][2]] != PAGED_RESULTS_OID.encode():
+            continue
+        _, value_start, value_end = elements[-1]
+        _, sequence_start, sequence_end = ber_element(message, value_start, value_end)
+        _, cookie_start, cookie_end = list(ber_elements(message, sequence_start, sequence_end))[1]
+        return message[cookie_start:cookie_end]
+    return b""
+
+# Function to check if URI is ldaps://, so that a password is sent over TLS only
+def is_secure_uri(uri: str) -> bool:
+    return urlparse(uri).scheme.lower() == "ldaps"
+
+# Class for a connection to an LDAP server, given by ldap:// or ldaps:// URI. Operations are done one at a time
+class LdapConnection:
+
+    def __init__(self, uri: str, timeout: float = 30, cafile: Optional[str] = None):
+        parsed = urlparse(uri)
+        try:
+            port = parsed.port
+        except ValueError:
+            raise LdapError(f"invalid port in '{uri}'")
+        if parsed.scheme not in ("ldap", "ldaps") or not parsed.hostname:
+            raise LdapError(f"'{uri}' is not an ldap:// or ldaps:// URI")
+
+        self.socket : socket.socket = socket.create_connection((parsed.hostname, port or (636 if parsed.scheme == "ldaps" else 389)), timeout)
+        if parsed.scheme == "ldaps":
+            try:
+                self.socket = ssl.create_default_context(cafile=cafile).wrap_socket(self.socket, server_hostname=parsed.hostname)
+            except OSError:
+                self.socket.close()
+                raise
+        self.reader     = self.socket.makefile('rb')
+        self.message_id : int = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def send(self, operation: bytes, controls: bytes = b"") -> None:
+        self.message_id += 1
+        self.socket.sendall(ber_sequence(ber_int(self.message_id), operation, controls))
+
+    # Function to receive a message, returns the message with tag and content span of its operation
+    # and content span of its controls (None if it has none)
+    def receive(self) -> Tuple[bytes, int, int, int, Optional[Tuple[int, int]]]:
+        header = self.reader.read(2)
+        if len(header) < 2:
+            raise LdapError("connection closed by the server")
+        length = header[1]
+        if length & 0x80:
+            encoded = self.reader.read(length & 0x7f)
+            if len(encoded) < length & 0x7f:
+                raise LdapError("connection closed by the server")
+            length = int.from_bytes(encoded, 'big')
+        message = self.reader.read(length)
+        if len(message) < length:
+            raise LdapError("connection closed by the server")
+
+        elements = list(ber_elements(message, 0, len(message)))
+        if len(elements) < 2:
+            raise LdapError("malformed LDAP message")
+        if ber_to_int(message, elements[0][1], elements[0][2]) != self.message_id:
+            # message ID 0 is an unsolicited notification, e.g. the server is going to close the connection
+            raise LdapError("unexpected message from the server")
+        tag, start, end = elements[1]
+        controls = next(((s, e) for t, s, e in elements[2:] if t == 0xa0), None)
+        return message, tag, start, end, controls
+
+    def bind(self, dn: str, password: str) -> None:
+        self.send(ber_sequence(ber_int(3), ber_string(dn), ber_string(password, 0x80), tag=0x60))
+        message, tag, start, end, _ = self.receive()
+        if tag != 0x61:
+            raise LdapError("unexpected response to bind")
+        check_result(message, start, end, f"bind as {dn}")
+
+    # Function to search with simple paged results control when page_size > 0, yields (dn, attributes) of entries
+    def search(self, base: str, search_filter: str, attributes: List[str], scope: int = SCOPE_SUBTREE,
+               page_size: int = 0) -> Iterator[Tuple[str, Dict[str, List[str]]]]:
+        request = ber_sequence(ber_string(base), ber_int(scope, 0x0a), ber_int(0, 0x0a), ber_int(0), ber_int(0), ber_bool(False),
+                               encode_filter(search_filter), ber_sequence(*(ber_string(a) for a in attributes)), tag=0x63)
+        cookie = b""
+        while True:
+            controls = b""
+            if page_size > 0:
+                value = ber_sequence(ber_int(page_size), ber_string(cookie))
+                controls = ber_sequence(ber_sequence(ber_string(PAGED_RESULTS_OID), ber_string(value)), tag=0xa0)
+            self.send(request, controls)
+
+            while True:
+                message, tag, start, end, response_controls = self.receive()
+                if tag == 0x64:
+                    yield decode_entry(message, start, end)
+                elif tag == 0x65:
+                    check_result(message, start, end, f"search in {base or 'root DSE'}")
+                    break
+                elif tag != 0x73:
+                    # search result references are skipped, anything else is a broken response
+                    raise LdapError(f"unexpected response to search in {base}")
+
+            cookie = paged_results_cookie(message, *response_controls) if page_size > 0 and response_controls else b""
+            if not cookie:
+                return
+
+    def close(self) -> None:
+        try:
+            self.send(ber(0x42, b""))
+        except OSError:
+            pass
+        self.reader.close()
+        self.socket.close()
+
+# Class for a pool of at most size bound connections to one server, a new connection is opened when all the others
+# are in use and the pool is not full, otherwise the caller waits for one to be put back. A connection that failed
+# in the middle of an operation is closed instead, and None is put back for it, so its place can be opened again.
+# Binding over ldap:// would send the password in clear text, so it is refused unless insecure is set
+class LdapPool:
+
+    def __init__(self, uri: str, bind_dn: Optional[str] = None, password: str = "", size: int = 4,
+                 timeout: float = 30, cafile: Optional[str] = None, insecure: bool = False):
+        if bind_dn and not is_secure_uri(uri) and not insecure:
+            raise LdapError(f"binding as '{bind_dn}' over '{uri}' would send the password in clear text, use ldaps://")
+        self.uri      : str = uri
+        self.bind_dn  : Optional[str] = bind_dn
+        self.password : str = password
+        self.size     : int = size
+        self.timeout  : float = timeout
+        self.cafile   : Optional[str] = cafile
+        self.idle     : queue.Queue = queue.Queue()
+        self.lock     = threading.Lock()
+        self.opened   : int = 0   # places taken, by open connections and the ones being opened
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self) -> LdapConnection:
+        connection = LdapConnection(self.uri, self.timeout, self.cafile)
+        try:
+            if self.bind_dn:
+                connection.bind(self.bind_dn, self.password)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+    # Function to take an idle connection, or a place for a new one while the pool is not full, else to wait
+    def acquire(self) -> Optional[LdapConnection]:
+        with self.lock:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                if self.opened < self.size:
+                    self.opened += 1
+                    return None
+        return self.idle.get()
+
+    @contextmanager
+    def connection(self) -> Iterator[LdapConnection]:
+        connection = self.acquire()
+        if connection is None:
+            try:
+                connection = self.open()
+            except BaseException:
+                self.idle.put(None)
+                raise
+        try:
+            yield connection
+        except BaseException:
+            connection.close()
+            self.idle.put(None)
+            raise
+        self.idle.put(connection)
+
+    def close(self) -> None:
+        while not self.idle.empty():
+            connection = self.idle.get_nowait()
+            with self.lock:
+                self.opened -= 1
+            if connection is not None:
+                connection.close()
+
+# Function to get the suffix of the directory from its root DSE, None if the server doesn't tell
+def find_naming_context(pool: LdapPool) -> Optional[str]:
+    with pool.connection() as connection:
+        entries = list(connection.search("", "(objectClass=*)", ["defaultNamingContext", "namingContexts"], SCOPE_BASE))
+    for _, attributes in entries:
+        if attributes.get("defaultnamingcontext"):
+            return attributes["defaultnamingcontext"][0]
+        contexts = attributes.get("namingcontexts", [])
+        # IPA has its CA in o=ipaca next to the domain suffix
+        for context in contexts:
+            if context.lower().startswith("dc="):
+                return context
+        if contexts:
+            return contexts[0]
+    return None
+
+# Function to read ID ranges of the directory, the same way `ipa idrange-find --all --raw` output is read
+def fetch_ranges(pool: LdapPool, suffix: str, page_size: int = 0) -> List[IDRange]:
+    lines = []
+    with pool.connection() as connection:
+        for dn, attributes in connection.search(f"cn=ranges,cn=etc,{suffix}", "(objectClass=ipaIDrange)",
+                                                LDAP_RANGE_ATTRIBUTES, page_size=page_size):
+            lines.append(f"dn: {dn}")
+            for attribute, values in attributes.items():
+                lines.extend(f"{attribute}: {value}" for value in values if value.strip())
+    return parse_idrange_input("\n".join(lines))
+
+# Function to run one search for out of range identities, entries go straight into a store of their own
+def search_identities(pool: LdapPool, base: str, search_filter: str, attribute: str, page_size: int = 0) -> IdentityStore:
+    store = IdentityStore()
+    with pool.connection() as connection:
+        for dn, attributes in connection.search(base, search_filter, [attribute], page_size=page_size):
+            values = attributes.get(attribute.lower())
+            if not values:
+                continue
+            try:
+                store.add(dn, int(values[0]))
+            except ValueError:
+                raise LdapError(f"{dn} has invalid {attribute} '{values[0]}'")
+    return store
+
+# Function to read users and groups out of ipa-local ranges, with the same searches --outofrange asks for.
+# Searches run concurrently over the connections of the pool, the store is unsorted, in the order of searches
+def fetch_outofrange(pool: LdapPool, suffix: str, id_ranges: List[IDRange], max_clauses: int = 50,
+                     page_size: int = 0) -> IdentityStore:
+    searches = []
+    if get_ipa_local_ranges(id_ranges):
+        for object_class, id, cn in (("account", "uid", "users"), ("group", "gid", "groups")):
+            for search_filter in build_outofrange_filters(id_ranges, object_class, id, max_clauses):
+                searches.append((f"cn={cn},cn=accounts,{suffix}", search_filter, f"{id}Number"))
+
+    identities = IdentityStore()
+    with ThreadPoolExecutor(max_workers=max(pool.size, 1)) as executor:
+        futures = [executor.submit(search_identities, pool, base, search_filter, attribute, page_size)
+                   for base, search_filter, attribute in searches]
+        for future in futures:
+            identities.extend(future.result())
+    return identities
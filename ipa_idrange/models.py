@@ -0,0 +1,636 @@
+"""
+Class definitions
+"""
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import compress, islice
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Class for ID Range
+class IDRange:
+
+    def __init__(self):
+        self.name               : str = None
+        self.size               : int = None
+        self.first_id           : int = None
+        self.base_rid           : int = None
+        self.secondary_base_rid : int = None
+        self.suffix             : str = None
+        self.type               : str = None
+        self.last_id            : int = None
+        self.last_base_rid      : int = None
+        self.last_secondary_rid : int = None
+        self.dn                 : str = None
+        self.proposed           : bool = False
+        self.sid                : str = None   # SID of the trusted domain, AD trust ranges only
+        self.domain             : str = None   # name of the trusted domain
+
+    def count(self):
+        self.last_id = self.first_id + self.size - 1
+        if self.type == "ipa-local":
+            self.last_base_rid = self.base_rid + self.size if self.base_rid is not None else None
+            self.last_secondary_rid = self.secondary_base_rid + self.size if self.secondary_base_rid is not None else None
+
+    def __repr__(self):
+        return f"IDRange(name='{self.name}', type={self.type}, size={self.size}, first_id={self.first_id}, " \
+               f"base_rid={self.base_rid}, secondary_base_rid={self.secondary_base_rid})"
+    
+# Class for ID entity 
+class IDentity:
+    def __init__(self):
+        self.dn     : str = None
+        self.name   : str = None
+        self.user   : bool = None
+        self.number : int = None
+
+    def __repr__(self):
+        if self.user:
+            return f"user(username='{self.name}', uid={self.number}, {self.dn})"
+        else:
+            return f"group(groupname='{self.name}', gid={self.number}, {self.dn})"
+
+# Class for compact column storage of ID entities, entity i is spread over the i-th item of every column
+class IdentityStore:
+
+    def __init__(self):
+        self.numbers     : array = array('q')       # uidNumber or gidNumber
+        self.users       : bytearray = bytearray()  # 1 for users, 0 for groups
+        self.rdn_starts  : array = array('q')       # offset of the first DN component in rdn_buffer
+        self.rdn_lengths : array = array('I')       # length of the first DN component in rdn_buffer
+        self.parents     : array = array('I')       # index of the rest of the DN in parent_dns
+        self.rdn_buffer  : bytearray = bytearray()
+        self.parent_dns  : List[str] = []
+        self.parent_ids  : Dict[str, int] = {}
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def add(self, dn: str, number: int) -> None:
+        # DNs of the same kind share everything except the first component, so we store the rest only once
+        rdn, _, parent = dn.partition(',')
+        parent_id = self.parent_ids.get(parent)
+        if parent_id is None:
+            parent_id = len(self.parent_dns)
+            self.parent_ids[parent] = parent_id
+            self.parent_dns.append(parent)
+
+        encoded = rdn.encode('utf-8')
+        self.numbers.append(number)
+        self.users.append(1 if rdn[:4].lower() == 'uid=' else 0)
+        self.rdn_starts.append(len(self.rdn_buffer))
+        self.rdn_lengths.append(len(encoded))
+        self.parents.append(parent_id)
+        self.rdn_buffer += encoded
+
+    # Function to append all entities of another store, DN components get copied into this store's buffers
+    def extend(self, other: 'IdentityStore') -> None:
+        parent_map = []
+        for parent in other.parent_dns:
+            parent_id = self.parent_ids.get(parent)
+            if parent_id is None:
+                parent_id = len(self.parent_dns)
+                self.parent_ids[parent] = parent_id
+                self.parent_dns.append(parent)
+            parent_map.append(parent_id)
+
+        offset = len(self.rdn_buffer)
+        self.numbers += other.numbers
+        self.users += other.users
+        self.rdn_starts += array('q', [start + offset for start in other.rdn_starts]) if offset else other.rdn_starts
+        self.rdn_lengths += other.rdn_lengths
+        self.parents += array('I', map(parent_map.__getitem__, other.parents))
+        self.rdn_buffer += other.rdn_buffer
+
+    def sort(self) -> None:
+        # stores loaded from the cache or parsed from sorted exports are sorted already
+        numbers = self.numbers.tolist()
+        if all(map(operator.le, numbers, islice(numbers, 1, None))):
+            return
+        # an index is sorted by number once (stable, same as sorting IDentities), keys come from a list so no int
+        # is made per call. All the columns are reordered with this one permutation, itemgetter picks the items in C
+        take = operator.itemgetter(*sorted(range(len(numbers)), key=numbers.__getitem__))
+        self.numbers = array('q', take(numbers))
+        self.users = bytearray(take(self.users))
+        self.rdn_starts = array('q', take(self.rdn_starts))
+        self.rdn_lengths = array('I', take(self.rdn_lengths))
+        self.parents = array('I', take(self.parents))
+
+    def rdn(self, i: int) -> str:
+        start = self.rdn_starts[i]
+        return self.rdn_buffer[start:start + self.rdn_lengths[i]].decode('utf-8')
+
+    def dn(self, i: int) -> str:
+        parent = self.parent_dns[self.parents[i]]
+        return f"{self.rdn(i)},{parent}" if parent else self.rdn(i)
+
+    def name(self, i: int) -> str:
+        return split_rdn(self.rdn(i))[1]
+
+    def is_user(self, i: int) -> bool:
+        return self.users[i] == 1
+
+    # DN and name are decoded only here, when entity actually needs to be shown
+    def identity(self, i: int) -> IDentity:
+        return make_identity(self.dn(i), self.numbers[i])
+
+    # Function to get a store with entities from index ranges only, DN buffers are shared, not copied
+    def select(self, spans: Iterable[range]) -> 'IdentityStore':
+        subset = IdentityStore()
+        subset.rdn_buffer = self.rdn_buffer
+        subset.parent_dns = self.parent_dns
+        subset.parent_ids = self.parent_ids
+        for span in spans:
+            subset.numbers += self.numbers[span.start:span.stop]
+            subset.users += self.users[span.start:span.stop]
+            subset.rdn_starts += self.rdn_starts[span.start:span.stop]
+            subset.rdn_lengths += self.rdn_lengths[span.start:span.stop]
+            subset.parents += self.parents[span.start:span.stop]
+        return subset
+
+    # Function to get a store with entities whose keep flag is set only, DN buffers are shared, not copied
+    def compress(self, keep: bytearray) -> 'IdentityStore':
+        subset = IdentityStore()
+        subset.rdn_buffer = self.rdn_buffer
+        subset.parent_dns = self.parent_dns
+        subset.parent_ids = self.parent_ids
+        subset.numbers = array('q', compress(self.numbers, keep))
+        subset.users = bytearray(compress(self.users, keep))
+        subset.rdn_starts = array('q', compress(self.rdn_starts, keep))
+        subset.rdn_lengths = array('I', compress(self.rdn_lengths, keep))
+        subset.parents = array('I', compress(self.parents, keep))
+        return subset
+
+# Class for sorted index of closed intervals [start, end] with an item attached to each of them.
+# Segments are found by bisect, so overlaps() is O(log n). insert() locates its segments and its place in a segment in
+# O(log n) too, but splices Python lists, which moves O(n) pointers, so n inserts cost O(n log n) comparisons and O(n^2)
+# moves (a memmove each, cheap for the thousands of ranges of an installation). find() bisects members of a segment, they are sorted
+# by start, so it costs O(log n + m) where m is the members of touching segments starting at or before the end asked for
+class IntervalIndex:
+
+    def __init__(self):
+        # intervals are kept in disjoint sorted segments, each segment is a union of mutually overlapping intervals
+        self.starts        : List[int] = []
+        self.ends          : List[int] = []
+        self.members       : List[List[Tuple[int, int, Any]]] = []   # intervals of a segment sorted by start
+        self.member_starts : List[List[int]] = []                    # their starts, to bisect
+        self.size          : int = 0
+
+    def __len__(self):
+        return self.size
+
+    # segments with indexes lo..hi-1 are the ones touching [start, end]
+    def segment_span(self, start: int, end: int) -> Tuple[int, int]:
+        return bisect_left(self.ends, start), bisect_right(self.starts, end)
+
+    def insert(self, start: int, end: int, item: Any = None) -> None:
+        lo, hi = self.segment_span(start, end)
+        members = [(start, end, item)]
+        member_starts = [start]
+
+        # joining one segment puts the interval at its place by bisect, into new lists as copies share the old ones
+        if hi == lo + 1:
+            segment, segment_starts = self.members[lo], self.member_starts[lo]
+            k = bisect_left(segment_starts, start)
+            members = segment[:k] + members + segment[k:]
+            member_starts = segment_starts[:k] + member_starts + segment_starts[k:]
+        # merging several segments into one, members of every segment are sorted already,
+        # so the stable sort only merges the runs and equal starts keep the order they had
+        elif lo < hi:
+            for segment in self.members[lo:hi]:
+                members.extend(segment)
+            members.sort(key=itemgetter(0))
+            member_starts = [member[0] for member in members]
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
+        self.members[lo:hi] = [members]
+        self.member_starts[lo:hi] = [member_starts]
+        self.size += 1
+
+    # Function to copy the index, segment member lists are shared as inserts replace them instead of changing them
+    def copy(self) -> 'IntervalIndex':
+        index = IntervalIndex()
+        index.starts = self.starts[:]
+        index.ends = self.ends[:]
+        index.members = self.members[:]
+        index.member_starts = self.member_starts[:]
+        index.size = self.size
+        return index
+
+    def overlaps(self, start: int, end: int) -> bool:
+        lo, hi = self.segment_span(start, end)
+        return lo < hi
+
+    def find(self, start: int, end: int) -> List[Any]:
+        lo, hi = self.segment_span(start, end)
+        found = []
+        for k in range(lo, hi):
+            segment = self.members[k]
+            # a segment inside [start, end] has all its members there, else members starting after end are skipped
+            if start <= self.starts[k] and self.ends[k] <= end:
+                found.extend(member[2] for member in segment)
+            else:
+                found.extend(item for first, last, item in islice(segment, bisect_right(self.member_starts[k], end)) if last >= start)
+        return found
+
+    # Function to get all pairs of overlapping intervals as (earlier, later) items, sweeping every segment once
+    def overlapping_pairs(self) -> List[Tuple[Any, Any]]:
+        pairs = []
+        for segment in self.members:
+            if len(segment) < 2:
+                continue
+            active : List[Tuple[int, int, Any]] = []
+            for interval in sorted(segment, key=lambda x: (x[0], x[1])):
+                active = [other for other in active if other[1] >= interval[0]]
+                pairs.extend((other[2], interval[2]) for other in active)
+                active.append(interval)
+        return pairs
+
+# Class for RID space allocation, keeps free RID intervals between used primary and secondary RID spans
+class RidAllocator:
+
+    # RIDs lower than 1000 are reserved, RIDs from 2^31 on are used for SubIDs
+    first_rid : int = 1000
+    rid_limit : int = 2147483647
+    leaves    : int = 1 << 31   # leaves of the tree of longest holes, one per RID
+    policies  : Tuple[str, ...] = ("after-highest", "first-fit", "best-fit")
+
+    def __init__(self, delta: int, policy: str = "after-highest"):
+        # delta is the headroom left after a RID span, so the range can grow later on
+        self.delta      : int = delta
+        self.policy     : str = policy
+        # free RIDs as closed intervals sorted by start, and the same intervals sorted by (length, start)
+        self.free_starts : List[int] = [self.first_rid]
+        self.free_ends   : List[int] = [self.rid_limit - 1]
+        self.by_length   : List[Tuple[int, int]] = [(self.rid_limit - self.first_rid, self.first_rid)]
+        # binary tree over the RID space, node -> length of the longest hole starting under it, nodes without holes
+        # are left out. Node 1 is the root, node n has children 2n and 2n+1, and the leaf of RID r is leaves + r.
+        # It is built for the first first-fit search, other policies don't need it
+        self.longest     : Optional[Dict[int, int]] = None
+        # end (base + size) of the highest primary and secondary RID span
+        self.highest    : Dict[bool, int] = {True: 0, False: 0}
+
+    def copy(self) -> 'RidAllocator':
+        allocator = RidAllocator(self.delta, self.policy)
+        allocator.free_starts = self.free_starts[:]
+        allocator.free_ends = self.free_ends[:]
+        allocator.by_length = self.by_length[:]
+        allocator.longest = None if self.longest is None else dict(self.longest)
+        allocator.highest = dict(self.highest)
+        return allocator
+
+    def remove_hole(self, i: int) -> None:
+        start, end = self.free_starts.pop(i), self.free_ends.pop(i)
+        del self.by_length[bisect_left(self.by_length, (end - start + 1, start))]
+        if self.longest is not None:
+            self.set_longest(start, 0)
+
+    def add_hole(self, start: int, end: int) -> None:
+        i = bisect_left(self.free_starts, start)
+        self.free_starts.insert(i, start)
+        self.free_ends.insert(i, end)
+        self.by_length.insert(bisect_left(self.by_length, (end - start + 1, start)), (end - start + 1, start))
+        if self.longest is not None:
+            self.set_longest(start, end - start + 1)
+
+    # Function to build the tree of longest holes level by level from the leaves up
+    def build_longest(self) -> None:
+        level = {self.leaves + start: end - start + 1 for start, end in zip(self.free_starts, self.free_ends)}
+        self.longest = dict(level)
+        while level and 1 not in level:
+            parents: Dict[int, int] = {}
+            for node, length in level.items():
+                if parents.get(node >> 1, 0) < length:
+                    parents[node >> 1] = length
+            self.longest.update(parents)
+            level = parents
+
+    # Function to set length of the hole starting at start (0 when it is gone) and update its ancestors in the tree,
+    # going up stops at the first node that doesn't change
+    def set_longest(self, start: int, length: int) -> None:
+        node = self.leaves + start
+        while node:
+            if length:
+                self.longest[node] = length
+            else:
+                self.longest.pop(node, None)
+            parent_length = max(length, self.longest.get(node ^ 1, 0))
+            node >>= 1
+            if self.longest.get(node, 0) == parent_length:
+                break
+            length = parent_length
+
+    # Function to get start of the lowest hole at least length long, descending from the root to the leftmost
+    # child that has such a hole under it, None if there is none
+    def lowest_hole(self, length: int) -> Optional[int]:
+        if self.longest is None:
+            self.build_longest()
+        if self.longest.get(1, 0) < length:
+            return None
+        node = 1
+        while node < self.leaves:
+            node <<= 1
+            if self.longest.get(node, 0) < length:
+                node += 1
+        return node - self.leaves
+
+    # Function to mark RIDs base..base+size-1 as used
+    def reserve(self, base: int, size: int, primary: bool = True) -> None:
+        end = base + size - 1
+        self.highest[primary] = max(self.highest[primary], base + size)
+
+        lo, hi = bisect_left(self.free_ends, base), bisect_right(self.free_starts, end)
+        if lo >= hi:
+            return
+        # the holes touched by the span get replaced by what is left of them on both sides
+        left = (self.free_starts[lo], base - 1)
+        right = (end + 1, self.free_ends[hi - 1])
+        for i in reversed(range(lo, hi)):
+            self.remove_hole(i)
+        for start, end in (left, right):
+            if start <= end:
+                self.add_hole(start, end)
+
+    # Function to check all RIDs base..base+size-1 are free
+    def fits(self, base: int, size: int) -> bool:
+        i = bisect_right(self.free_starts, base) - 1
+        return i >= 0 and self.free_ends[i] >= base + size - 1
+
+    # Function to get a base inside hole i with headroom after the previous span and before the next one
+    def base_in_hole(self, i: int, size: int) -> Optional[int]:
+        start, end = self.free_starts[i], self.free_ends[i]
+        base = start + self.delta if start > self.first_rid else start
+        last = base + size - 1 + (self.delta if end < self.rid_limit - 1 else 0)
+        return base if last <= end else None
+
+    # Function to get the lowest base of a hole big enough
+    def first_fit(self, size: int) -> Optional[int]:
+        # holes inside the RID space need both headrooms, the first and the last one may need less
+        holes = [i for i in (0, len(self.free_starts) - 1) if self.free_starts]
+        start = self.lowest_hole(size + 2 * self.delta)
+        if start is not None:
+            holes.append(bisect_left(self.free_starts, start))
+        for i in sorted(set(holes)):
+            base = self.base_in_hole(i, size)
+            if base is not None:
+                return base
+        return None
+
+    # Function to get a base from the smallest hole big enough
+    def best_fit(self, size: int) -> Optional[int]:
+        position = bisect_left(self.by_length, (size + 2 * self.delta, 0))
+        holes = [bisect_left(self.free_starts, start) for length, start in self.by_length[position:position + 1]]
+        holes.extend(i for i in (0, len(self.free_starts) - 1) if self.free_starts)
+        best = None
+        for i in sorted(set(holes), key=lambda x: (self.free_ends[x] - self.free_starts[x], self.free_starts[x])):
+            base = self.base_in_hole(i, size)
+            if base is not None:
+                best = base
+                break
+        return best
+
+    # Function to get a base after the highest span of the same kind, then after the highest of any kind
+    def after_highest(self, size: int, primary: bool) -> Optional[int]:
+        for base in (self.highest[primary] + self.delta, max(self.highest.values()) + self.delta):
+            if self.fits(base, size):
+                return base
+        return None
+
+    # Function to allocate RIDs for a span of size, returns None if there is no room left
+    def allocate(self, size: int, primary: bool = True) -> Optional[int]:
+        if self.policy == "first-fit":
+            base = self.first_fit(size)
+        elif self.policy == "best-fit":
+            base = self.best_fit(size)
+        else:
+            # after the highest span is the way RID bases are usually given, holes are the fallback
+            base = self.after_highest(size, primary)
+            if base is None:
+                base = self.first_fit(size)
+
+        if base is not None:
+            self.reserve(base, size, primary)
+        return base
+
+# Function to split the first DN component into lowercase attribute name and value
+def split_rdn(rdn: str) -> Tuple[str, str]:
+    name_cn = rdn.split('=', 1)
+    return name_cn[0].strip().lower(), name_cn[-1].strip()
+
+# Function to create IDentity instance from DN and ID number
+def make_identity(dn: str, number: int) -> IDentity:
+    identity = IDentity()
+    identity.dn = f"dn: {dn}"
+    identity.number = number
+
+    # Extract the name and user flag from the first DN component
+    attribute, identity.name = split_rdn(dn.split(',')[0])
+    identity.user = attribute == 'uid'
+
+    return identity
+
+# Class for options of the analysis, defaults are the same as the command line ones
+@dataclass
+class AnalysisOptions:
+    ridoffset      : int = 100000
+    ridpolicy      : str = "after-highest"
+    rangegap       : int = 200000
+    minrange       : int = 10
+    allowunder1000 : bool = False
+    norounding     : bool = False
+    filterclauses  : int = 50
+    ldappagesize   : int = 0
+    strategy       : str = "greedy"
+    rangecost      : float = 10000
+    wastecost      : float = 1
+    outliercost    : float = 1000
+
+# Class for two overlapping ranges, other is None for the system range of IDs lower 1000
+@dataclass
+class Overlap:
+    idrange : IDRange
+    other   : Optional[IDRange]
+
+# Class for two RID spans of the same domain that overlap, primary tells if it is the base RID span or the secondary one
+@dataclass
+class RidConflict:
+    idrange       : IDRange
+    primary       : bool
+    other         : IDRange
+    other_primary : bool
+    sid           : Optional[str] = None   # SID of the trusted domain, None for ipa-local ranges
+
+# Class for RID bases proposed for an existing ipa-local range
+@dataclass
+class RidProposal:
+    idrange            : IDRange
+    base_rid           : Optional[int] = None   # newly proposed values, None if already set
+    secondary_base_rid : Optional[int] = None
+    missing            : Optional[str] = None   # "base" or "secondary" if there was no free RID space for it
+    command            : Optional[str] = None   # proposed values with ldapmodify command to apply them, as shown in the report
+    ldif               : Optional[str] = None   # LDIF for ldapmodify to apply the proposal
+
+# Class for a range proposed for a group of IDs out of ranges
+@dataclass
+class RangeProposal:
+    start_id : int
+    end_id   : int
+    idrange  : Optional[IDRange] = None   # None if no range could be created without an overlap
+    command  : Optional[str] = None       # ipa idrange-add command to create the range
+
+# Class for an ldapsearch of identities out of ranges, in one slice of the gaps between ipa-local ranges
+@dataclass
+class LdapSearch:
+    kind    : str   # "users" or "groups"
+    base    : str
+    filter  : str
+    command : str   # ldapsearch command appending the entries found to outofranges.ldif
+
+# Class for identities left out of proposed ranges, kept as index ranges into a sorted store
+@dataclass(eq=False)
+class Outliers:
+    store : IdentityStore
+    spans : List[range] = field(default_factory=list)
+
+    def __len__(self):
+        return sum(map(len, self.spans))
+
+    def __iter__(self) -> Iterator[IDentity]:
+        for span in self.spans:
+            for i in span:
+                yield self.store.identity(i)
+
+    # Function to count identities the way --sweep does, user private groups (upg: number -> how many) count as one
+    # with their users. Identities of one number are never split, so every number is looked up once by binary search
+    def count(self, upg: Optional[Dict[int, int]] = None) -> int:
+        count = len(self)
+        starts = [span.start for span in self.spans]
+        for number, pairs in (upg or {}).items():
+            i = bisect_left(self.store.numbers, number)
+            k = bisect_right(starts, i) - 1
+            if k >= 0 and i < self.spans[k].stop and self.store.numbers[i] == number:
+                count -= pairs
+        return count
+
+# Class for identities sharing a number: users with the same uidNumber ("uid"), groups with the same gidNumber ("gid"),
+# or users and groups with the same number where the groups are not their user private groups ("user-group")
+@dataclass
+class IdCollision:
+    number : int
+    kind   : str
+    dns    : List[str]
+
+# Class for duplicate entries and collisions found among identities
+@dataclass
+class Collisions:
+    duplicates : int = 0                                           # entries with a DN listed before, left out of the analysis
+    collisions : List[IdCollision] = field(default_factory=list)
+    upg        : Dict[int, int] = field(default_factory=dict)      # number -> user private groups with it, they don't count on their own
+
+# Class for outliers sharing a number moved to a free ID of an ipa-local range, all identities with the number
+# move together, so users keep their private groups
+@dataclass
+class Relocation:
+    number     : int
+    new_number : int
+    idrange    : IDRange   # range the new number is in
+    entries    : range     # index range of the identities in the sorted store
+
+# Class for new IDs planned for outliers, ranges they can go to are proposed ones, and existing ipa-local ranges
+# only if all identities were given, as only then it is known which of their IDs are free
+@dataclass(eq=False)
+class RelocationPlan:
+    store       : IdentityStore
+    targets     : List[Tuple[IDRange, int]] = field(default_factory=list)   # ranges with their free IDs before the plan
+    existing    : bool = False                                              # if existing ipa-local ranges are targets too
+    relocations : List[Relocation] = field(default_factory=list)
+    covered     : Optional[Outliers] = None   # outliers inside proposed ranges already, they don't have to move
+    unplaced    : Optional[Outliers] = None   # outliers no free ID was left for
+
+# Class for the result of the whole analysis
+@dataclass(eq=False)
+class Analysis:
+    options           : AnalysisOptions
+    ranges            : List[IDRange]                          # ranges as given, sorted by first ID
+    result            : List[IDRange]                          # copies of the ranges with all the proposals applied
+    overlaps          : List[Overlap] = field(default_factory=list)
+    rid_overlaps      : List[RidConflict] = field(default_factory=list)
+    rid_proposals     : List[RidProposal] = field(default_factory=list)
+    identities        : Optional[IdentityStore] = None         # all identities given, sorted by number
+    outofrange        : Optional[IdentityStore] = None         # identities the ranges are proposed for
+    classification    : Optional[List[Dict[str, Any]]] = None  # only if all identities were given to be classified
+    collisions        : Optional[Collisions] = None            # only if identities were given
+    under1000         : Optional[Outliers] = None
+    outliers          : Optional[Outliers] = None
+    range_proposals   : List[RangeProposal] = field(default_factory=list)
+    relocation        : Optional[RelocationPlan] = None        # only if asked for
+    ldapsearch_users  : Optional[str] = None                   # only if no identities were given
+    ldapsearch_groups : Optional[str] = None
+    ldapsearches      : List[LdapSearch] = field(default_factory=list)   # the same searches one by one
+
+# Class for a range that differs between two snapshots, kind is "added", "removed", "resized", "moved" or "modified"
+@dataclass
+class RangeChange:
+    kind : str
+    old  : Optional[IDRange]   # None for an added range
+    new  : Optional[IDRange]   # None for a removed range
+
+# Class for the delta between a baseline snapshot of ranges and the current one
+@dataclass(eq=False)
+class RangeDiff:
+    changes        : List[RangeChange] = field(default_factory=list)
+    overlaps       : List[Overlap] = field(default_factory=list)       # overlaps the baseline didn't have
+    lost_rid_bases : List[RangeChange] = field(default_factory=list)   # ranges that had a RID base set and don't have it anymore
+    rid_conflicts  : List[RidConflict] = field(default_factory=list)   # RID span overlaps the baseline didn't have
+    uncovered      : List[Tuple[int, int]] = field(default_factory=list)  # IDs covered by ipa-local ranges only in the baseline
+
+# Class for one IPA deployment analyzed in fleet mode, error tells why it can't be analyzed at all
+@dataclass
+class Realm:
+    name       : str
+    ranges     : Optional[str] = None   # path to `ipa idrange-find --all --raw` output
+    identities : Optional[str] = None   # path to out of range identities LDIF
+    error      : Optional[str] = None
+
+# Class for local account files of a host, collected from its /etc
+@dataclass
+class Host:
+    name   : str
+    passwd : Optional[str] = None   # path to the passwd file of the host
+    group  : Optional[str] = None   # path to the group file of the host
+
+# Class for a local account found on hosts with the same name and number, where the number is in IPA ranges
+@dataclass
+class HostConflict:
+    name   : str
+    user   : bool
+    number : int
+    ranges : List[IDRange]   # ranges the number is in
+    hosts  : List[str]       # hosts having the account
+
+# Class for the result of a scan of local accounts of hosts against IPA ranges
+@dataclass(eq=False)
+class HostScan:
+    hosts             : int = 0   # hosts scanned
+    users             : int = 0   # local users of all the hosts
+    groups            : int = 0   # local groups of all the hosts
+    conflicts         : List[HostConflict] = field(default_factory=list)
+    conflicting_hosts : int = 0   # hosts with at least one conflict
+    ranges            : List[Dict[str, Any]] = field(default_factory=list)   # ranges hit, with distinct users, groups and hosts in them
+    errors            : List[Tuple[str, str]] = field(default_factory=list)  # hosts with files that can't be read, and why
+
+# Class for how far an ipa-local range can grow without overlapping IDs or RIDs of another range
+@dataclass
+class Headroom:
+    idrange    : IDRange
+    max_size   : int                       # largest size the range can have, lower than its size if it overlaps already
+    limit      : str                       # what stops it: IDs ("id"), base ("rid") or secondary base ("secondary_rid") RID span
+    limited_by : Optional[IDRange] = None  # of this range, or the end of "id_space" or "rid_space" where it is None
+    grow_to    : Optional[int] = None      # size asked for, if it fits
+    command    : Optional[str] = None      # ipa idrange-mod command to grow the range to grow_to
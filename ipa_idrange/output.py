@@ -0,0 +1,608 @@
+"""
+Working with output
+"""
+import sys
+import csv
+import json
+from abc import ABC, abstractmethod
+from collections import Counter
+from operator import attrgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+from .models import Analysis, Collisions, Headroom, HostConflict, HostScan, IDRange, Outliers, Overlap, RangeDiff, RangeProposal, RelocationPlan, RidConflict, RidProposal, split_rdn
+from .relocation import create_relocation_commands, relocation_lines
+from .rids import RIDBASE_LDAPMODIFY
+
+FLEET_COLUMNS = ["realm", "status", "ranges", "overlaps", "missing_rid_bases", "identities", "outliers", "proposed_ranges", "seconds"]
+COLLISION_NAMES = {"uid": "Users share uidNumber", "gid": "Groups share gidNumber",
+                   "user-group": "Users and groups that are not their private groups share number"}
+RANGE_COLUMNS = ["name", "type", "size", "first_id", "last_id", "base_rid", "last_base_rid", "secondary_base_rid", "last_secondary_rid"]
+IDENTITY_COLUMNS = ["name", "user", "number", "dn"]
+# columns of every kind of record in CSV, after the record kind itself
+RECORD_COLUMNS = {
+    "range": ["section"] + RANGE_COLUMNS + ["old_first_id", "old_size"],
+    "overlap": ["name", "other"],
+    "rid_conflict": ["name", "primary", "other", "other_primary", "sid"],
+    "rid_proposal": ["name", "base_rid", "secondary_base_rid", "missing", "command", "ldif"],
+    "classification": ["name", "type", "first_id", "last_id", "users", "groups", "percent", "fill"],
+    "duplicates": ["identities"],
+    "collision": ["type", "number", "dn"],
+    "under1000": IDENTITY_COLUMNS,
+    "outlier": IDENTITY_COLUMNS,
+    "covered": IDENTITY_COLUMNS,
+    "unplaced": IDENTITY_COLUMNS,
+    "range_proposal": ["start_id", "end_id", "command", "name", "first_id", "last_id", "size", "base_rid", "secondary_base_rid"],
+    "ldapsearch": ["type", "base", "filter", "command"],
+    "relocation_target": ["name", "first_id", "last_id", "size"],
+    "relocation": ["name", "user", "number", "new_number", "dn", "other", "command"],
+    "sweep": ["rangegap", "minrange", "ranges", "outliers", "id_space"],
+    "lost_rid_base": ["name", "base_rid", "secondary_base_rid"],
+    "uncovered": ["first_id", "last_id"],
+    "realm": FLEET_COLUMNS + ["report", "error"],
+    "headroom": ["name", "size", "max_size", "limit", "other", "command"],
+    "host_scan": ["hosts", "users", "groups"],
+    "host_range": ["name", "type", "first_id", "last_id", "users", "groups", "hosts"],
+    "host_conflict": ["name", "user", "number", "other", "hosts", "host_names"],
+    "host_error": ["name", "error"],
+}
+
+# Function to get a command without the "# " it is shown with in the report, so that records hold commands that can be run
+def shell_command(command: Optional[str]) -> Optional[str]:
+    return command[2:] if command is not None and command.startswith("# ") else command
+
+# Function to draw a pretty table
+def draw_ascii_table(id_ranges: List[IDRange], file: TextIO = None) -> None:
+    draw_table(RANGE_COLUMNS, list(map(attrgetter(*RANGE_COLUMNS), id_ranges)), file)
+
+# Function to draw a pretty table of rows with values in order of columns
+def draw_table(columns: List[str], rows: List[List[Any]], file: TextIO = None) -> None:
+    file = file or sys.stdout
+    # every value is turned into a string once, empty for None, and column widths are taken column by column
+    cells = [["" if value is None else str(value) for value in row] for row in rows]
+    widths = [max(len(column), max(map(len, column_cells), default=0)) for column, column_cells in zip(columns, zip(*cells) if cells else [()] * len(columns))]
+
+    # Draw the table header, rows and borders, all at once
+    header = "| " + " | ".join(column.ljust(width) for column, width in zip(columns, widths)) + " | "
+    horizontal_line = "-" * (len(header)-1)
+    lines = [horizontal_line, header, horizontal_line]
+    lines.extend("| " + " | ".join(cell.rjust(width) for cell, width in zip(row, widths)) + " | " for row in cells)
+    lines.append(horizontal_line)
+    file.write("\n".join(lines) + "\n")
+
+# Function to draw output headers
+def print_header(text: str, file: TextIO = None) -> None:
+    horizontal_line = "-" * 80
+    print(f"\n{horizontal_line}", file=file)
+    print(text, file=file)
+    print(horizontal_line, file=file)
+
+# Function to name a RID span of a conflict
+def rid_span_name(idrange: IDRange, primary: bool) -> str:
+    return f"{'base' if primary else 'secondary base'} RID span of {idrange.name}"
+
+# Function to get a warning about two overlapping RID spans
+def rid_conflict_line(conflict: RidConflict) -> str:
+    line = f"\nWARNING! The {rid_span_name(conflict.idrange, conflict.primary)} overlaps with the {rid_span_name(conflict.other, conflict.other_primary)}"
+    if conflict.sid is not None:
+        domain = conflict.idrange.domain or conflict.other.domain
+        line += f" in trusted domain {domain} ({conflict.sid})" if domain else f" in trusted domain {conflict.sid}"
+    return line + "!"
+
+# Function to print range overlaps in ID space and RID spans overlapping within a domain
+def render_overlaps(overlaps: List[Overlap], rid_overlaps: List[RidConflict] = (), file: TextIO = None) -> None:
+    system_name = "default system local range (IDs lower 1000 are reserved for system and service users and groups)"
+    for overlap in overlaps:
+        print("\nWARNING! Range {} overlaps with {}!".format(overlap.idrange.name, system_name if overlap.other is None else overlap.other.name), file=file)
+    for conflict in rid_overlaps:
+        print(rid_conflict_line(conflict), file=file)
+    if len(overlaps) == 0 and len(rid_overlaps) == 0:
+        print("\nAll ranges seem to be in order.", file=file)
+
+# Function to print entries listed more than once and identities sharing a number
+def render_collisions(collisions: Collisions, file: TextIO = None) -> None:
+    if collisions.duplicates:
+        print(f"\n{collisions.duplicates} entries are listed more than once, only the first of each is used.", file=file)
+    for collision in collisions.collisions:
+        print(f"\nWARNING! {COLLISION_NAMES[collision.kind]} {collision.number}:", file=file)
+        for dn in collision.dns:
+            print(f"  {dn}", file=file)
+    if collisions.upg:
+        print(f"\n{sum(collisions.upg.values())} user private groups share numbers with their users, they are counted as one identity with them.", file=file)
+
+# Function to print RID bases proposals, or warnings for the ones that failed
+def render_rid_proposals(proposals: List[RidProposal], file: TextIO = None) -> None:
+    for proposal in proposals:
+        if proposal.missing is not None:
+            # if there is no room for it, we print the warning
+            print(f"Warning: No free RID space for {'base' if proposal.missing == 'base' else 'secondary base'} RID of {proposal.idrange.name} found, please adjust manually", file=file)
+        else:
+            print(proposal.command, file=file)
+
+# Function to print a proposal of a new range with warnings for RID bases that couldn't be found
+def render_range_proposal(proposal: RangeProposal, file: TextIO = None) -> None:
+    print(f"\nProposition for a range for existing IDs out of ranges with start id {proposal.start_id} and end id {proposal.end_id}:\n", file=file)
+
+    newrange = proposal.idrange
+    if newrange is None:
+        print("ERROR! Failed to create idrange for current group, it overlaps with existing range!\
+\nRun the tool without --outofrange to get correct ldapsearches for IDs out of ranges!", file=file)
+        return
+
+    if newrange.base_rid is None:
+        print(f"Warning! No free RID space for base RID of new range start id {newrange.first_id} and \
+end id {newrange.last_id} found, please adjust manually", file=file)
+    if newrange.secondary_base_rid is None:
+        print(f"Warning! No free RID space for secondary base RID of new range start id {newrange.first_id} and \
+end id {newrange.last_id} found, please adjust manually", file=file)
+
+    print(f"{proposal.command}", file=file)
+
+# Function to get identities as lines in IDentity format, straight from the store columns without creating IDentities
+def identity_lines(identities: Outliers) -> Iterator[str]:
+    store = identities.store
+    for span in identities.spans:
+        for i in span:
+            rdn = store.rdn(i)
+            parent = store.parent_dns[store.parents[i]]
+            dn = f"{rdn},{parent}" if parent else rdn
+            attribute, name = split_rdn(rdn)
+            if attribute == 'uid':
+                yield f"user(username='{name}', uid={store.numbers[i]}, dn: {dn})\n"
+            else:
+                yield f"group(groupname='{name}', gid={store.numbers[i]}, dn: {dn})\n"
+
+# Function to print identities one per line, in chunks of lines written at once
+def render_identities(identities: Outliers, file: TextIO = None, chunk_size: int = 10000) -> None:
+    write_lines(identity_lines(identities), file, chunk_size)
+
+# Function to write lines in chunks of lines written at once
+def write_lines(lines: Iterable[str], file: TextIO = None, chunk_size: int = 10000) -> None:
+    file = file or sys.stdout
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            file.write("".join(chunk))
+            chunk = []
+    file.write("".join(chunk))
+
+# Function to print new IDs planned for outliers, the commands or LDIF go to plan_file instead if it is given
+def render_relocation(plan: RelocationPlan, ldif: bool = False, file: TextIO = None, plan_file: TextIO = None, plan_name: str = None) -> None:
+    print_header("Relocation of outliers", file)
+    if len(plan.covered) > 0:
+        print(f"\n{len(plan.covered)} outliers are in proposed ranges already, they don't have to be moved once the ranges are created.", file=file)
+    if not plan.relocations and len(plan.unplaced) == 0:
+        print("\nNo outliers to relocate.", file=file)
+        return
+
+    if plan.targets:
+        relocated = Counter(id(relocation.idrange) for relocation in plan.relocations)
+        print("\nFree IDs of ranges outliers are moved to:\n", file=file)
+        draw_table(["name", "first_id", "last_id", "free", "relocated"],
+                   [[idrange.name, idrange.first_id, idrange.last_id, free, relocated[id(idrange)]] for idrange, free in plan.targets], file)
+    if not plan.existing:
+        print("\nOnly proposed ranges are used, provide all users and groups with --classify to use free IDs of existing ipa-local ranges too.", file=file)
+
+    if plan.relocations:
+        identities = sum(len(relocation.entries) for relocation in plan.relocations)
+        what = "LDIF for ldapmodify" if ldif else "commands"
+        first = "Create the proposed ranges first, then move" if any(relocation.idrange.proposed for relocation in plan.relocations) else "Move"
+        print(f"\n{first} {identities} identities to {len(plan.relocations)} new IDs with following {what}"
+              " (user private groups follow their users, files owned by the old IDs have to be changed on the hosts too)", file=file, end="")
+        if plan_file is not None:
+            print(f", written to {plan_name}", file=file)
+            write_lines(relocation_lines(plan, ldif), plan_file)
+        else:
+            print(":\n", file=file)
+            write_lines(relocation_lines(plan, ldif), file)
+
+    if len(plan.unplaced) > 0:
+        print("\nWARNING! No free IDs are left for following identities, they have to be moved manually:\n", file=file)
+        render_identities(plan.unplaced, file)
+
+# Function to print results of a parameter sweep as a table or JSON
+def render_sweep(results: List[Dict[str, int]], ids_count: int, as_json: bool, file: TextIO = None) -> None:
+    if as_json:
+        print(json.dumps(results, indent=2), file=file)
+    else:
+        print_header(f"Parameter sweep for {ids_count} IDs out of ranges", file)
+        columns = ["rangegap", "minrange", "ranges", "outliers", "id_space"]
+        draw_table(columns, [[result[column] for column in columns] for result in results], file)
+
+# Function to print the whole report of an analysis, outliers go to outliers_file and relocation commands or LDIF
+# to relocation_file instead if they are given
+def render_report(analysis: Analysis, file: TextIO = None, outliers_file: TextIO = None, outliers_name: str = None,
+                  relocation_file: TextIO = None, relocation_name: str = None, ldif: bool = False) -> None:
+    # Draw the table with current ranges
+    print_header("Range table", file)
+    draw_ascii_table(analysis.ranges, file)
+
+    # Show if there are any overlaps
+    print_header("Range sanity check", file)
+    render_overlaps(analysis.overlaps, analysis.rid_overlaps, file)
+
+    # Show RID bases proposed for the ones missing
+    print_header("RID bases check", file)
+    if analysis.rid_proposals:
+        print("\nProposition for missing RID bases:", file=file)
+        render_rid_proposals(analysis.rid_proposals, file)
+    else:
+        print("\nAll RID bases are in order.", file=file)
+
+    # If all identities are provided, show how they fit into the ranges
+    if analysis.classification is not None:
+        print_header("ID classification", file)
+        print(f"\n{len(analysis.identities)} identities found, {len(analysis.outofrange)} of them out of ipa-local ranges:\n", file=file)
+        columns = ["name", "type", "first_id", "last_id", "users", "groups", "percent", "fill"]
+        draw_table(columns, [[row[column] for column in columns] for row in analysis.classification], file)
+
+    # Show entries listed twice and identities sharing a number, user private groups included, if there are any
+    collisions = analysis.collisions
+    if collisions is not None and (collisions.duplicates or collisions.collisions or collisions.upg):
+        print_header("ID collisions", file)
+        render_collisions(collisions, file)
+
+    # If outofrange identities provided, show what to do with them
+    if analysis.outofrange is not None:
+        print_header("IDranges for IDs out of ranges proposal", file)
+
+        # IDs under 1000 are excluded from range proposition unless allowed
+        if len(analysis.under1000) > 0:
+            print("\nFollowing identities have IDs lower 1000, which is not recommeneded (if you definitely need ranges proposed for those, use --allowunder1000):\n", file=file)
+            render_identities(analysis.under1000, file)
+
+        # Print the outliers, they have to be moved manually
+        if len(analysis.outliers) > 0:
+            hint = "try adjusting --outliercost and --rangecost" if analysis.options.strategy == "optimal" else "try adjusting --minrange"
+            if outliers_file is not None:
+                print(f"\n{analysis.outliers.count(analysis.collisions.upg)} identities are too far away from the others to get ranges ({hint}, or moving them to already created ranges), written to {outliers_name}", file=file)
+                render_identities(analysis.outliers, outliers_file)
+            else:
+                print(f"\nFollowing identities are too far away from the others to get ranges ({hint}, or moving them to already created ranges):\n", file=file)
+                render_identities(analysis.outliers, file)
+
+        if len(analysis.range_proposals) > 0:
+            for proposal in analysis.range_proposals:
+                render_range_proposal(proposal, file)
+        else:
+            print("\nNo IDs fit for ID range to propose! Try tuning the parameters!", file=file)
+
+        # Show where outliers can go, if asked for
+        if analysis.relocation is not None:
+            render_relocation(analysis.relocation, ldif, file, relocation_file, relocation_name)
+
+    # If data is not provided, provide searches how to provide
+    else:
+        print_header("LDAP searches to detect IDs out of ranges", file)
+        print("\nLDAP Search Commands for Users outside of ranges:", file=file)
+        print(analysis.ldapsearch_users, file=file)
+        print("\nLDAP Search Commands for Groups outside of ranges:", file=file)
+        print(analysis.ldapsearch_groups, file=file)
+        print("\nYou can provide the resulting file as --outofrange option to this tool to get advise on which ranges to create.", file=file)
+
+    # Draw the table with all the things we proposed
+    print_header("End result with proposed changes", file)
+    draw_ascii_table(analysis.result, file)
+
+# Function to print the delta between a baseline snapshot of ranges and the current one
+def render_diff(diff: RangeDiff, file: TextIO = None) -> None:
+    # Draw the table of ranges that changed, with values before and after
+    print_header("Range changes since baseline", file)
+    if diff.changes:
+        columns = ["change", "name", "type", "old_first_id", "old_size", "first_id", "size", "base_rid", "secondary_base_rid"]
+        rows = []
+        for change in diff.changes:
+            idrange = change.new or change.old
+            old = change.old if change.kind in ("resized", "moved") else None
+            rows.append([change.kind, idrange.name, idrange.type, old and old.first_id, old and old.size,
+                         idrange.first_id, idrange.size, idrange.base_rid, idrange.secondary_base_rid])
+        draw_table(columns, rows, file)
+    else:
+        print("\nNo ranges were added, removed or changed.", file=file)
+
+    # Show only the overlaps the baseline didn't have
+    print_header("New range overlaps", file)
+    render_overlaps(diff.overlaps, file=file)
+
+    print_header("RID bases check", file)
+    for change in diff.lost_rid_bases:
+        lost = [f"{name} {rid}" for name, rid, now in (("base RID", change.old.base_rid, change.new.base_rid),
+                ("secondary base RID", change.old.secondary_base_rid, change.new.secondary_base_rid)) if rid is not None and now is None]
+        print(f"\nWARNING! Range {change.new.name} lost its {' and '.join(lost)}!", file=file)
+    for conflict in diff.rid_conflicts:
+        print(rid_conflict_line(conflict), file=file)
+    if not diff.lost_rid_bases and not diff.rid_conflicts:
+        print("\nNo RID bases were lost and no new RID conflicts found.", file=file)
+
+    # IDs that were in ipa-local ranges before and are not anymore need new ranges, or have to be moved
+    print_header("Newly uncovered IDs", file)
+    for first_id, last_id in diff.uncovered:
+        print(f"\nIDs {first_id} - {last_id} are not covered by ipa-local ranges anymore", file=file)
+    if not diff.uncovered:
+        print("\nNo IDs lost their ipa-local range.", file=file)
+
+# Function to print the summary of realms analyzed in fleet mode, with a line of totals and errors under it
+def render_fleet(rows: List[Dict[str, Any]], output_dir: str, file: TextIO = None) -> None:
+    print_header("Fleet summary", file)
+    table = [[row[column] for column in FLEET_COLUMNS] for row in rows]
+    failed = [row for row in rows if row["status"] != "ok"]
+    totals = ["total", f"{len(rows) - len(failed)} ok"]
+    for column in FLEET_COLUMNS[2:]:
+        values = [row[column] for row in rows if row[column] is not None]
+        totals.append(round(sum(values), 3) if values else None)
+    draw_table(FLEET_COLUMNS, table + [totals], file)
+
+    for row in failed:
+        print(f"\nERROR: realm {row['realm']}: {row['error']}", file=file)
+    print(f"\nDetail reports of realms are in {output_dir}", file=file)
+
+# Function to describe what limits growth of a range
+def headroom_limit(plan: Headroom) -> str:
+    if plan.limit == "id_space":
+        return "end of ID space"
+    if plan.limit == "rid_space":
+        return "end of RID space"
+    if plan.limit == "id":
+        return f"range {plan.limited_by.name}"
+    return rid_span_name(plan.limited_by, True) if plan.limit == "rid" else rid_span_name(plan.limited_by, False)
+
+# Function to print how far ipa-local ranges can grow, and commands to grow them if asked for
+def render_headroom(plans: List[Headroom], grow: Optional[int] = None, file: TextIO = None) -> None:
+    print_header("Range headroom", file)
+    if not plans:
+        print("\nNo ipa-local ranges found!", file=file)
+        return
+    columns = ["name", "size", "max_size", "headroom", "limited_by"]
+    draw_table(columns, [[plan.idrange.name, plan.idrange.size, plan.max_size, plan.max_size - plan.idrange.size, headroom_limit(plan)]
+                         for plan in plans], file)
+    for plan in plans:
+        if plan.max_size < plan.idrange.size:
+            print(f"\nWARNING! Range {plan.idrange.name} overlaps with {headroom_limit(plan)} already!", file=file)
+
+    if grow is not None:
+        print_header(f"Growing ranges by {grow} IDs", file)
+        for plan in plans:
+            if plan.command is not None:
+                print(plan.command, file=file)
+            else:
+                print(f"Warning: {plan.idrange.name} can grow by {max(plan.max_size - plan.idrange.size, 0)} IDs only, up to {headroom_limit(plan)}", file=file)
+
+# Function to get a few hosts of a conflict to show, with the count of the others
+def sample_hosts(conflict: HostConflict, count: int = 3) -> str:
+    shown = ", ".join(conflict.hosts[:count])
+    return shown + (f" and {len(conflict.hosts) - count} more" if len(conflict.hosts) > count else "")
+
+# Function to print local accounts of hosts with numbers in IPA ranges, per range and per account
+def render_hostscan(scan: HostScan, file: TextIO = None) -> None:
+    print_header("Local accounts of hosts in IPA ranges", file)
+    print(f"\n{scan.hosts} hosts scanned with {scan.users} local users and {scan.groups} local groups.", file=file)
+    for host, error in scan.errors:
+        print(f"Warning: Failed to read local accounts of host {host}: {error}", file=file)
+    if not scan.conflicts:
+        print("\nNo local accounts of hosts are in IPA ranges.", file=file)
+        return
+
+    print(f"\n{len(scan.conflicts)} local accounts on {scan.conflicting_hosts} hosts have numbers in IPA ranges,"
+          " they collide with IPA users and groups that get these numbers:\n", file=file)
+    columns = ["name", "type", "first_id", "last_id", "users", "groups", "hosts"]
+    draw_table(columns, [[row[column] for column in columns] for row in scan.ranges], file)
+
+    print_header("Conflicting local accounts", file)
+    draw_table(["range", "account", "name", "number", "hosts", "host_names"],
+               [[", ".join(idrange.name for idrange in conflict.ranges), "user" if conflict.user else "group", conflict.name,
+                 conflict.number, len(conflict.hosts), sample_hosts(conflict)] for conflict in scan.conflicts], file)
+
+# Class for writing records one by one, records are buffered and written in chunks
+class RecordWriter(ABC):
+
+    def __init__(self, file: TextIO, chunk_size: int = 10000):
+        self.file       : TextIO = file
+        self.chunk_size : int = chunk_size
+        self.chunk      : List[Any] = []
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.chunk.append(self.format(record))
+        if len(self.chunk) >= self.chunk_size:
+            self.flush()
+
+    def write_all(self, records: Iterable[Dict[str, Any]]) -> None:
+        for record in records:
+            self.write(record)
+        self.flush()
+
+    @abstractmethod
+    def format(self, record: Dict[str, Any]) -> Any:
+        pass
+
+    @abstractmethod
+    def flush(self) -> None:
+        pass
+
+# Class for writing records as JSON lines
+class JsonLinesWriter(RecordWriter):
+
+    def __init__(self, file: TextIO, chunk_size: int = 10000):
+        super().__init__(file, chunk_size)
+        self.encoder : json.JSONEncoder = json.JSONEncoder(ensure_ascii=False)
+
+    def format(self, record: Dict[str, Any]) -> str:
+        return self.encoder.encode(record) + "\n"
+
+    def flush(self) -> None:
+        self.file.write("".join(self.chunk))
+        self.chunk = []
+
+# Class for writing records as CSV rows, every kind of record has its own columns. A header is written whenever
+# the kind changes, after an empty line unless it is the first one
+class CsvWriter(RecordWriter):
+
+    def __init__(self, file: TextIO, chunk_size: int = 10000):
+        super().__init__(file, chunk_size)
+        self.writer : Any = csv.writer(file, lineterminator="\n")
+        self.kind   : Optional[str] = None
+
+    def format(self, record: Dict[str, Any]) -> List[List[Any]]:
+        kind = record["record"]
+        columns = RECORD_COLUMNS[kind]
+        rows = []
+        if kind != self.kind:
+            if self.kind is not None:
+                rows.append([])
+            rows.append(["record"] + columns)
+            self.kind = kind
+        rows.append([kind] + [record.get(column) for column in columns])
+        return rows
+
+    def flush(self) -> None:
+        self.writer.writerows(row for rows in self.chunk for row in rows)
+        self.chunk = []
+
+# Function to create a record writer for a format
+def make_writer(format: str, file: TextIO) -> RecordWriter:
+    return CsvWriter(file) if format == "csv" else JsonLinesWriter(file)
+
+# Function to get a record of a range
+def range_record(idrange: IDRange, section: str) -> Dict[str, Any]:
+    record = {"record": "range", "section": section}
+    record.update(zip(RANGE_COLUMNS, attrgetter(*RANGE_COLUMNS)(idrange)))
+    return record
+
+# Function to get a record of two overlapping RID spans
+def rid_conflict_record(conflict: RidConflict) -> Dict[str, Any]:
+    return {"record": "rid_conflict", "name": conflict.idrange.name, "primary": conflict.primary,
+            "other": conflict.other.name, "other_primary": conflict.other_primary, "sid": conflict.sid}
+
+# Function to get records of identities, kind tells why they are listed (under1000 or outlier)
+def identity_records(identities: Outliers, kind: str) -> Iterator[Dict[str, Any]]:
+    store = identities.store
+    for span in identities.spans:
+        for i in span:
+            yield {"record": kind, "name": store.name(i), "user": store.is_user(i), "number": store.numbers[i], "dn": store.dn(i)}
+
+# Function to get records of new IDs planned for outliers, one per identity. Private groups following their users
+# have no command, outliers inside proposed ranges and the ones without free IDs are listed as covered and unplaced
+def relocation_records(plan: RelocationPlan) -> Iterator[Dict[str, Any]]:
+    store = plan.store
+    for idrange, free in plan.targets:
+        yield {"record": "relocation_target", "name": idrange.name, "first_id": idrange.first_id, "last_id": idrange.last_id, "size": free}
+    for relocation in plan.relocations:
+        for i, command in create_relocation_commands(store, relocation):
+            yield {"record": "relocation", "name": store.name(i), "user": store.is_user(i), "number": relocation.number,
+                   "new_number": relocation.new_number, "dn": store.dn(i), "other": relocation.idrange.name, "command": shell_command(command)}
+    yield from identity_records(plan.covered, "covered")
+    yield from identity_records(plan.unplaced, "unplaced")
+
+# Function to get all the results of an analysis as records, in the same order as the report shows them,
+# identities are produced one by one while they are written
+def report_records(analysis: Analysis, with_outliers: bool = True) -> Iterator[Dict[str, Any]]:
+    for idrange in analysis.ranges:
+        yield range_record(idrange, "current")
+
+    for overlap in analysis.overlaps:
+        yield {"record": "overlap", "name": overlap.idrange.name, "other": None if overlap.other is None else overlap.other.name}
+
+    for conflict in analysis.rid_overlaps:
+        yield rid_conflict_record(conflict)
+
+    for proposal in analysis.rid_proposals:
+        yield {"record": "rid_proposal", "name": proposal.idrange.name, "base_rid": proposal.base_rid,
+               "secondary_base_rid": proposal.secondary_base_rid, "missing": proposal.missing,
+               "command": RIDBASE_LDAPMODIFY if proposal.ldif is not None else None, "ldif": proposal.ldif}
+
+    for row in analysis.classification or []:
+        yield dict(row, record="classification")
+
+    if analysis.collisions is not None:
+        if analysis.collisions.duplicates:
+            yield {"record": "duplicates", "identities": analysis.collisions.duplicates}
+        for collision in analysis.collisions.collisions:
+            for dn in collision.dns:
+                yield {"record": "collision", "type": collision.kind, "number": collision.number, "dn": dn}
+
+    if analysis.outofrange is not None:
+        yield from identity_records(analysis.under1000, "under1000")
+        if with_outliers:
+            yield from identity_records(analysis.outliers, "outlier")
+        for proposal in analysis.range_proposals:
+            newrange = proposal.idrange
+            record = {"record": "range_proposal", "start_id": proposal.start_id, "end_id": proposal.end_id, "command": shell_command(proposal.command)}
+            if newrange is not None:
+                record.update(name=newrange.name, first_id=newrange.first_id, last_id=newrange.last_id, size=newrange.size,
+                              base_rid=newrange.base_rid, secondary_base_rid=newrange.secondary_base_rid)
+            yield record
+        if analysis.relocation is not None:
+            yield from relocation_records(analysis.relocation)
+    else:
+        for search in analysis.ldapsearches:
+            yield {"record": "ldapsearch", "type": search.kind, "base": search.base, "filter": search.filter, "command": search.command}
+
+    for idrange in analysis.result:
+        yield range_record(idrange, "result")
+
+# Function to write the results of an analysis as JSON lines or CSV, outliers go to outliers_file instead if it is given,
+# relocation commands or LDIF are written to relocation_file as well if it is given
+def write_report(analysis: Analysis, format: str, file: TextIO = None, outliers_file: TextIO = None,
+                 relocation_file: TextIO = None, ldif: bool = False) -> None:
+    make_writer(format, file or sys.stdout).write_all(report_records(analysis, outliers_file is None))
+    if outliers_file is not None and analysis.outliers is not None:
+        make_writer(format, outliers_file).write_all(identity_records(analysis.outliers, "outlier"))
+    if relocation_file is not None and analysis.relocation is not None:
+        write_lines(relocation_lines(analysis.relocation, ldif), relocation_file)
+
+# Function to write results of a parameter sweep as JSON lines or CSV
+def write_sweep(results: List[Dict[str, int]], format: str, file: TextIO = None) -> None:
+    make_writer(format, file or sys.stdout).write_all(dict(result, record="sweep") for result in results)
+
+# Function to get the delta between two snapshots of ranges as records
+def diff_records(diff: RangeDiff) -> Iterator[Dict[str, Any]]:
+    for change in diff.changes:
+        idrange = change.new or change.old
+        record = range_record(idrange, change.kind)
+        if change.kind in ("resized", "moved"):
+            record.update(old_first_id=change.old.first_id, old_size=change.old.size)
+        yield record
+
+    for overlap in diff.overlaps:
+        yield {"record": "overlap", "name": overlap.idrange.name, "other": None if overlap.other is None else overlap.other.name}
+
+    for change in diff.lost_rid_bases:
+        yield {"record": "lost_rid_base", "name": change.new.name,
+               "base_rid": change.old.base_rid if change.new.base_rid is None else None,
+               "secondary_base_rid": change.old.secondary_base_rid if change.new.secondary_base_rid is None else None}
+
+    for conflict in diff.rid_conflicts:
+        yield rid_conflict_record(conflict)
+
+    for first_id, last_id in diff.uncovered:
+        yield {"record": "uncovered", "first_id": first_id, "last_id": last_id}
+
+# Function to write the delta between two snapshots of ranges as JSON lines or CSV
+def write_diff(diff: RangeDiff, format: str, file: TextIO = None) -> None:
+    make_writer(format, file or sys.stdout).write_all(diff_records(diff))
+
+# Function to write the summary of realms analyzed in fleet mode as JSON lines or CSV
+def write_fleet(rows: List[Dict[str, Any]], format: str, file: TextIO = None) -> None:
+    make_writer(format, file or sys.stdout).write_all(dict(row, record="realm") for row in rows)
+
+# Function to write how far ipa-local ranges can grow as JSON lines or CSV
+def write_headroom(plans: List[Headroom], format: str, file: TextIO = None) -> None:
+    make_writer(format, file or sys.stdout).write_all(
+        {"record": "headroom", "name": plan.idrange.name, "size": plan.idrange.size, "max_size": plan.max_size,
+         "limit": plan.limit, "other": None if plan.limited_by is None else plan.limited_by.name, "command": shell_command(plan.command)}
+        for plan in plans)
+
+# Function to get local accounts of hosts with numbers in IPA ranges as records: a summary, ranges hit,
+# conflicting accounts with all their hosts and hosts that failed
+def hostscan_records(scan: HostScan) -> Iterator[Dict[str, Any]]:
+    yield {"record": "host_scan", "hosts": scan.hosts, "users": scan.users, "groups": scan.groups}
+    for row in scan.ranges:
+        yield dict(row, record="host_range")
+    for conflict in scan.conflicts:
+        yield {"record": "host_conflict", "name": conflict.name, "user": conflict.user, "number": conflict.number,
+               "other": " ".join(idrange.name for idrange in conflict.ranges), "hosts": len(conflict.hosts), "host_names": " ".join(conflict.hosts)}
+    for host, error in scan.errors:
+        yield {"record": "host_error", "name": host, "error": error}
+
+# Function to write local accounts of hosts with numbers in IPA ranges as JSON lines or CSV
+def write_hostscan(scan: HostScan, format: str, file: TextIO = None) -> None:
+    make_writer(format, file or sys.stdout).write_all(hostscan_records(scan))
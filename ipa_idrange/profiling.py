@@ -0,0 +1,81 @@
+"""
+Working with profiling
+"""
+import sys
+import json
+import time
+import cProfile
+import pstats
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, peak memory is then not reported
+    resource = None
+
+from .output import draw_table
+
+# Class for measuring time, memory and throughput of the phases of a run
+class Profiler:
+
+    def __init__(self):
+        self.phases  : List[Dict[str, Any]] = []
+        self.started : float = time.perf_counter()
+        self.cpu     : float = time.process_time()
+
+    # Function to measure a phase, the caller can put number of processed items into the yielded record
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, Any]]:
+        record = {"phase": name, "items": None}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall"] = time.perf_counter() - wall
+            record["cpu"] = time.process_time() - cpu
+            record["peak_rss_mb"] = peak_rss_mb()
+            record["items_per_second"] = record["items"] / record["wall"] if record["items"] and record["wall"] > 0 else None
+            self.phases.append(record)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phases": self.phases,
+            "wall": time.perf_counter() - self.started,
+            "cpu": time.process_time() - self.cpu,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+# Function to get peak resident memory of the process so far, in MB
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+# Function to write the profiler report to stderr as a table, or as JSON to a file or stderr
+def write_profile_report(profiler: Profiler, as_json: bool, file_path: str = None) -> None:
+    report = profiler.report()
+    if as_json:
+        if file_path:
+            with open(file_path, 'w') as file:
+                json.dump(report, file, indent=2)
+        else:
+            print(json.dumps(report, indent=2), file=sys.stderr)
+        return
+
+    columns = ["phase", "wall_s", "cpu_s", "peak_rss_mb", "items", "items_per_s"]
+    rows = [[record["phase"], f"{record['wall']:.4f}", f"{record['cpu']:.4f}", record["peak_rss_mb"], record["items"],
+             None if record["items_per_second"] is None else int(record["items_per_second"])] for record in report["phases"]]
+    rows.append(["total", f"{report['wall']:.4f}", f"{report['cpu']:.4f}", report["peak_rss_mb"], None, None])
+    print("", file=sys.stderr)
+    draw_table(columns, rows, sys.stderr)
+
+# Function to print the hottest functions from cProfile to stderr, and dump all the stats to a file if asked to
+def write_cprofile_report(cprofiler: cProfile.Profile, file_path: str = None) -> None:
+    if file_path:
+        cprofiler.dump_stats(file_path)
+    stats = pstats.Stats(cprofiler, stream=sys.stderr)
+    stats.sort_stats("cumulative").print_stats(30)
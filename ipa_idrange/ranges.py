@@ -0,0 +1,153 @@
+"""
+Working with ranges
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import IDRange, IdentityStore, IntervalIndex, LdapSearch, Overlap
+
+# Function to get ID intervals not covered by any ipa-local range, adjacent and overlapping ranges leave no gaps
+def find_id_gaps(id_ranges: List[IDRange], max_id: int = 2147483647) -> List[Tuple[int, int]]:
+    local_index = build_range_index(get_ipa_local_ranges(id_ranges))
+    gaps = []
+    next_id = 1
+
+    for first_id, last_id in zip(local_index.starts, local_index.ends):
+        if first_id > max_id:
+            break
+        if first_id > next_id:
+            gaps.append((next_id, first_id - 1))
+        next_id = max(next_id, last_id + 1)
+
+    if next_id <= max_id:
+        gaps.append((next_id, max_id))
+
+    return gaps
+
+# Function to generate LDAPseach commands, gaps are split into several searches if there are more than max_clauses of them
+def generate_ldapsearch_commands(id_ranges_all: List[IDRange], object_class: str, id: str, cn:str, max_clauses: int = 50, page_size: int = 0) -> str:
+    return format_ldapsearch_commands(create_ldapsearches(id_ranges_all, object_class, id, cn, max_clauses, page_size))
+
+# Function to get searches as they are shown in the report
+def format_ldapsearch_commands(searches: List[LdapSearch]) -> str:
+    if len(searches)==0:
+        return ("No ipa-local ranges found!")
+
+    return "\n".join(f"# {search.command}" for search in searches)
+
+# Function to create the searches of generate_ldapsearch_commands one by one, none without ipa-local ranges
+def create_ldapsearches(id_ranges_all: List[IDRange], object_class: str, id: str, cn:str, max_clauses: int = 50, page_size: int = 0) -> List[LdapSearch]:
+
+    # we need to look only for ipa-local ranges
+    id_ranges = get_ipa_local_ranges(id_ranges_all)
+    if len(id_ranges)==0:
+        return []
+
+    # creating command prefix
+    base = f"cn={cn},cn=accounts,{id_ranges[0].suffix}"
+    paging = f" -E pr={page_size}/noprompt" if page_size > 0 else ""
+    prefix = f"ldapsearch -xLLL{paging} -D \"cn=Directory Manager\" -W -b \"{base}\" \""
+
+    # every command gets its own slice of the gaps, so the server never gets a huge filter
+    searches = []
+    for search_filter in build_outofrange_filters(id_ranges, object_class, id, max_clauses):
+        # adding command suffix
+        searches.append(LdapSearch(cn, base, search_filter, prefix + search_filter + f"\" dn {id}Number >> outofranges.ldif"))
+
+    return searches
+
+# Function to build LDAP filters for identities in the gaps between ipa-local ranges,
+# every filter gets at most max_clauses of the gaps
+def build_outofrange_filters(id_ranges: List[IDRange], object_class: str, id: str, max_clauses: int = 50) -> List[str]:
+    # adding gaps in ranges to the filter, a gap of a single ID needs just one condition
+    clauses = []
+    for first_id, last_id in find_id_gaps(id_ranges):
+        if first_id == last_id:
+            clauses.append(f"({id}Number={first_id})")
+        else:
+            clauses.append(f"(&({id}Number>={first_id})({id}Number<={last_id}))")
+
+    filters = []
+    for i in range(0, len(clauses), max(max_clauses, 1)):
+        filters.append(f"(&(objectClass=posix{object_class})(|" + "".join(clauses[i:i + max(max_clauses, 1)]) + "))")
+    return filters
+
+# Function to build an interval index over ID space of the ranges
+def build_range_index(id_ranges: List[IDRange]) -> IntervalIndex:
+    range_index = IntervalIndex()
+    for idrange in id_ranges:
+        range_index.insert(idrange.first_id, idrange.last_id, idrange)
+    return range_index
+
+# Function to detect ID range overlaps, expecting ranges sorted by first_id
+def detect_range_overlaps(id_ranges: List[IDRange]) -> List[Overlap]:
+    position = {id(idrange): i for i, idrange in enumerate(id_ranges)}
+
+    # system range goes to the index as None, so it always sorts first
+    range_index = build_range_index(id_ranges)
+    range_index.insert(0, 1000, None)
+
+    # report every overlapping pair, not only neighbours, in the order of the later range
+    def pair_order(pair: Tuple[Optional[IDRange], IDRange]) -> Tuple[int, int]:
+        earlier, later = pair
+        return position[id(later)], -1 if earlier is None else position[id(earlier)]
+
+    pairs = []
+    for first, second in range_index.overlapping_pairs():
+        if first is not None and (second is None or position[id(second)] < position[id(first)]):
+            first, second = second, first
+        pairs.append((first, second))
+    pairs.sort(key=pair_order)
+
+    return [Overlap(later, earlier) for earlier, later in pairs]
+
+# Function to check if proposed range overlaps with existing ones
+def newrange_overlap_check(range_index: IntervalIndex, newrange: IDRange) -> bool:
+    return not range_index.overlaps(newrange.first_id, newrange.last_id)
+
+# Function to get ipa-local ranges only
+def get_ipa_local_ranges(id_ranges: List[IDRange]) -> List[IDRange]:
+    ipa_local_ranges = []
+
+    for range in id_ranges:
+        if range.type == "ipa-local":
+            ipa_local_ranges.append(range)
+
+    return ipa_local_ranges
+
+# Function to count sorted identities in every range, and to find index ranges of identities out of all ipa-local ranges
+def classify_identities(store: IdentityStore, id_ranges: List[IDRange]) -> Tuple[List[Dict[str, Any]], List[range]]:
+    numbers = store.numbers
+    total = len(numbers)
+    # users_before[i] is the number of users among the first i identities
+    users_before = array('q', [0]) + array('q', accumulate(store.users))
+
+    # every range costs two binary searches, identities are never looped over in Python
+    classification = []
+    for idrange in id_ranges:
+        lo, hi = bisect_left(numbers, idrange.first_id), bisect_right(numbers, idrange.last_id)
+        users = users_before[hi] - users_before[lo]
+        groups = hi - lo - users
+        classification.append({
+            "name": idrange.name,
+            "type": idrange.type,
+            "first_id": idrange.first_id,
+            "last_id": idrange.last_id,
+            "users": users,
+            "groups": groups,
+            "percent": round(100 * (hi - lo) / total, 4) if total else 0.0,
+            # users and groups have separate ID spaces, so the fuller one counts
+            "fill": round(100 * max(users, groups) / idrange.size, 4),
+        })
+
+    # identities out of ranges are the ones between merged ipa-local ranges
+    local_index = build_range_index(get_ipa_local_ranges(id_ranges))
+    bounds = [0]
+    for first_id, last_id in zip(local_index.starts, local_index.ends):
+        bounds.extend((bisect_left(numbers, first_id), bisect_right(numbers, last_id)))
+    bounds.append(total)
+    outofrange = [range(lo, hi) for lo, hi in zip(bounds[::2], bounds[1::2]) if lo < hi]
+
+    return classification, outofrange
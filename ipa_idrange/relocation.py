@@ -0,0 +1,170 @@
+"""
+Planning new IDs for outliers in free IDs of ipa-local ranges, so they don't have to be moved by hand
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .models import Analysis, IDRange, IdentityStore, Outliers, Relocation, RelocationPlan
+from .ranges import get_ipa_local_ranges
+
+# Class for free IDs of a part of a range as sorted closed intervals. IDs are taken from either end,
+# the one nearer to the identity moved, so every take is O(1)
+class FreeIds:
+
+    def __init__(self, idrange: IDRange, first_id: int, last_id: int, numbers: array):
+        self.idrange  : IDRange = idrange
+        self.first_id : int = first_id
+        self.last_id  : int = last_id
+        self.starts   : List[int] = []
+        self.ends     : List[int] = []
+
+        # free intervals are the gaps between sorted numbers of the identities known in the range
+        next_id = first_id
+        for number in numbers[bisect_left(numbers, first_id):bisect_right(numbers, last_id)]:
+            if number > next_id:
+                self.starts.append(next_id)
+                self.ends.append(number - 1)
+            next_id = number + 1
+        if next_id <= last_id:
+            self.starts.append(next_id)
+            self.ends.append(last_id)
+
+        # intervals lo..hi-1 are left
+        self.lo   : int = 0
+        self.hi   : int = len(self.starts)
+        self.free : int = sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+    def take_lowest(self) -> int:
+        number = self.starts[self.lo]
+        if number == self.ends[self.lo]:
+            self.lo += 1
+        else:
+            self.starts[self.lo] += 1
+        self.free -= 1
+        return number
+
+    def take_highest(self) -> int:
+        number = self.ends[self.hi - 1]
+        if number == self.starts[self.hi - 1]:
+            self.hi -= 1
+        else:
+            self.ends[self.hi - 1] -= 1
+        self.free -= 1
+        return number
+
+# Function to get free IDs of ranges outliers can be moved to, sorted by first ID. Overlapping ranges share their IDs,
+# so every ID goes to the first range only, and IDs lower 1000 are left out unless allowed
+def relocation_targets(analysis: Analysis) -> List[FreeIds]:
+    targets = [proposal.idrange for proposal in analysis.range_proposals if proposal.idrange is not None]
+    if analysis.classification is not None:
+        targets.extend(get_ipa_local_ranges(analysis.ranges))
+
+    numbers = analysis.identities.numbers
+    next_id = 1 if analysis.options.allowunder1000 else 1000
+    pools = []
+    for idrange in sorted(targets, key=lambda x: x.first_id):
+        first_id = max(idrange.first_id, next_id)
+        if first_id <= idrange.last_id:
+            pools.append(FreeIds(idrange, first_id, idrange.last_id, numbers))
+        next_id = max(next_id, idrange.last_id + 1)
+    return pools
+
+# Function to get numbers of outliers with index ranges of the identities having them
+def outlier_numbers(outliers: Outliers) -> Iterator[Tuple[int, range]]:
+    numbers = outliers.store.numbers
+    for span in outliers.spans:
+        start = span.start
+        while start < span.stop:
+            end = bisect_right(numbers, numbers[start], start, span.stop)
+            yield numbers[start], range(start, end)
+            start = end
+
+# Function to plan a free ID for every number of outliers, in the nearest range with free IDs left, at its end
+# nearer to the number. Ranges with free IDs are kept sorted and found by binary search, ranges that run out
+# are dropped, so a plan for n outliers takes O(n log r) besides building free IDs of r ranges
+def plan_relocation(analysis: Analysis) -> RelocationPlan:
+    store = analysis.outofrange
+    pools = relocation_targets(analysis)
+    plan = RelocationPlan(store, [(pool.idrange, pool.free) for pool in pools], analysis.classification is not None)
+
+    pool_starts = [pool.first_id for pool in pools]
+    available = [pool for pool in pools if pool.free > 0]
+    available_starts = [pool.first_id for pool in available]
+    covered, unplaced = [], []
+
+    for number, entries in outlier_numbers(analysis.outliers):
+        # an outlier in a range proposed for others gets covered once the range is created
+        k = bisect_right(pool_starts, number) - 1
+        if k >= 0 and number <= pools[k].last_id:
+            covered.append(entries)
+            continue
+
+        # pools are disjoint, so the nearest ones are right below and right above the number
+        k = bisect_left(available_starts, number)
+        below = number - available[k - 1].last_id if k > 0 else None
+        above = available_starts[k] - number if k < len(available) else None
+        if below is None and above is None:
+            unplaced.append(entries)
+            continue
+        if above is None or (below is not None and below <= above):
+            k -= 1
+            new_number = available[k].take_highest()
+        else:
+            new_number = available[k].take_lowest()
+
+        plan.relocations.append(Relocation(number, new_number, available[k].idrange, entries))
+        if available[k].free == 0:
+            del available[k]
+            del available_starts[k]
+
+    plan.covered = Outliers(store, covered)
+    plan.unplaced = Outliers(store, unplaced)
+    return plan
+
+# Function to get lowercased names of users that have their user private group among identities sharing a number
+def private_group_users(store: IdentityStore, entries: range) -> Set[str]:
+    users = {store.name(i).lower() for i in entries if store.is_user(i)}
+    return {name for name in (store.name(i).lower() for i in entries if not store.is_user(i)) if name in users}
+
+# Function to get an ipa command moving every identity of a relocation, users with private groups get their gidNumber
+# changed too, and their private groups get None as they follow uidNumber of their users on their own as managed entries
+def create_relocation_commands(store: IdentityStore, relocation: Relocation) -> Iterator[Tuple[int, Optional[str]]]:
+    private = private_group_users(store, relocation.entries)
+    for i in relocation.entries:
+        name = store.name(i)
+        if store.is_user(i):
+            gidnumber = f" --gidnumber={relocation.new_number}" if name.lower() in private else ""
+            yield i, f"# ipa user-mod {name} --uid={relocation.new_number}{gidnumber}"
+        elif name.lower() in private:
+            yield i, None
+        else:
+            yield i, f"# ipa group-mod {name} --gid={relocation.new_number}"
+
+# Function to get LDIF modify records moving identities of a relocation, private groups are left out the same way
+def create_relocation_ldif(store: IdentityStore, relocation: Relocation) -> List[str]:
+    private = private_group_users(store, relocation.entries)
+    records = []
+    for i in relocation.entries:
+        name = store.name(i).lower()
+        if store.is_user(i):
+            changes = [f"replace: uidNumber\nuidNumber: {relocation.new_number}\n-\n"]
+            if name in private:
+                changes.append(f"replace: gidNumber\ngidNumber: {relocation.new_number}\n-\n")
+        elif name not in private:
+            changes = [f"replace: gidNumber\ngidNumber: {relocation.new_number}\n-\n"]
+        else:
+            continue
+        records.append(f"dn: {store.dn(i)}\nchangetype: modify\n" + "".join(changes))
+    return records
+
+# Function to get lines of the whole plan, as ipa commands or as LDIF for ldapmodify
+def relocation_lines(plan: RelocationPlan, ldif: bool = False) -> Iterator[str]:
+    for relocation in plan.relocations:
+        if ldif:
+            for record in create_relocation_ldif(plan.store, relocation):
+                yield record + "\n"
+        else:
+            for _, command in create_relocation_commands(plan.store, relocation):
+                if command is not None:
+                    yield command + "\n"
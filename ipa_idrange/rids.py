@@ -0,0 +1,113 @@
+"""
+Working with RID bases
+"""
+from typing import Dict, List, Optional
+
+from .models import IDRange, IntervalIndex, RidAllocator, RidConflict, RidProposal
+from .ranges import get_ipa_local_ranges
+
+# ldapmodify to apply LDIF of RID bases proposals with
+RIDBASE_LDAPMODIFY = 'ldapmodify -D "cn=Directory Manager" -W -x'
+
+# Function to build RID allocator with RID spans of ipa-local ranges already taken
+def build_rid_allocator(id_ranges: List[IDRange], delta: int, policy: str = "after-highest") -> RidAllocator:
+    rid_allocator = RidAllocator(delta, policy)
+    for idrange in get_ipa_local_ranges(id_ranges):
+        if idrange.base_rid is not None:
+            rid_allocator.reserve(idrange.base_rid, idrange.size, True)
+        if idrange.secondary_base_rid is not None:
+            rid_allocator.reserve(idrange.secondary_base_rid, idrange.size, False)
+    return rid_allocator
+
+# Function to detect overlapping RID spans within every domain: ipa-local ranges share the RID space of IPA domain
+# (base and secondary base RID spans alike), AD trust ranges the one of their trusted domain. Ranges are grouped
+# by domain SID in a dict and every group is swept once, so a forest with many trusts is checked in O(n log n)
+def detect_rid_overlaps(id_ranges: List[IDRange]) -> List[RidConflict]:
+    domains: Dict[Optional[str], IntervalIndex] = {}
+    for idrange in id_ranges:
+        if idrange.type == "ipa-local":
+            spans = [(idrange.base_rid, True), (idrange.secondary_base_rid, False)]
+            sid = None
+        elif idrange.type == "ipa-ad-trust" and idrange.sid is not None:
+            spans = [(idrange.base_rid, True)]
+            sid = idrange.sid
+        else:
+            continue
+        for base_rid, primary in spans:
+            if base_rid is not None:
+                domains.setdefault(sid, IntervalIndex()).insert(base_rid, base_rid + idrange.size - 1, (idrange, primary))
+
+    conflicts = []
+    for sid, rid_index in domains.items():
+        for (idrange, primary), (other, other_primary) in rid_index.overlapping_pairs():
+            conflicts.append(RidConflict(idrange, primary, other, other_primary, sid))
+    return conflicts
+
+# Function to propose RID bases for ipa-local ranges missing them, ranges get the proposed values
+def propose_rid_ranges(id_ranges: List[IDRange], rid_allocator: RidAllocator) -> List[RidProposal]:
+    ipa_local_ranges = get_ipa_local_ranges(id_ranges)
+    proposals = []
+
+    for range in ipa_local_ranges:
+        if range.base_rid is not None and range.secondary_base_rid is not None:
+            continue
+        proposal = RidProposal(range)
+        proposals.append(proposal)
+
+        # Calculate proposed base RID and secondary base RID
+        if range.base_rid is None:
+            proposal.base_rid = rid_allocator.allocate(range.size, True)
+            if proposal.base_rid is not None:
+                range.base_rid = proposal.base_rid
+                range.last_base_rid = proposal.base_rid + range.size
+            else:
+                # if there is no room for it, we note it and abandon the idea
+                proposal.missing = "base"
+                continue
+
+        if range.secondary_base_rid is None:
+            proposal.secondary_base_rid = rid_allocator.allocate(range.size, False)
+            if proposal.secondary_base_rid is not None:
+                range.secondary_base_rid = proposal.secondary_base_rid
+                range.last_secondary_rid = proposal.secondary_base_rid + range.size
+            else:
+                # if there is no room for it, we note it and abandon the idea
+                proposal.missing = "secondary"
+                continue
+
+        # Genertate an LDAP command if we changed something successfully
+        proposal.command = create_ridbase_command(range)
+        proposal.ldif = create_ridbase_ldif(range)
+
+    return proposals
+
+# Function to create ldapmodify command for RID bases
+def create_ridbase_command(idrange: IDRange) -> str:
+    command = f"\n{idrange.name}: proposed values: Base RID = {idrange.base_rid}, Secondary Base RID = {idrange.secondary_base_rid}.\n"
+    command += "\nLDAP command to apply would look like: "
+    command += f"\n~~~\
+\n# {RIDBASE_LDAPMODIFY} << EOF\
+\n{create_ridbase_ldif(idrange)}\
+\nEOF\
+\n~~~"
+    return command
+
+# Function to create LDIF setting RID bases of a range, for ldapmodify
+def create_ridbase_ldif(idrange: IDRange) -> str:
+    return f"{idrange.dn}\
+\nchangetype: modify\
+\nadd: ipabaserid\
+\nipabaserid: {idrange.base_rid}\
+\n-\
+\nadd: ipasecondarybaserid\
+\nipasecondarybaserid: {idrange.secondary_base_rid}"
+
+# Function to check if there is any of the RID bases not set
+def check_rid_bases(id_ranges: List[IDRange]) -> bool:
+    ipa_local_ranges = get_ipa_local_ranges(id_ranges)
+
+    for range in ipa_local_ranges:
+        if range.base_rid is None or range.secondary_base_rid is None:
+            return True
+        
+    return False
@@ -0,0 +1,313 @@
+"""
+Long-running service answering queries about ranges over a Unix socket or localhost HTTP, ranges are parsed once
+"""
+import os
+import sys
+import json
+import time
+import socket
+import threading
+import ipaddress
+import socketserver
+from array import array
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from .models import AnalysisOptions, IDRange
+from .ranges import build_range_index, get_ipa_local_ranges
+from .rids import build_rid_allocator
+from .identities import separate_under1000
+from .inputs import parse_idrange_input, read_input_from_file
+from .analysis import analyze, partition_identities, propose_ranges
+from .output import shell_command
+
+QUERY_OPS = ("covers", "is_local", "propose", "stats")
+MAX_REQUEST_SIZE = 16 * 1024 * 1024   # bytes of a request, larger ones are refused before being read whole
+
+# Function to get what tells one version of a file from another
+def file_signature(file_path: str) -> Tuple[int, int, int]:
+    stat = os.stat(file_path)
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+# Class for ranges loaded from a file with everything queries need built once. A state is never changed after
+# it is built, a reload builds a new one and swaps it in, so a query always sees one version of the ranges
+class RangeState:
+
+    def __init__(self, id_ranges: List[IDRange], options: AnalysisOptions, signature: Tuple[int, int, int]):
+        # missing RID bases are proposed first, the same as in the report, so proposed ranges don't take their RIDs
+        analysis = analyze(id_ranges, None, options)
+        self.signature     : Tuple[int, int, int] = signature
+        self.ranges        : List[IDRange] = analysis.result
+        self.range_index   = build_range_index(self.ranges)
+        self.local_index   = build_range_index(get_ipa_local_ranges(self.ranges))
+        self.rid_allocator = build_rid_allocator(self.ranges, options.ridoffset, options.ridpolicy)
+        self.loaded        : float = time.time()
+
+# Function to parse a ranges file into a state, the signature is taken first so a change during the read is seen later
+def load_state(file_path: str, options: AnalysisOptions) -> RangeState:
+    signature = file_signature(file_path)
+    id_ranges = parse_idrange_input(read_input_from_file(file_path))
+    if len(id_ranges) < 1:
+        raise ValueError(f"no valid ranges in {file_path}")
+    return RangeState(id_ranges, options, signature)
+
+# Function to describe a range in query results
+def range_result(idrange: IDRange) -> Dict[str, Any]:
+    return {"name": idrange.name, "type": idrange.type, "first_id": idrange.first_id, "last_id": idrange.last_id}
+
+# Function to get an ID of a query, ValueError if it has none
+def query_id(query: Dict[str, Any]) -> int:
+    value = query.get("id")
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("'id' has to be an integer")
+    return value
+
+# Class for the service: current state of the ranges, queries on it and counters of requests served
+class RangeService:
+
+    def __init__(self, source: str, options: AnalysisOptions):
+        self.source       : str = source
+        self.options      : AnalysisOptions = options
+        self.state        : RangeState = load_state(source, options)
+        self.started      : float = time.monotonic()
+        self.lock         = threading.Lock()
+        self.requests     : int = 0
+        self.reloads      : int = 0
+        self.reload_errors : int = 0
+        self.failed       : Optional[Tuple[int, int, int]] = None   # signature of the source that failed to load last
+        # op -> [queries, errors, total nanoseconds, slowest nanoseconds]
+        self.counters     : Dict[str, List[int]] = {op: [0, 0, 0, 0] for op in QUERY_OPS}
+
+    # Function to load the source again if it changed, a source that can't be loaded leaves the current state in place
+    def reload_if_changed(self) -> bool:
+        try:
+            signature = file_signature(self.source)
+        except OSError:
+            # a missing file gets reported once, until it shows up again
+            signature = (0, 0, 0)
+        if signature == self.state.signature or signature == self.failed:
+            return False
+        try:
+            state = load_state(self.source, self.options)
+        except Exception as e:
+            # the same broken file is not tried again, a file being written gets a new signature when it is done
+            self.failed = signature
+            with self.lock:
+                self.reload_errors += 1
+            print(f"Warning: Failed to reload '{self.source}', keeping {len(self.state.ranges)} ranges loaded before: {e}", file=sys.stderr)
+            return False
+        self.state = state
+        with self.lock:
+            self.reloads += 1
+        print(f"Reloaded {len(state.ranges)} ranges from '{self.source}'", file=sys.stderr)
+        return True
+
+    # Function to check the source for changes every interval seconds until stopped
+    def watch(self, stop: threading.Event, interval: float) -> None:
+        while not stop.wait(interval):
+            self.reload_if_changed()
+
+    # Function to answer a request, a single query or a list of them answered in the same order
+    def handle(self, request: Any) -> Any:
+        with self.lock:
+            self.requests += 1
+        if isinstance(request, list):
+            return [self.query(query) for query in request]
+        return self.query(request)
+
+    def query(self, query: Any) -> Dict[str, Any]:
+        started = time.perf_counter_ns()
+        op = query.get("op") if isinstance(query, dict) else None
+        if op not in QUERY_OPS:
+            return {"error": f"'op' has to be one of {', '.join(QUERY_OPS)}"}
+
+        # one state is used for the whole query, even if a reload swaps it meanwhile
+        state = self.state
+        try:
+            if op == "covers":
+                number = query_id(query)
+                result = {"id": number, "ranges": [range_result(idrange) for idrange in sorted(state.range_index.find(number, number), key=lambda x: x.first_id)]}
+            elif op == "is_local":
+                number = query_id(query)
+                local = state.local_index.find(number, number)
+                result = {"id": number, "local": bool(local), "range": local[0].name if local else None}
+            elif op == "propose":
+                result = self.propose(state, query.get("ids"))
+            else:
+                result = self.stats()
+        except (ValueError, OverflowError) as e:
+            result = {"error": str(e)}
+
+        elapsed = time.perf_counter_ns() - started
+        with self.lock:
+            counter = self.counters[op]
+            counter[0] += 1
+            counter[1] += "error" in result
+            counter[2] += elapsed
+            counter[3] = max(counter[3], elapsed)
+        return result
+
+    # Function to propose ranges for a batch of IDs, the same way the report does for IDs out of ranges.
+    # Proposals of one query are not kept, every query starts from the loaded ranges
+    def propose(self, state: RangeState, ids: Any) -> Dict[str, Any]:
+        if not isinstance(ids, list) or not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+            raise ValueError("'ids' has to be a list of integers")
+        numbers = array('q', sorted(value for value in set(ids) if not state.local_index.overlaps(value, value)))
+        start = 0 if self.options.allowunder1000 else separate_under1000(numbers)
+        outliers, groups = partition_identities(numbers, state.range_index, self.options, start)
+        proposals = propose_ranges(numbers, groups, list(state.ranges), state.range_index.copy(), state.rid_allocator.copy(), self.options)
+
+        ranges = []
+        for proposal in proposals:
+            record: Dict[str, Any] = {"start_id": proposal.start_id, "end_id": proposal.end_id, "command": shell_command(proposal.command)}
+            if proposal.idrange is not None:
+                record.update(name=proposal.idrange.name, first_id=proposal.idrange.first_id, size=proposal.idrange.size,
+                              base_rid=proposal.idrange.base_rid, secondary_base_rid=proposal.idrange.secondary_base_rid)
+            ranges.append(record)
+        return {"in_local_ranges": len(set(ids)) - len(numbers), "ranges": ranges, "under1000": list(numbers[:start]),
+                "outliers": [number for span in outliers for number in numbers[span.start:span.stop]]}
+
+    # Function to get counters of the service, latencies are in microseconds and measured inside the service
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self.started
+        with self.lock:
+            ops = {op: {"queries": count, "errors": errors, "avg_us": round(total / count / 1000, 1) if count else None,
+                        "max_us": round(slowest / 1000, 1) if count else None, "per_s": round(count / uptime, 1)}
+                   for op, (count, errors, total, slowest) in self.counters.items()}
+            return {"source": self.source, "ranges": len(self.state.ranges), "loaded": self.state.loaded,
+                    "reloads": self.reloads, "reload_errors": self.reload_errors, "uptime_s": round(uptime, 1),
+                    "requests": self.requests, "queries": sum(counter[0] for counter in self.counters.values()), "ops": ops}
+
+# Class for requests over a Unix socket: every line is a JSON query or a list of them, every answer is a JSON line
+class UnixHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_SIZE + 1)
+            if not line:
+                return
+            # the rest of a line too long can't be told from the next request, so the connection is closed
+            if len(line.rstrip(b"\r\n")) > MAX_REQUEST_SIZE:
+                self.wfile.write(json.dumps({"error": f"request is larger than {MAX_REQUEST_SIZE} bytes"}).encode('utf-8') + b"\n")
+                return
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response: Any = {"error": f"invalid JSON: {e}"}
+            else:
+                response = self.server.service.handle(request)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+
+class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+# Class for HTTP requests: POST a JSON query or a list of them to any path, GET /stats for the counters.
+# Connections are kept alive, so a client doesn't pay for a new connection with every query
+class HttpHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # headers and body are written separately, Nagle's algorithm would hold the body back on a kept alive connection
+    disable_nagle_algorithm = True
+
+    def respond(self, code: int, body: Any) -> None:
+        encoded = json.dumps(body).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/stats":
+            self.respond(200, self.server.service.handle({"op": "stats"}))
+        else:
+            self.respond(404, {"error": "POST queries, or GET /stats"})
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        # the body of a refused request is left unread, so its connection can't be used for another one
+        if length < 0 or length > MAX_REQUEST_SIZE:
+            self.close_connection = True
+            if length < 0:
+                self.respond(400, {"error": "invalid Content-Length"})
+            else:
+                self.respond(413, {"error": f"request is larger than {MAX_REQUEST_SIZE} bytes"})
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            self.respond(400, {"error": f"invalid JSON: {e}"})
+            return
+        self.respond(200, self.server.service.handle(request))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+class HttpServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class HttpServer6(HttpServer):
+    address_family = socket.AF_INET6
+
+# Function to parse an address to serve on: "unix:PATH" or "HOST:PORT" with a loopback HOST, as queries are not authenticated
+def parse_address(address: str) -> Tuple[str, Any]:
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    host = host.strip("[]") or "127.0.0.1"
+    try:
+        port_number = int(port)
+        loopback = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        raise ValueError(f"'{address}' is neither unix:PATH nor HOST:PORT")
+    if not loopback:
+        raise ValueError(f"'{host}' is not a loopback address, queries are not authenticated so the service only listens locally")
+    return "http", (host, port_number)
+
+# Function to remove a socket file left over by a service that is not running anymore
+def remove_stale_socket(path: str) -> None:
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.remove(path)
+            return
+        except OSError:
+            return
+    raise OSError(f"another service is listening on '{path}'")
+
+# Function to serve queries on an address until interrupted, checking the source for changes every reload_interval seconds.
+# A Unix socket gets permissions of mode, it is created accessible to the owner only so it is never more open meanwhile
+def serve(service: RangeService, address: str, reload_interval: float = 1.0, mode: int = 0o600) -> None:
+    kind, location = parse_address(address)
+    if kind == "unix":
+        remove_stale_socket(location)
+        umask = os.umask(0o177)
+        try:
+            server: Any = UnixServer(location, UnixHandler)
+        finally:
+            os.umask(umask)
+        os.chmod(location, mode)
+    else:
+        server = (HttpServer6 if ":" in location[0] else HttpServer)(location, HttpHandler)
+    server.service = service
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=service.watch, args=(stop, reload_interval), daemon=True)
+    watcher.start()
+    where = location if kind == "unix" else f"http://{location[0]}:{server.server_address[1]}"
+    print(f"Serving {len(service.state.ranges)} ranges from '{service.source}' on {where}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        if kind == "unix" and os.path.exists(location):
+            os.remove(location)
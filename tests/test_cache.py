@@ -0,0 +1,54 @@
+"""
+Tests of the cache of parsed input files
+"""
+import os
+import tempfile
+import unittest
+
+from ipa_idrange.cache import ParseCache
+from ipa_idrange.inputs import parse_outofrange_store
+
+# Class for tests of cache entries and of recognizing changed files
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.export = os.path.join(self.directory.name, "outofrange.ldif")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_export(self, first: int) -> None:
+        with open(self.export, 'w') as file:
+            for i in range(60000):
+                file.write(f"dn: uid=user{i:05},cn=users,cn=accounts,dc=example,dc=test\nuidNumber: {first + i}\n\n")
+        os.utime(self.export, ns=(10 ** 18, 10 ** 18))
+
+    def test_identities_round_trip(self):
+        cache = ParseCache(os.path.join(self.directory.name, "cache"), 1 << 30)
+        self.write_export(5000)
+        with open(self.export) as file:
+            store = parse_outofrange_store(file)
+        store.sort()
+        key = cache.key(self.export, "identities")
+        cache.store_identities(key, store)
+        loaded = cache.load_identities(key)
+        self.assertEqual(list(loaded.numbers), list(store.numbers))
+        self.assertEqual([loaded.dn(i) for i in range(len(loaded))], [store.dn(i) for i in range(len(store))])
+
+    def test_change_in_the_middle_needs_verify(self):
+        cache = ParseCache(os.path.join(self.directory.name, "cache"), 1 << 30)
+        verifying = ParseCache(cache.directory, cache.max_bytes, verify=True)
+        self.write_export(5000)
+        keys = cache.key(self.export, "identities"), verifying.key(self.export, "identities")
+        # numbers in the middle only, the size, mtime and the first and last MB stay the same
+        with open(self.export, 'r+') as file:
+            text = file.read()
+            file.seek(text.index("uidNumber: ", len(text) // 2) + len("uidNumber: "))
+            file.write("9")
+        os.utime(self.export, ns=(10 ** 18, 10 ** 18))
+        self.assertEqual(cache.key(self.export, "identities"), keys[0])
+        self.assertNotEqual(verifying.key(self.export, "identities"), keys[1])
+
+if __name__ == "__main__":
+    unittest.main()
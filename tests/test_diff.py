@@ -0,0 +1,41 @@
+"""
+Tests of comparing snapshots of ranges
+"""
+import unittest
+
+from ipa_idrange.diff import diff_ranges
+from ipa_idrange.models import IDRange
+
+# Function to make an ipa-local range
+def make_range(name: str, first_id: int, size: int, base_rid: int) -> IDRange:
+    idrange = IDRange()
+    idrange.name, idrange.first_id, idrange.size, idrange.base_rid = name, first_id, size, base_rid
+    idrange.secondary_base_rid = base_rid + 100000000
+    idrange.type = "ipa-local"
+    return idrange
+
+# Class for tests of telling how ranges changed between snapshots
+class DiffRangesTest(unittest.TestCase):
+
+    def kinds(self, baseline, current):
+        return [(change.kind, change.new.name) for change in diff_ranges(baseline, current).changes]
+
+    def test_range_only_moved(self):
+        diff = diff_ranges([make_range("a", 100000, 10000, 1000)], [make_range("a", 300000, 10000, 1000)])
+        self.assertEqual([change.kind for change in diff.changes], ["moved"])
+        self.assertEqual(diff.changes[0].old.first_id, 100000)
+
+    def test_resized_and_modified(self):
+        baseline = [make_range("a", 100000, 10000, 1000), make_range("b", 200000, 10000, 20000)]
+        current = [make_range("a", 100000, 20000, 1000), make_range("b", 200000, 10000, 40000)]
+        self.assertEqual(self.kinds(baseline, current), [("resized", "a"), ("modified", "b")])
+
+    def test_moved_range_is_checked_for_overlaps(self):
+        baseline = [make_range("a", 100000, 10000, 1000), make_range("b", 200000, 10000, 20000)]
+        current = [make_range("a", 205000, 10000, 1000), make_range("b", 200000, 10000, 20000)]
+        diff = diff_ranges(baseline, current)
+        self.assertEqual([(overlap.idrange.name, overlap.other.name) for overlap in diff.overlaps], [("a", "b")])
+        self.assertEqual(diff.uncovered, [(100000, 109999)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+Tests of parsing input files
+"""
+import os
+import bz2
+import gzip
+import lzma
+import tempfile
+import unittest
+
+from ipa_idrange.inputs import READ_ERRORS, iter_outofrange_entries, read_lines_from_file
+
+LDIF = "".join(f"dn: uid=user{i},cn=users,cn=accounts,dc=example,dc=test\nuidNumber: {5000 + i}\n\n" for i in range(2000)).encode()
+
+# Class for tests of out of range LDIF parsing
+class OutofrangeParsingTest(unittest.TestCase):
+
+    def parse(self, text: str):
+        return list(iter_outofrange_entries(text.splitlines(keepends=True)))
+
+    def test_records_separated_by_empty_lines(self):
+        text = ("dn: uid=alice,cn=users,cn=accounts,dc=example,dc=test\nuidNumber: 5000\n\n"
+                "dn: cn=staff,cn=groups,cn=accounts,dc=example,dc=test\ngidNumber: 6000\n")
+        self.assertEqual(self.parse(text), [("uid=alice,cn=users,cn=accounts,dc=example,dc=test", 5000),
+                                            ("cn=staff,cn=groups,cn=accounts,dc=example,dc=test", 6000)])
+
+    def test_records_without_separator(self):
+        text = ("dn: uid=alice,cn=users,cn=accounts,dc=example,dc=test\nuidNumber: 5000\n"
+                "dn: uid=bob,cn=users,cn=accounts,dc=example,dc=test\nuidNumber: 5001\n"
+                "DN: cn=staff,cn=groups,cn=accounts,dc=example,dc=test\ngidNumber: 6000\n")
+        self.assertEqual(self.parse(text), [("uid=alice,cn=users,cn=accounts,dc=example,dc=test", 5000),
+                                            ("uid=bob,cn=users,cn=accounts,dc=example,dc=test", 5001),
+                                            ("cn=staff,cn=groups,cn=accounts,dc=example,dc=test", 6000)])
+
+    def test_record_without_number_does_not_take_next_number(self):
+        text = ("dn: uid=alice,cn=users,cn=accounts,dc=example,dc=test\n"
+                "dn: uid=bob,cn=users,cn=accounts,dc=example,dc=test\nuidNumber: 5001\n")
+        self.assertEqual(self.parse(text), [("uid=bob,cn=users,cn=accounts,dc=example,dc=test", 5001)])
+
+    def test_folded_and_base64_lines(self):
+        text = ("dn: uid=alice,cn=users,cn=accounts,\n dc=example,dc=test\nuidNumber:: NTAwMA==\n")
+        self.assertEqual(self.parse(text), [("uid=alice,cn=users,cn=accounts,dc=example,dc=test", 5000)])
+
+# Class for tests of reading compressed input, damaged input has to fail with one of READ_ERRORS
+class CompressedInputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self, name: str, data: bytes):
+        file_path = os.path.join(self.directory.name, name)
+        with open(file_path, 'wb') as file:
+            file.write(data)
+        return list(iter_outofrange_entries(read_lines_from_file(file_path)))
+
+    def corrupt(self, data: bytes, start: int) -> bytes:
+        return data[:start] + b"\xff" * 16 + data[start + 16:]
+
+    def test_intact(self):
+        for name, data in (("ids.ldif.gz", gzip.compress(LDIF)), ("ids.ldif.bz2", bz2.compress(LDIF)), ("ids.ldif.xz", lzma.compress(LDIF))):
+            self.assertEqual(len(self.read(name, data)), 2000)
+
+    def test_corrupted_gzip(self):
+        # deflate data right after the 10 bytes of gzip header, all ones make a block of invalid type
+        with self.assertRaises(READ_ERRORS):
+            self.read("ids.ldif.gz", self.corrupt(gzip.compress(LDIF), 10))
+
+    def test_corrupted_bzip2(self):
+        data = bz2.compress(LDIF)
+        with self.assertRaises(READ_ERRORS):
+            self.read("ids.ldif.bz2", self.corrupt(data, len(data) // 2))
+
+    def test_corrupted_xz(self):
+        data = lzma.compress(LDIF)
+        with self.assertRaises(READ_ERRORS):
+            self.read("ids.ldif.xz", self.corrupt(data, len(data) // 2))
+
+    def test_truncated(self):
+        for name, data in (("ids.ldif.gz", gzip.compress(LDIF)), ("ids.ldif.bz2", bz2.compress(LDIF)), ("ids.ldif.xz", lzma.compress(LDIF))):
+            with self.assertRaises(READ_ERRORS):
+                self.read(name, data[:len(data) // 2])
+
+if __name__ == "__main__":
+    unittest.main()
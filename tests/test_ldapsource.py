@@ -0,0 +1,23 @@
+"""
+Tests of the LDAP client
+"""
+import unittest
+
+from ipa_idrange.ldapsource import LdapError, LdapPool
+
+# Class for tests of binds the pool allows, a password is never sent in clear text unless asked for
+class LdapPoolBindTest(unittest.TestCase):
+
+    def test_bind_over_ldap_is_refused(self):
+        with self.assertRaises(LdapError):
+            LdapPool("ldap://ipa.example.test", "cn=Directory Manager", "secret")
+
+    def test_bind_over_ldap_allowed_when_insecure(self):
+        LdapPool("ldap://ipa.example.test", "cn=Directory Manager", "secret", insecure=True).close()
+
+    def test_bind_over_ldaps_and_anonymous_bind(self):
+        LdapPool("ldaps://ipa.example.test", "cn=Directory Manager", "secret").close()
+        LdapPool("ldap://ipa.example.test").close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Tests of data structures
+"""
+import random
+import unittest
+
+from ipa_idrange.models import IntervalIndex
+
+# Class for tests of the interval index against a plain scan of all the intervals
+class IntervalIndexTest(unittest.TestCase):
+
+    def test_find_and_overlaps(self):
+        generator = random.Random(4)
+        index = IntervalIndex()
+        intervals = []
+        for number in range(500):
+            start = generator.randrange(100000)
+            end = start + generator.randrange(500)
+            index.insert(start, end, number)
+            intervals.append((start, end, number))
+        self.assertEqual(len(index), 500)
+        for starts in index.member_starts:
+            self.assertEqual(starts, sorted(starts))
+
+        for _ in range(1000):
+            start = generator.randrange(100000)
+            end = start + generator.randrange(2000)
+            expected = sorted(item for first, last, item in intervals if first <= end and last >= start)
+            self.assertEqual(sorted(index.find(start, end)), expected)
+            self.assertEqual(index.overlaps(start, end), bool(expected))
+
+    def test_copy_is_independent(self):
+        index = IntervalIndex()
+        index.insert(10, 20, "a")
+        copy = index.copy()
+        copy.insert(15, 30, "b")
+        self.assertEqual(index.find(0, 100), ["a"])
+        self.assertEqual(sorted(copy.find(0, 100)), ["a", "b"])
+
+if __name__ == "__main__":
+    unittest.main()
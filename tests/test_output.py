@@ -0,0 +1,67 @@
+"""
+Tests of report output, as text and as records
+"""
+import io
+import os
+import unittest
+
+from ipa_idrange.analysis import analyze, sweep
+from ipa_idrange.inputs import parse_idrange_input, parse_outofrange_store, read_input_from_file
+from ipa_idrange.models import AnalysisOptions
+from ipa_idrange.output import render_report, report_records
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+
+# Class for tests of report records
+class ReportRecordsTest(unittest.TestCase):
+
+    def records(self, kind: str):
+        ranges = parse_idrange_input(read_input_from_file(os.path.join(EXAMPLES, "ranges.txt")))
+        return [record for record in report_records(analyze(ranges, None, AnalysisOptions())) if record["record"] == kind]
+
+    def test_rid_proposal_holds_command_and_ldif_only(self):
+        records = self.records("rid_proposal")
+        self.assertTrue(records)
+        for record in records:
+            self.assertEqual(record["command"], 'ldapmodify -D "cn=Directory Manager" -W -x')
+            self.assertTrue(record["ldif"].startswith("dn: cn=" + record["name"] + ","))
+            self.assertIn(f"\nipabaserid: {record['base_rid']}\n", record["ldif"])
+            self.assertNotIn("~~~", record["ldif"])
+            self.assertNotIn("EOF", record["ldif"])
+
+    def test_every_ldapsearch_is_a_record(self):
+        records = self.records("ldapsearch")
+        self.assertEqual([record["type"] for record in records], ["users", "groups"])
+        for record in records:
+            self.assertNotIn("\n", record["command"])
+            self.assertTrue(record["command"].startswith("ldapsearch "))
+            self.assertIn(f'-b "{record["base"]}" "{record["filter"]}"', record["command"])
+
+# Class for tests of user private groups, they count as one identity with their users everywhere
+class UserPrivateGroupsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ranges = parse_idrange_input(read_input_from_file(os.path.join(EXAMPLES, "ranges.txt")))
+        lines = []
+        for number in (5000, 5001, 9000000):
+            lines += [f"dn: uid=user{number},cn=users,cn=accounts,dc=example,dc=test", f"uidNumber: {number}", "",
+                      f"dn: cn=user{number},cn=groups,cn=accounts,dc=example,dc=test", f"gidNumber: {number}", ""]
+        lines += ["dn: cn=staff,cn=groups,cn=accounts,dc=example,dc=test", "gidNumber: 9500000", ""]
+        self.identities = parse_outofrange_store(line + "\n" for line in lines)
+
+    def test_upg_note_is_shown_without_other_collisions(self):
+        analysis = analyze(self.ranges, self.identities, AnalysisOptions())
+        self.assertFalse(analysis.collisions.collisions)
+        report = io.StringIO()
+        render_report(analysis, report)
+        self.assertIn("3 user private groups share numbers with their users", report.getvalue())
+
+    def test_outliers_counted_as_in_sweep(self):
+        analysis = analyze(self.ranges, self.identities, AnalysisOptions(rangegap=10, minrange=10))
+        _, results = sweep(self.identities, [10], [10])
+        self.assertEqual(len(analysis.outliers), 7)
+        self.assertEqual(analysis.outliers.count(analysis.collisions.upg), 4)
+        self.assertEqual(results[0]["outliers"], 4)
+
+if __name__ == "__main__":
+    unittest.main()